@@ -1,8 +1,39 @@
 from typing import Dict, Any
 from .base_agent import BaseAgent
+from .messages import message_payload
+
+_STRING_LIST = {"type": "array", "items": {"type": "string", "maxLength": 120}, "maxItems": 20}
+
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "technical_skills": _STRING_LIST,
+        "years_of_experience": {"type": "integer"},
+        "education": {
+            "type": "object",
+            "properties": {
+                "level": {"type": "string", "maxLength": 40},
+                "field": {"type": "string", "maxLength": 80},
+            },
+            "required": ["level", "field"],
+        },
+        "experience_level": {"type": "string", "enum": ["Junior", "Mid-level", "Senior"]},
+        "key_achievements": {"type": "array", "items": {"type": "string", "maxLength": 200}, "maxItems": 10},
+        "domain_expertise": _STRING_LIST,
+    },
+    "required": [
+        "technical_skills", "years_of_experience", "education",
+        "experience_level", "key_achievements", "domain_expertise",
+    ],
+}
 
 
 class AnalyzerAgent(BaseAgent):
+    stream_json = True
+    # Structured extraction should be repeatable, which also makes it cacheable
+    temperature = 0.0
+    output_schema = ANALYSIS_SCHEMA
+
     def __init__(self):
         super().__init__(
             name="Analyzer",
@@ -21,7 +52,7 @@ class AnalyzerAgent(BaseAgent):
         """Analyze the extracted resume data"""
         print("🔍 Analyzer: Analyzing candidate profile")
 
-        extracted_data = eval(messages[-1]["content"])
+        extracted_data = message_payload(messages[-1])
 
         # Get structured analysis from Ollama
         analysis_prompt = f"""
@@ -44,11 +75,12 @@ class AnalyzerAgent(BaseAgent):
         Return ONLY the JSON object, no other text.
         """
 
-        analysis_results = self._query_ollama(analysis_prompt)
+        analysis_results = await self._query_ollama(analysis_prompt)
         parsed_results = self._parse_json_safely(analysis_results)
 
         # Ensure we have valid data even if parsing fails
-        if "error" in parsed_results:
+        parsed = "error" not in parsed_results
+        if not parsed:
             parsed_results = {
                 "technical_skills": [],
                 "years_of_experience": 0,
@@ -61,7 +93,7 @@ class AnalyzerAgent(BaseAgent):
         return {
             "skills_analysis": parsed_results,
             "analysis_timestamp": "2025-12-14",
-            "confidence_score": 0.85 if "error" not in parsed_results else 0.5,
+            "confidence_score": 0.85 if parsed else 0.5,
         }
 
 
@@ -1,83 +1,212 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable
+import asyncio
 import json
-from transformers import AutoTokenizer, AutoModelForCausalLM
-import os
+import time
+from .model_registry import model_registry, get_default_model_path, get_inference_backend
+from .ollama_client import get_ollama_client, OllamaRequestError
+from .circuit_breaker import CircuitOpenError, get_breaker, ensure_health_probe, llm_fallback
+from .batching import encode_prompt, get_batcher
+from .context_budget import count_tokens
+from .inference_service import get_inference_client
+from .json_schema import constrained_decoding_enabled
+from .telemetry import record_llm_call, record_queue_wait, record_cache_hit
+from .llm_cache import get_llm_cache, make_cache_key, is_cacheable
+from .single_flight import get_single_flight
 
 class BaseAgent:
+    # Agents whose answer is a single JSON object stream it and stop once it closes
+    stream_json = False
+    # None keeps the backend's default sampling; 0 makes answers deterministic (and cacheable)
+    temperature: Optional[float] = None
+    # Opt in to caching sampled answers as well
+    cache_sampled = False
+    # JSON schema the answer must follow; decoding is constrained to it when set
+    output_schema: Optional[Dict[str, Any]] = None
+
     def __init__(self, name: str, instructions: str):
         self.name = name
         self.instructions = instructions
 
-        # initial tokenizer and fine tuned model
-        model_path = "/Users/parsaalizade/Desktop/ai-recruiter-agency/fine-tuning-results"
-        
-        # Check if model path exists, else fallback or warn
-        if os.path.exists(model_path):
-            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-            self.model = AutoModelForCausalLM.from_pretrained(model_path)
-        else:
-            print(f"Warning: Model path {model_path} not found. AI agents may not function correctly.")
-            self.tokenizer = None
-            self.model = None
+        # The fine-tuned model is shared process-wide and only loaded on first use
+        self.model_path = get_default_model_path()
+
+        # Optional callback receiving the partial response text while streaming
+        self.on_partial: Optional[Callable[[str], None]] = None
+
+    @property
+    def tokenizer(self):
+        loaded = model_registry.get(self.model_path)
+        return loaded.tokenizer if loaded else None
+
+    @property
+    def model(self):
+        loaded = model_registry.get(self.model_path)
+        return loaded.model if loaded else None
 
     async def run(self, message: list) -> Dict[str, Any]:
         """default run method to be override by child classes"""
         raise NotImplementedError("Subclasses must implement run()")
 
-    def _query_model(self, prompt: str) -> str:
-        """Query the fine-tuned model with the given prompt"""
-        if not self.model or not self.tokenizer:
+    def _query_model(self, prompt: str, on_partial: Optional[Callable[[str], None]] = None) -> str:
+        """Query the fine-tuned model with the given prompt (in the shared inference service when configured)"""
+        # With AI_INFERENCE_SOCKET set the model lives in the inference service, never in this process
+        service = get_inference_client()
+        if service is None and (not self.model or not self.tokenizer):
             return "Error: Model not loaded."
 
-        try:
-            # Encode the prompt text
-            # Use a larger context window. Most modern models support at least 2048.
-            inputs = self.tokenizer.encode(
-                self.instructions + prompt, 
-                return_tensors="pt", 
-                truncation=True, 
-                max_length=2048 
+        on_partial = on_partial or self.on_partial
+        params = self._local_generation_params()
+        schema = self._decoding_schema()
+        cache = get_llm_cache()
+        cache_key = None
+        if cache is not None and is_cacheable(params.get("temperature", 0), self.cache_sampled):
+            cache_key = make_cache_key(
+                self.model_path, self.instructions, prompt,
+                # The int8 export answers slightly differently, so it gets its own entries
+                dict(
+                    params, backend="local", inference_backend=get_inference_backend(),
+                    stream_json=self.stream_json, schema=schema,
+                ),
             )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                record_cache_hit()
+                if on_partial is not None:
+                    on_partial(cached)
+                return cached
 
-            # Generate response
-            # Use max_new_tokens to specify how much TO generate, regardless of prompt length
-            outputs = self.model.generate(
-                inputs, 
-                max_new_tokens=1000,
-                num_return_sequences=1, 
-                temperature=0.7,
-                do_sample=True # Enable sampling for more creative/varied outputs
-            )
+        try:
+            breaker = get_breaker("local")
+            if service is not None:
+                ensure_health_probe("local", service.check_health)
+            if not breaker.allow_request():
+                raise CircuitOpenError("Local model circuit is open")
+
+            # Generate response; concurrent callers are batched into a single generate() call
+            try:
+                if service is not None:
+                    # Batched there together with the requests of every other process
+                    response = service.generate(
+                        self.model_path, self.instructions, prompt, params,
+                        stream_json=self.stream_json, on_partial=on_partial, schema=schema,
+                    )
+                else:
+                    prefix_ids, input_ids = encode_prompt(self.tokenizer, self.instructions, prompt)
+                    response = get_batcher(self.model_path).generate(
+                        input_ids, params, prefix_ids=prefix_ids, stream_json=self.stream_json,
+                        on_partial=on_partial, schema=schema,
+                    )
+            except Exception as e:
+                breaker.record_failure(e)
+                raise
+            breaker.record_success()
 
-            # Decode the generated output
-            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+            if cache_key is not None:
+                cache.put(cache_key, response)
             return response
 
         except Exception as e:
             print(f"Error querying the model: {str(e)}")
             raise
 
-    def _query_ollama(self, prompt: str) -> str:
-        """Query the running Ollama instance via HTTP API"""
-        url = "http://localhost:11434/api/generate"
-        payload = {
-            "model": "llama3.1",
-            "prompt": self.instructions + "\n" + prompt,
-            "stream": False,
-            "format": "json" 
-        }
-        
-        try:
-            import requests
-            print(f"DEBUG: Sending query to Ollama: {url}")
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
+    async def _query_ollama(self, prompt: str, on_partial: Optional[Callable[[str], None]] = None) -> str:
+        """Query the running Ollama instance via the shared async client"""
+        client = get_ollama_client()
+        on_partial = on_partial or self.on_partial
+        breaker = get_breaker("ollama")
+        ensure_health_probe("ollama", client.check_health)
+        options = {"temperature": self.temperature} if self.temperature is not None else None
+
+        # Ollama accepts a JSON schema as format and constrains sampling to it
+        output_format = self._decoding_schema() or "json"
+        params = {"backend": "ollama", "options": options, "format": output_format, "stream_json": self.stream_json}
+        cache = get_llm_cache()
+        cache_key = None
+        if cache is not None and is_cacheable(self.temperature, self.cache_sampled):
+            cache_key = make_cache_key(client.settings.model, self.instructions, prompt, params)
+            cached = await cache.aget(cache_key)
+            if cached is not None:
+                record_cache_hit()
+                if on_partial is not None:
+                    on_partial(cached)
+                return cached
+
+        if not breaker.allow_request():
+            # Ollama is known to be down: don't make this request wait for a timeout too
+            return await self._ollama_unavailable(prompt, on_partial, CircuitOpenError("Ollama circuit is open"))
+
+        full_prompt = self.instructions + "\n" + prompt
+
+        async def _generate() -> str:
+            print(f"DEBUG: Sending query to Ollama: {client.settings.generate_url}")
+            try:
+                if self.stream_json:
+                    data = await client.generate_json_stream(
+                        full_prompt, format=output_format, options=options, on_partial=on_partial
+                    )
+                else:
+                    data = await client.generate(full_prompt, format=output_format, options=options)
+            except OllamaRequestError:
+                # Ollama answered, so the backend itself is healthy
+                breaker.record_success()
+                raise
+            except Exception as e:
+                breaker.record_failure(e)
+                raise
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.record_success()
             print("DEBUG: Ollama response received")
-            return response.json().get("response", "")
+            response = data.get("response", "")
+            # Ollama reports exact counts; streams we hang up on early don't, so count those locally
+            record_llm_call(
+                data.get("prompt_eval_count") or count_tokens(full_prompt),
+                data.get("eval_count") or count_tokens(response),
+            )
+            if cache_key is not None and response:
+                await cache.aput(cache_key, response)
+            return response
+
+        try:
+            flights = get_single_flight()
+            if flights is None:
+                return await _generate()
+
+            # Identical prompts already in flight (double submits, parallel workers) share one request
+            flight_key = cache_key or make_cache_key(client.settings.model, self.instructions, prompt, params)
+            waiting_since = time.perf_counter()
+            response, shared = await flights.do(flight_key, _generate)
+            if shared:
+                record_queue_wait((time.perf_counter() - waiting_since) * 1000)
+                if on_partial is not None:
+                    on_partial(response)
+            return response
         except Exception as e:
             print(f"Error querying Ollama: {e}")
-            # Fallback to local model if available, or raise
-            return self._query_model(prompt)
+            return await self._ollama_unavailable(prompt, on_partial, e)
+
+    async def _ollama_unavailable(
+        self, prompt: str, on_partial: Optional[Callable[[str], None]], error: Exception
+    ) -> str:
+        """Apply the configured fallback (AI_LLM_FALLBACK) when Ollama can't serve a request"""
+        if llm_fallback() != "local":
+            raise error
+        # Fallback to local model if available; generation is CPU bound so keep it off the event loop
+        return await asyncio.to_thread(self._query_model, prompt, on_partial)
+
+    def _decoding_schema(self) -> Optional[Dict[str, Any]]:
+        """Schema to constrain decoding to (AI_CONSTRAINED_DECODING=0 falls back to free-form JSON)"""
+        return self.output_schema if constrained_decoding_enabled() else None
+
+    def _local_generation_params(self) -> Dict[str, Any]:
+        """Sampling settings for the local model (sampling at 0.7 unless the agent pins a temperature)"""
+        temperature = 0.7 if self.temperature is None else self.temperature
+        # Use max_new_tokens to specify how much TO generate, regardless of prompt length
+        params: Dict[str, Any] = {"max_new_tokens": 1000, "do_sample": temperature > 0}
+        if temperature > 0:
+            params["temperature"] = temperature
+        return params
 
     def _parse_json_safely(self, text: str) -> Dict[str, Any]:
         """Safely parse JSON from text, handling potential errors"""
@@ -0,0 +1,259 @@
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+import json
+import os
+import queue
+import threading
+import time
+
+from .json_schema import schema_logits_processor
+from .json_stream import json_object_text, json_stopping_criteria
+from .model_registry import LoadedModel, model_registry
+from .prefix_cache import PrefixKVCache
+from .telemetry import StageUsage, current_usage
+
+
+def encode_prompt(tokenizer, instructions: str, prompt: str, context_window: int = 2048) -> Tuple[List[int], List[int]]:
+    """Token ids of the instructions and of the prompt, cut so that both fit the context window.
+
+    The instructions are encoded on their own so their key/values can be
+    reused across requests (prefix KV cache).
+    """
+    prefix_ids = tokenizer.encode(instructions)
+    input_ids = tokenizer.encode(prompt, truncation=True, max_length=max(context_window - len(prefix_ids), 1))
+    return prefix_ids, input_ids
+
+
+@dataclass
+class GenerationRequest:
+    """One prompt waiting for the local model"""
+
+    input_ids: List[int]
+    params: Dict[str, Any]
+    # Static instruction tokens in front of input_ids, served from the prefix KV cache
+    prefix_ids: List[int] = field(default_factory=list)
+    stream_json: bool = False
+    on_partial: Optional[Callable[[str], None]] = None
+    # JSON schema the completion is constrained to (see json_schema)
+    schema: Optional[Dict[str, Any]] = None
+    future: Future = field(default_factory=Future)
+    # Usage of the workflow stage that submitted this request (captured in the caller's context)
+    usage: Optional[StageUsage] = field(default_factory=current_usage)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def batch_key(self) -> str:
+        # Only requests with identical generation settings can share a generate() call
+        # and a shared prefix cache
+        return json.dumps(
+            [self.params, self.stream_json, self.schema, hash(tuple(self.prefix_ids))], sort_keys=True
+        )
+
+
+class GenerationBatcher:
+    """Dynamic batching for the local transformers model.
+
+    Concurrent callers submit prompts; a single worker thread collects them
+    for up to max_wait_ms (or until max_batch_size are waiting), left-pads
+    them into one tensor, runs one generate() call and resolves each
+    caller's future with its own decoded answer.
+    """
+
+    def __init__(
+        self,
+        loaded: LoadedModel,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        prefix_cache: bool = True,
+    ):
+        self.loaded = loaded
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        # Reusing key/values needs a torch cache object; exported (ONNX) models prefill everything
+        self.prefix_cache = PrefixKVCache() if prefix_cache and loaded.backend == "torch" else None
+
+        self._queue: "queue.Queue[GenerationRequest]" = queue.Queue()
+        self._held: List[GenerationRequest] = []
+        self._stats = {"batches": 0, "requests": 0, "max_batch": 0}
+        self._worker = threading.Thread(
+            target=self._run, name=f"generation-batcher-{os.path.basename(loaded.path)}", daemon=True
+        )
+        self._worker.start()
+
+    @classmethod
+    def from_env(cls, loaded: LoadedModel) -> "GenerationBatcher":
+        return cls(
+            loaded,
+            max_batch_size=int(os.getenv("AI_BATCH_MAX_SIZE", 8)),
+            max_wait_ms=float(os.getenv("AI_BATCH_MAX_WAIT_MS", 10)),
+            prefix_cache=os.getenv("AI_PREFIX_CACHE", "1").lower() not in ("0", "false", "no"),
+        )
+
+    def submit(
+        self,
+        input_ids: List[int],
+        params: Dict[str, Any],
+        prefix_ids: Optional[List[int]] = None,
+        stream_json: bool = False,
+        on_partial: Optional[Callable[[str], None]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> Future:
+        request = GenerationRequest(
+            list(input_ids), dict(params), list(prefix_ids or []), stream_json, on_partial, schema
+        )
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, input_ids: List[int], params: Dict[str, Any], **kwargs) -> str:
+        """Blocking helper: submit and wait for the answer"""
+        return self.submit(input_ids, params, **kwargs).result()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize() + len(self._held)
+        stats["avg_batch"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        if self.prefix_cache is not None:
+            stats["prefix_cache"] = self.prefix_cache.stats()
+        return stats
+
+    # --- Worker ---
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                print(f"Error in batched generation: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _collect(self) -> List[GenerationRequest]:
+        """Wait for a first request, then gather compatible ones until the batch is full or the window closes"""
+        first = self._held.pop(0) if self._held else self._queue.get()
+        batch = [first]
+        key = first.batch_key
+
+        # Requests held back from an earlier round go first
+        for request in list(self._held):
+            if len(batch) >= self.max_batch_size:
+                break
+            if request.batch_key == key:
+                self._held.remove(request)
+                batch.append(request)
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request.batch_key == key:
+                batch.append(request)
+            else:
+                self._held.append(request)
+        return batch
+
+    def _run_batch(self, batch: List[GenerationRequest]) -> None:
+        import torch
+
+        tokenizer, model = self.loaded.tokenizer, self.loaded.model
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        prefix_ids = batch[0].prefix_ids
+
+        past_key_values = None
+        # At least one suffix token per batch is needed to start generating from a cached prefix
+        if prefix_ids and self.prefix_cache is not None and any(r.input_ids for r in batch):
+            try:
+                past_key_values = self.prefix_cache.get(model, prefix_ids, len(batch))
+            except Exception as e:
+                # Backends without a reusable cache object simply prefill everything
+                print(f"Warning: prefix KV cache disabled for {self.loaded.path}: {e}")
+                self.prefix_cache = None
+
+        if past_key_values is not None:
+            # Cached prefix first, then each suffix left-padded against it; the
+            # attention mask hides the padding in the middle of the row
+            rows = [r.input_ids for r in batch]
+            lead = prefix_ids
+        else:
+            rows = [r.prefix_ids + r.input_ids for r in batch]
+            lead = []
+
+        # Decoder-only models need left padding so every row continues from its last real token
+        width = len(lead) + max(len(ids) for ids in rows)
+        input_ids = torch.full((len(batch), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+        if lead:
+            input_ids[:, : len(lead)] = torch.tensor(lead, dtype=torch.long)
+            attention_mask[:, : len(lead)] = 1
+        for row, ids in enumerate(rows):
+            if ids:
+                input_ids[row, width - len(ids):] = torch.tensor(ids, dtype=torch.long)
+                attention_mask[row, width - len(ids):] = 1
+
+        generate_kwargs: Dict[str, Any] = dict(batch[0].params)
+        if past_key_values is not None:
+            generate_kwargs["past_key_values"] = past_key_values
+        trackers = None
+        if batch[0].stream_json:
+            generate_kwargs["stopping_criteria"], trackers = json_stopping_criteria(
+                tokenizer, width, [r.on_partial for r in batch]
+            )
+        if batch[0].schema is not None:
+            generate_kwargs["logits_processor"] = schema_logits_processor(
+                tokenizer, batch[0].schema, width, len(batch)
+            )
+
+        generate_started = time.perf_counter()
+        with torch.no_grad():
+            outputs = model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                pad_token_id=pad_id,
+                num_return_sequences=1,
+                **generate_kwargs,
+            )
+
+        generate_ms = (time.perf_counter() - generate_started) * 1000
+
+        self._stats["batches"] += 1
+        self._stats["requests"] += len(batch)
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+
+        for row, request in enumerate(batch):
+            if request.usage is not None:
+                generated = int((outputs[row, width:] != pad_id).sum())
+                request.usage.add(len(request.prefix_ids) + len(request.input_ids), generated, generate_ms)
+                request.usage.queue_wait_ms += (generate_started - request.enqueued_at) * 1000
+
+            if trackers is not None:
+                # Decoded in one call, then cut after the closing brace the stream stopped at
+                response = json_object_text(tokenizer.decode(outputs[row, width:], skip_special_tokens=True))
+            else:
+                # Same output as the unbatched path: prompt and completion, without padding
+                response = tokenizer.decode(outputs[row], skip_special_tokens=True)
+            request.future.set_result(response)
+
+
+_batchers: Dict[str, GenerationBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model_path: str) -> Optional[GenerationBatcher]:
+    """Process-wide batcher for a model path (None if the model can't be loaded)"""
+    batcher = _batchers.get(model_path)
+    if batcher is not None:
+        return batcher
+
+    loaded = model_registry.get(model_path)
+    if loaded is None:
+        return None
+    with _batchers_lock:
+        if model_path not in _batchers:
+            _batchers[model_path] = GenerationBatcher.from_env(loaded)
+        return _batchers[model_path]
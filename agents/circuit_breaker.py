@@ -0,0 +1,206 @@
+from typing import Dict, Any, Callable, Optional
+import os
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit is open"""
+
+    pass
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one LLM backend.
+
+    closed: requests flow; failure_threshold consecutive failures open it.
+    open: requests are rejected immediately until recovery_timeout passes
+    (or a health probe sees the backend come back).
+    half_open: a single trial request is let through; its outcome closes
+    the breaker again or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now (reserves the trial slot when half-open)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._stats["successes"] += 1
+            if self._state != self.CLOSED:
+                print(f"Circuit '{self.name}' closed: backend recovered")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            self._last_error = str(error) if error is not None else None
+            if self._current_state() == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def release(self) -> None:
+        """Give back a half-open trial slot whose request ended without an outcome (cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def trip(self, error: Optional[BaseException] = None) -> None:
+        """Open the breaker right away (e.g. a health probe found the backend unreachable)"""
+        with self._lock:
+            self._last_error = str(error) if error is not None else self._last_error
+            if self._state == self.CLOSED or self._current_state() == self.HALF_OPEN:
+                self._open()
+
+    def _open(self) -> None:
+        if self._state != self.OPEN:
+            self._stats["opened"] += 1
+            print(f"Warning: circuit '{self.name}' opened: {self._last_error}")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            snapshot = dict(self._stats)
+            snapshot.update(
+                {
+                    "name": self.name,
+                    "state": state,
+                    "consecutive_failures": self._failures,
+                    "last_error": self._last_error,
+                    "retry_in_seconds": (
+                        round(max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0), 1)
+                        if state == self.OPEN
+                        else 0
+                    ),
+                }
+            )
+            return snapshot
+
+
+class HealthProbe:
+    """Background thread checking a backend every interval seconds.
+
+    A failed check opens the breaker before requests have to discover the
+    outage through timeouts; a successful one closes it without waiting
+    for the recovery timeout.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, check: Callable[[], None], interval: float = 10.0):
+        self.breaker = breaker
+        self.check = check
+        self.interval = interval
+        self.last_check: Optional[float] = None
+        self.last_ok: Optional[bool] = None
+        self._thread = threading.Thread(target=self._run, name=f"health-probe-{breaker.name}", daemon=True)
+
+    def start(self) -> "HealthProbe":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                self.last_ok = False
+                self.breaker.trip(e)
+            else:
+                self.last_ok = True
+                if self.breaker.state != CircuitBreaker.CLOSED:
+                    self.breaker.record_success()
+            self.last_check = time.time()
+            time.sleep(self.interval)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_probes: Dict[str, HealthProbe] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a backend ("ollama", "local")"""
+    breaker = _breakers.get(name)
+    if breaker is not None:
+        return breaker
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("AI_BREAKER_FAILURES", 3)),
+                recovery_timeout=float(os.getenv("AI_BREAKER_RECOVERY", 30)),
+            )
+        return _breakers[name]
+
+
+def ensure_health_probe(name: str, check: Callable[[], None]) -> None:
+    """Start the background probe for a backend once per process (AI_HEALTH_PROBE_INTERVAL=0 disables)"""
+    interval = float(os.getenv("AI_HEALTH_PROBE_INTERVAL", 10))
+    if interval <= 0 or name in _probes:
+        return
+    breaker = get_breaker(name)
+    with _breakers_lock:
+        if name not in _probes:
+            _probes[name] = HealthProbe(breaker, check, interval).start()
+
+
+def llm_fallback() -> str:
+    """What to do when Ollama is unavailable: "local" model or "none" (fail fast)"""
+    return os.getenv("AI_LLM_FALLBACK", "local").lower()
+
+
+def breaker_report(detailed: bool = True) -> Dict[str, Any]:
+    """State of every breaker and health probe, for health endpoints.
+
+    Without detailed, only each backend's state: error messages and
+    counters are for admins, not for anonymous health checks.
+    """
+    if not detailed:
+        return {"backends": {name: {"state": breaker.state} for name, breaker in list(_breakers.items())}}
+    report: Dict[str, Any] = {"fallback": llm_fallback(), "backends": {}}
+    for name, breaker in list(_breakers.items()):
+        entry = breaker.snapshot()
+        probe = _probes.get(name)
+        if probe is not None:
+            entry["probe"] = {"last_check": probe.last_check, "last_ok": probe.last_ok, "interval": probe.interval}
+        report["backends"][name] = entry
+    return report
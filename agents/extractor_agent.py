@@ -1,8 +1,41 @@
 from typing import Dict, Any
-from pdfminer.high_level import extract_text 
 from .base_agent import BaseAgent
+from .messages import message_payload
+from .pdf_pool import get_pdf_pool
+
+
+def _object(**properties) -> Dict[str, Any]:
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def _text(max_length: int = 120) -> Dict[str, Any]:
+    return {"type": "string", "maxLength": max_length}
+
+
+# Downstream consumers (skill matching, candidate records) read "skills" from this
+EXTRACTION_SCHEMA = _object(
+    personal_info=_object(name=_text(), email=_text(), phone=_text(40), location=_text()),
+    work_experience={
+        "type": "array",
+        "items": _object(title=_text(), company=_text(), duration=_text(60)),
+        "maxItems": 10,
+    },
+    education={
+        "type": "array",
+        "items": _object(degree=_text(), institution=_text(), year=_text(20)),
+        "maxItems": 5,
+    },
+    skills={"type": "array", "items": _text(60), "maxItems": 40},
+    certifications={"type": "array", "items": _text(), "maxItems": 10},
+)
+
 
 class ExtractorAgent(BaseAgent):
+    stream_json = True
+    # Structured extraction should be repeatable, which also makes it cacheable
+    temperature = 0.0
+    output_schema = EXTRACTION_SCHEMA
+
     def __init__(self):
         super().__init__(
             name="Extractor",
@@ -15,16 +48,17 @@ class ExtractorAgent(BaseAgent):
         """Process the resume and extract information"""
         print("📄 Extractor: Processing resume")
         
-        resume_data = eval(messages[-1]["content"])
+        resume_data = message_payload(messages[-1])
         
         # Extract text from PDF
         if resume_data.get("file_path"):
-            raw_text = extract_text(resume_data["file_path"])
+            # Parsed in the PDF process pool so the event loop keeps serving other requests
+            raw_text = await get_pdf_pool().extract(resume_data["file_path"], backend="pdfminer")
         else:
             raw_text = resume_data.get("text", "")
 
         # Get structured information from Ollama
-        extracted_info = self._query_ollama(raw_text)
+        extracted_info = await self._query_ollama(raw_text)
 
         return {
             "raw_text": raw_text,
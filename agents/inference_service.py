@@ -0,0 +1,306 @@
+"""Shared local inference service.
+
+Every process that uses the local model (the gunicorn workers, the job
+worker, an import) otherwise loads its own copy of the weights. With
+AI_INFERENCE_SOCKET set, BaseAgent._query_model sends its prompts to this
+service instead: one process on a Unix socket holds the model, tokenizes,
+and feeds every client's requests into the same GenerationBatcher, so
+requests from different workers share generate() calls.
+
+    python -m agents.inference_service --socket /run/ai-inference/inference.sock
+    python -m agents.inference_service --socket /run/ai-inference/inference.sock --status
+
+Protocol: one request per connection, JSON lines both ways. A request is
+{"op": "generate" | "health" | "metrics", ...}; a generation answers with
+any number of {"partial": text} lines (when asked for) followed by
+{"response": text, "usage": {...}} or {"error": message}.
+"""
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import threading
+import time
+
+from .batching import encode_prompt, get_batcher
+from .model_registry import model_registry, get_default_model_path
+from .telemetry import record_llm_call, record_queue_wait, track_stage_usage
+
+DEFAULT_SOCKET_PATH = "/tmp/ai-recruiter-inference.sock"
+
+
+class InferenceServiceError(RuntimeError):
+    """Raised when the inference service can't be reached or couldn't answer"""
+
+    pass
+
+
+# --- Client (in the web and job workers) ---
+class InferenceClient:
+    """Blocking client, called from the thread _query_model already runs in"""
+
+    def __init__(self, socket_path: str, timeout: float = 300.0, health_timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.health_timeout = health_timeout
+
+    @classmethod
+    def from_env(cls) -> Optional["InferenceClient"]:
+        socket_path = os.getenv("AI_INFERENCE_SOCKET", "")
+        if not socket_path:
+            return None
+        return cls(socket_path, timeout=float(os.getenv("AI_INFERENCE_TIMEOUT", 300)))
+
+    def generate(
+        self,
+        model_path: str,
+        instructions: str,
+        prompt: str,
+        params: Dict[str, Any],
+        stream_json: bool = False,
+        on_partial: Optional[Callable[[str], None]] = None,
+        schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        request = {
+            "op": "generate",
+            "model_path": model_path,
+            "instructions": instructions,
+            "prompt": prompt,
+            "params": params,
+            "stream_json": stream_json,
+            "schema": schema,
+            "partials": on_partial is not None,
+        }
+        replies = self._call(request, self.timeout)
+        try:
+            for message in replies:
+                if "partial" not in message:
+                    break
+                on_partial(message["partial"])
+        finally:
+            replies.close()
+
+        # Counted against the calling workflow stage as if the model ran here
+        usage = message.get("usage") or {}
+        record_llm_call(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0), usage.get("llm_ms", 0.0))
+        record_queue_wait(usage.get("queue_wait_ms", 0.0))
+        return message["response"]
+
+    def health(self) -> Dict[str, Any]:
+        return self._single({"op": "health"})
+
+    def metrics(self) -> Dict[str, Any]:
+        return self._single({"op": "metrics"})
+
+    def check_health(self) -> None:
+        """For the circuit breaker's health probe: raises unless the service answers"""
+        self.health()
+
+    def _single(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        replies = self._call(request, self.health_timeout)
+        try:
+            return next(replies)
+        finally:
+            replies.close()
+
+    def _call(self, request: Dict[str, Any], timeout: float) -> Iterator[Dict[str, Any]]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(json.dumps(request).encode() + b"\n")
+                with sock.makefile("rb") as replies:
+                    for line in replies:
+                        message = json.loads(line)
+                        if "error" in message:
+                            raise InferenceServiceError(f"Inference service: {message['error']}")
+                        yield message
+        except OSError as e:
+            raise InferenceServiceError(f"Inference service at {self.socket_path} unavailable: {e}") from e
+        raise InferenceServiceError("Inference service closed the connection without answering")
+
+
+_client: Optional[InferenceClient] = None
+_client_lock = threading.Lock()
+_client_loaded = False
+
+
+def get_inference_client() -> Optional[InferenceClient]:
+    """Process-wide client, or None when AI_INFERENCE_SOCKET isn't set (the model runs in-process)"""
+    global _client, _client_loaded
+    if not _client_loaded:
+        with _client_lock:
+            if not _client_loaded:
+                _client = InferenceClient.from_env()
+                _client_loaded = True
+    return _client
+
+
+# --- Server ---
+class InferenceServer:
+    """Serves generation requests from every worker on a Unix socket.
+
+    Models are loaded through the model registry (once, on first use or
+    with preload) and each one gets the usual GenerationBatcher. At most
+    max_queue requests are accepted at a time; beyond that clients get an
+    error right away instead of waiting behind an ever-growing backlog.
+    """
+
+    def __init__(self, socket_path: str, max_queue: int = 64):
+        self.socket_path = socket_path
+        self.max_queue = max(1, max_queue)
+        self.started_at = time.time()
+        self._in_flight = 0
+        self._stats = {"requests": 0, "completed": 0, "errors": 0, "rejected": 0}
+
+    async def serve(self, preload: Optional[str] = None) -> None:
+        if preload:
+            # Load before accepting connections so the first request doesn't pay for it
+            await asyncio.to_thread(model_registry.get, preload)
+        if os.path.exists(self.socket_path):
+            # Left behind by a service that didn't shut down cleanly
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        # Workers usually run as another user of the same group
+        os.chmod(self.socket_path, 0o660)
+        print(f"Inference service listening on {self.socket_path}")
+        try:
+            async with server:
+                await stopping.wait()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "memory": model_registry.memory_report(),
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        batchers = {}
+        for path in model_registry.loaded_paths():
+            batcher = get_batcher(path)
+            if batcher is not None:
+                batchers[path] = batcher.stats()
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "max_queue": self.max_queue,
+            "batchers": batchers,
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(await reader.readline())
+            op = request.get("op")
+            if op == "generate":
+                await self._generate(request, writer)
+            elif op == "health":
+                await self._send(writer, self.health())
+            elif op == "metrics":
+                await self._send(writer, self.metrics())
+            else:
+                await self._send(writer, {"error": f"Unknown op {op!r}"})
+        except (ValueError, AttributeError) as e:
+            await self._send(writer, {"error": f"Bad request: {e}"})
+        except ConnectionError:
+            # The client gave up (timeout, worker restarted)
+            pass
+        finally:
+            writer.close()
+
+    async def _generate(self, request: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        if self._in_flight >= self.max_queue:
+            self._stats["rejected"] += 1
+            await self._send(writer, {"error": f"Busy ({self.max_queue} requests queued)"})
+            return
+
+        self._in_flight += 1
+        self._stats["requests"] += 1
+        try:
+            prepared = await asyncio.to_thread(self._prepare, request)
+            if prepared is None:
+                # An error, not an answer: clients must neither cache it nor count it as a success
+                self._stats["errors"] += 1
+                await self._send(writer, {"error": f"Model not loaded from {request['model_path']}"})
+                return
+
+            on_partial = None
+            if request.get("partials"):
+                loop = asyncio.get_running_loop()
+
+                def on_partial(text: str) -> None:
+                    # Called on the batcher thread
+                    loop.call_soon_threadsafe(writer.write, json.dumps({"partial": text}).encode() + b"\n")
+
+            batcher, prefix_ids, input_ids = prepared
+            with track_stage_usage() as usage:
+                # The request keeps the usage object; the batcher fills it in once it ran
+                future = batcher.submit(
+                    input_ids, request.get("params") or {}, prefix_ids=prefix_ids,
+                    stream_json=bool(request.get("stream_json")), on_partial=on_partial,
+                    schema=request.get("schema"),
+                )
+            response = await asyncio.wrap_future(future)
+            self._stats["completed"] += 1
+            await self._send(writer, {"response": response, "usage": usage.as_dict()})
+        except ConnectionError:
+            raise
+        except Exception as e:
+            self._stats["errors"] += 1
+            await self._send(writer, {"error": str(e) or type(e).__name__})
+        finally:
+            self._in_flight -= 1
+
+    @staticmethod
+    def _prepare(request: Dict[str, Any]) -> Optional[Tuple[Any, List[int], List[int]]]:
+        """Batcher and token ids for a request (loads the model on first use; blocking)"""
+        loaded = model_registry.get(request["model_path"])
+        batcher = get_batcher(request["model_path"])
+        if loaded is None or batcher is None:
+            return None
+        prefix_ids, input_ids = encode_prompt(loaded.tokenizer, request["instructions"], request["prompt"])
+        return batcher, prefix_ids, input_ids
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+        writer.write(json.dumps(message, default=str).encode() + b"\n")
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=os.getenv("AI_INFERENCE_SOCKET") or DEFAULT_SOCKET_PATH)
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("AI_INFERENCE_MAX_QUEUE", 64)),
+                        help="Requests accepted at once (generating or waiting for a batch)")
+    parser.add_argument("--no-preload", action="store_true", help="Load the model on the first request instead")
+    parser.add_argument("--status", action="store_true", help="Print the health and metrics of a running service")
+    args = parser.parse_args()
+
+    if args.status:
+        client = InferenceClient(args.socket)
+        print(json.dumps({"health": client.health(), "metrics": client.metrics()}, indent=2))
+        return
+
+    server = InferenceServer(args.socket, max_queue=args.max_queue)
+    asyncio.run(server.serve(preload=None if args.no_preload else get_default_model_path()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from typing import Optional, Callable, Sequence
+
+
+class JsonObjectTracker:
+    """Incrementally tracks brace depth of streamed text.
+
+    Text before the first "{" is ignored. Braces inside JSON strings (and
+    escaped quotes) don't count, so the tracker reports completion exactly
+    when the top-level object closes and generation can be cancelled.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.depth = 0
+        self.started = False
+        self.complete = False
+        self.end_index: Optional[int] = None
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk of generated text; returns True once the object is closed"""
+        if self.complete:
+            return True
+
+        offset = len(self.text)
+        self.text += chunk
+
+        for i, ch in enumerate(chunk):
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    self.end_index = offset + i + 1
+                    return True
+
+        return False
+
+    @property
+    def result(self) -> str:
+        """Generated text, cut right after the closing brace once complete"""
+        if self.end_index is not None:
+            return self.text[: self.end_index]
+        return self.text
+
+
+def json_object_text(text: str) -> str:
+    """text cut right after its first complete top-level JSON object (unchanged if none closes)"""
+    tracker = JsonObjectTracker()
+    tracker.feed(text)
+    return tracker.result
+
+
+class IncrementalDetokenizer:
+    """Text of a growing sequence of token ids, as new suffixes.
+
+    Decoding tokens one at a time loses SentencePiece word-boundary spaces
+    ("John Smith" comes out as "JohnSmith") and splits characters made of
+    several byte-fallback tokens into U+FFFD. Instead the whole completion
+    so far is decoded and only what was added since the last call is
+    returned, holding back text that ends in an incomplete character (the
+    approach of transformers' TextStreamer).
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.emitted = 0
+
+    def feed(self, token_ids) -> str:
+        """New text given all completion token ids so far ("" while a character is incomplete)"""
+        text = self.tokenizer.decode(token_ids, skip_special_tokens=True)
+        if text.endswith("\ufffd"):
+            return ""
+        new_text = text[self.emitted:]
+        self.emitted = len(text)
+        return new_text
+
+
+def json_stopping_criteria(
+    tokenizer,
+    prompt_length: int,
+    on_partials: Sequence[Optional[Callable[[str], None]]] = (None,),
+):
+    """Stopping criteria for model.generate that ends each row once its JSON object closes.
+
+    Works on batches: one tracker per row (len(on_partials) rows), and
+    generation stops when every row is complete. Returns (criteria_list,
+    trackers). The trackers only decide when to stop; the answer itself
+    should be decoded from the output ids in one call (json_object_text).
+    """
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    trackers = [JsonObjectTracker() for _ in on_partials]
+    detokenizers = [IncrementalDetokenizer(tokenizer) for _ in on_partials]
+
+    class _JsonObjectClosed(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            done = []
+            for row, (tracker, on_partial) in enumerate(zip(trackers, on_partials)):
+                if input_ids.shape[-1] > prompt_length and not tracker.complete:
+                    new_text = detokenizers[row].feed(input_ids[row, prompt_length:])
+                    if new_text:
+                        tracker.feed(new_text)
+                        if on_partial is not None:
+                            on_partial(tracker.result)
+                done.append(tracker.complete)
+            return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([_JsonObjectClosed()]), trackers
@@ -0,0 +1,260 @@
+from typing import Dict, Any, Optional, Iterator
+from collections import OrderedDict
+from contextlib import contextmanager
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-recruiter")
+
+
+def make_cache_key(model: str, instructions: str, prompt: str, params: Dict[str, Any]) -> str:
+    """Content address of an LLM request: everything that can change the answer"""
+    material = json.dumps(
+        {"model": model, "instructions": instructions, "prompt": prompt, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature: Optional[float], allow_sampled: bool = False) -> bool:
+    """Deterministic (temperature 0) requests are cached by default, sampled ones only on opt-in"""
+    return allow_sampled or temperature == 0
+
+
+class LLMCache:
+    """Two-tier cache for LLM responses.
+
+    A bounded in-memory LRU sits in front of a SQLite file shared by every
+    process on the box. Entries expire after ttl_seconds; the disk tier is
+    trimmed to max_disk_bytes by evicting the least recently used entries.
+    """
+
+    # Trim the disk tier every N writes rather than on every put
+    EVICT_EVERY = 50
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_entries: int = 256,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: float = 7 * 24 * 3600,
+    ):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "llm_cache.sqlite3")
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0, "writes": 0}
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+
+    @classmethod
+    def from_env(cls) -> "LLMCache":
+        cache_dir = os.getenv("AI_LLM_CACHE_DIR", DEFAULT_CACHE_DIR)
+        return cls(
+            path=os.path.join(cache_dir, "llm_cache.sqlite3"),
+            max_memory_entries=int(os.getenv("AI_LLM_CACHE_MEMORY_ENTRIES", 256)),
+            max_memory_bytes=int(float(os.getenv("AI_LLM_CACHE_MEMORY_MB", 32)) * 1024 * 1024),
+            max_disk_bytes=int(float(os.getenv("AI_LLM_CACHE_DISK_MB", 512)) * 1024 * 1024),
+            ttl_seconds=float(os.getenv("AI_LLM_CACHE_TTL", 7 * 24 * 3600)),
+        )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Memory tier ---
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if time.time() - created_at > self.ttl_seconds:
+                self._memory_drop(key)
+                return None
+            self._memory.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            self._stats["bytes_saved"] += len(value.encode("utf-8"))
+            return value
+
+    def _memory_put(self, key: str, value: str, created_at: float) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_drop(key)
+            self._memory[key] = (value, created_at)
+            self._memory_bytes += size
+            while self._memory and (
+                len(self._memory) > self.max_memory_entries or self._memory_bytes > self.max_memory_bytes
+            ):
+                self._memory_drop(next(iter(self._memory)))
+
+    def _memory_drop(self, key: str) -> None:
+        value, _ = self._memory.pop(key)
+        self._memory_bytes -= len(value.encode("utf-8"))
+
+    # --- Disk tier ---
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row
+
+    def _disk_put(self, key: str, value: str, created_at: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), created_at, created_at),
+            )
+
+        with self._lock:
+            self._writes_since_evict += 1
+            due = self._writes_since_evict >= self.EVICT_EVERY
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under max_disk_bytes"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total <= self.max_disk_bytes:
+                return
+
+            excess = total - self.max_disk_bytes
+            freed = 0
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+                victims.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+
+    # --- Public API ---
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+
+        try:
+            row = self._disk_get(key)
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache read failed: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._stats["bytes_saved"] += len(row[0].encode("utf-8"))
+
+        self._memory_put(key, row[0], row[1])
+        return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        created_at = time.time()
+        self._memory_put(key, value, created_at)
+        with self._lock:
+            self._stats["writes"] += 1
+        try:
+            self._disk_put(key, value, created_at)
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache write failed: {e}")
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async get: memory hits are served inline, the disk lookup runs in a thread"""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.put, key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        try:
+            with self._connect() as conn:
+                stats["disk_entries"], stats["disk_bytes"] = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+                ).fetchone()
+        except sqlite3.Error:
+            pass
+        return stats
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Process-wide response cache, or None when disabled with AI_LLM_CACHE_ENABLED=0"""
+    global _cache
+    if os.getenv("AI_LLM_CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache.from_env()
+    return _cache
@@ -0,0 +1,73 @@
+from typing import Dict, Any, Optional
+import ast
+import json
+
+
+class AgentMessage:
+    """In-process message passed between agents.
+
+    Carries the structured payload as-is, so agents hand dicts to each other
+    without a str()/eval round-trip. The text form is only produced (once)
+    if something actually reads "content", e.g. when a prompt is built.
+    Supports dict-style access so code written against
+    {"role": ..., "content": ...} messages keeps working.
+    """
+
+    __slots__ = ("role", "payload", "_content")
+
+    def __init__(self, payload: Any, role: str = "user"):
+        self.role = role
+        self.payload = payload
+        self._content: Optional[str] = None
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = to_prompt_text(self.payload)
+        return self._content
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self) -> str:
+        return f"AgentMessage(role={self.role!r}, payload_type={type(self.payload).__name__})"
+
+
+def to_prompt_text(payload: Any) -> str:
+    """Serialize a payload for an LLM prompt"""
+    if isinstance(payload, str):
+        return payload
+    return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def message_payload(message: Any) -> Any:
+    """Structured payload of a message.
+
+    AgentMessage payloads are returned directly. Plain dict messages from
+    older callers are parsed as JSON or a Python literal (never eval'd).
+    """
+    if isinstance(message, AgentMessage):
+        return message.payload
+
+    content = message.get("content", "") if isinstance(message, dict) else message
+    if not isinstance(content, str):
+        return content
+
+    try:
+        return json.loads(content)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(content)
+    except (ValueError, SyntaxError):
+        return content
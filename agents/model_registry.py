@@ -0,0 +1,213 @@
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+import os
+import threading
+import time
+
+# Default location of the fine-tuned model; override per deployment with AI_MODEL_PATH
+DEFAULT_MODEL_PATH = "/Users/parsaalizade/Desktop/ai-recruiter-agency/fine-tuning-results"
+
+
+def get_default_model_path() -> str:
+    return os.getenv("AI_MODEL_PATH", DEFAULT_MODEL_PATH)
+
+
+# "torch" runs the fp32 checkpoint; "onnx" runs the int8 export made by tools/export_onnx.py
+INFERENCE_BACKENDS = ("torch", "onnx")
+
+
+def get_inference_backend() -> str:
+    backend = os.getenv("AI_INFERENCE_BACKEND", "torch").lower()
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"AI_INFERENCE_BACKEND must be one of {INFERENCE_BACKENDS}, got {backend!r}")
+    return backend
+
+
+def get_onnx_model_path(model_path: str) -> str:
+    """Where the ONNX export of a checkpoint lives (AI_ONNX_MODEL_PATH, default <model_path>-onnx-int8)"""
+    return os.getenv("AI_ONNX_MODEL_PATH", model_path.rstrip("/\\") + "-onnx-int8")
+
+
+def _current_rss_bytes() -> int:
+    """Resident set size of this process in bytes (0 if it can't be read)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        import sys
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes on Linux
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    except Exception:
+        return 0
+
+
+@dataclass
+class LoadedModel:
+    """A tokenizer/model pair shared by every agent using the same path"""
+
+    path: str
+    tokenizer: Any
+    model: Any
+    load_seconds: float
+    weights_bytes: int
+    rss_delta_bytes: int
+    backend: str = "torch"
+    loaded_at: float = field(default_factory=time.time)
+
+    def memory_report(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "backend": self.backend,
+            "weights_mb": round(self.weights_bytes / (1024 * 1024), 1),
+            "rss_delta_mb": round(self.rss_delta_bytes / (1024 * 1024), 1),
+            "load_seconds": round(self.load_seconds, 2),
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models, keyed by model path.
+
+    Models are loaded lazily on first request and then shared by every agent
+    in the process, so building an orchestrator (six agents) costs one load
+    instead of six. Missing paths are remembered too, so the warning is only
+    printed once.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Optional[LoadedModel]] = {}
+        self._tokenizers: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._path_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, model_path: str) -> Optional[LoadedModel]:
+        """Return the loaded model for a path, loading it on first use"""
+        if model_path in self._models:
+            return self._models[model_path]
+
+        with self._lock:
+            path_lock = self._path_locks.setdefault(model_path, threading.Lock())
+
+        # Per-path lock: concurrent first requests wait for a single load
+        with path_lock:
+            if model_path not in self._models:
+                self._models[model_path] = self._load(model_path)
+            return self._models[model_path]
+
+    def get_tokenizer(self, model_path: str):
+        """Tokenizer for a path without loading the weights (None if unavailable)"""
+        loaded = self._models.get(model_path)
+        if loaded is not None:
+            return loaded.tokenizer
+        if model_path not in self._tokenizers:
+            tokenizer = None
+            if os.path.exists(model_path):
+                try:
+                    from transformers import AutoTokenizer
+
+                    tokenizer = AutoTokenizer.from_pretrained(model_path)
+                except Exception as e:
+                    print(f"Warning: Could not load tokenizer from {model_path}: {e}")
+            self._tokenizers[model_path] = tokenizer
+        return self._tokenizers[model_path]
+
+    def is_loaded(self, model_path: str) -> bool:
+        return self._models.get(model_path) is not None
+
+    def loaded_paths(self) -> List[str]:
+        return [path for path, loaded in self._models.items() if loaded is not None]
+
+    def unload(self, model_path: str) -> None:
+        with self._lock:
+            self._models.pop(model_path, None)
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Resident memory per loaded model plus the current process RSS"""
+        return {
+            "process_rss_mb": round(_current_rss_bytes() / (1024 * 1024), 1),
+            "models": [
+                loaded.memory_report()
+                for loaded in self._models.values()
+                if loaded is not None
+            ],
+        }
+
+    def _load(self, model_path: str) -> Optional[LoadedModel]:
+        backend = get_inference_backend()
+        source = get_onnx_model_path(model_path) if backend == "onnx" else model_path
+        if not os.path.exists(source):
+            print(f"Warning: Model path {source} not found. AI agents may not function correctly.")
+            return None
+
+        print(f"DEBUG: Loading {backend} model from {source}")
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+
+        if backend == "onnx":
+            tokenizer, model, weights_bytes = self._load_onnx(source)
+        else:
+            tokenizer, model, weights_bytes = self._load_torch(source)
+
+        load_seconds = time.perf_counter() - start
+        loaded = LoadedModel(
+            path=model_path,
+            tokenizer=tokenizer,
+            model=model,
+            load_seconds=load_seconds,
+            weights_bytes=weights_bytes,
+            rss_delta_bytes=max(_current_rss_bytes() - rss_before, 0),
+            backend=backend,
+        )
+        print(f"DEBUG: Model loaded in {load_seconds:.2f}s ({loaded.memory_report()['weights_mb']} MB weights)")
+        return loaded
+
+    def _load_torch(self, model_path: str):
+        # Imported here so that importing the agents package stays cheap
+        from transformers import AutoTokenizer, AutoModelForCausalLM
+
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = AutoModelForCausalLM.from_pretrained(model_path)
+        model.eval()
+        weights_bytes = sum(
+            t.numel() * t.element_size()
+            for t in list(model.parameters()) + list(model.buffers())
+        )
+        return tokenizer, model, weights_bytes
+
+    def _load_onnx(self, onnx_path: str):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForCausalLM
+        from transformers import AutoTokenizer
+
+        session_options = onnxruntime.SessionOptions()
+        threads = int(os.getenv("AI_ONNX_THREADS", 0))
+        if threads:
+            session_options.intra_op_num_threads = threads
+
+        # Prefer the int8 graph; a plain fp32 export works too
+        file_name = "model_quantized.onnx" if os.path.exists(os.path.join(onnx_path, "model_quantized.onnx")) else "model.onnx"
+        tokenizer = AutoTokenizer.from_pretrained(onnx_path)
+        model = ORTModelForCausalLM.from_pretrained(
+            onnx_path,
+            file_name=file_name,
+            use_cache=True,
+            provider="CPUExecutionProvider",
+            session_options=session_options,
+        )
+        weights_bytes = sum(
+            os.path.getsize(os.path.join(onnx_path, name))
+            for name in os.listdir(onnx_path)
+            if name.startswith(os.path.splitext(file_name)[0]) and name.endswith((".onnx", ".onnx_data"))
+        )
+        return tokenizer, model, weights_bytes
+
+
+# Shared by every agent in the process
+model_registry = ModelRegistry()
@@ -0,0 +1,289 @@
+from typing import Dict, Any, Optional, Callable, AsyncIterator, Union
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import json
+import os
+import time
+import weakref
+
+from .json_stream import JsonObjectTracker
+from .telemetry import record_queue_wait, record_llm_time
+
+
+@dataclass
+class OllamaSettings:
+    """Connection settings for the Ollama HTTP API.
+
+    Every field can be overridden from the environment (see from_env), so
+    deployments can point agents at another host or model without code changes.
+    """
+
+    host: str = "http://localhost:11434"
+    model: str = "llama3.1"
+    timeout: float = 120.0
+    connect_timeout: float = 5.0
+    max_retries: int = 2
+    retry_backoff: float = 0.5
+    max_concurrency: int = 4
+    max_connections: int = 10
+
+    @classmethod
+    def from_env(cls) -> "OllamaSettings":
+        defaults = cls()
+        return cls(
+            host=os.getenv("OLLAMA_HOST", defaults.host).rstrip("/"),
+            model=os.getenv("OLLAMA_MODEL", defaults.model),
+            timeout=float(os.getenv("OLLAMA_TIMEOUT", defaults.timeout)),
+            connect_timeout=float(os.getenv("OLLAMA_CONNECT_TIMEOUT", defaults.connect_timeout)),
+            max_retries=int(os.getenv("OLLAMA_MAX_RETRIES", defaults.max_retries)),
+            retry_backoff=float(os.getenv("OLLAMA_RETRY_BACKOFF", defaults.retry_backoff)),
+            max_concurrency=int(os.getenv("OLLAMA_MAX_CONCURRENCY", defaults.max_concurrency)),
+            max_connections=int(os.getenv("OLLAMA_MAX_CONNECTIONS", defaults.max_connections)),
+        )
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.host}/api/generate"
+
+
+class OllamaError(Exception):
+    """Raised when Ollama can't produce a response after all retries"""
+
+    pass
+
+
+class OllamaRequestError(OllamaError):
+    """Ollama is up but rejected the request (4xx)"""
+
+    pass
+
+
+class _LoopState:
+    """Connection pool and concurrency limit bound to one event loop"""
+
+    def __init__(self, settings: OllamaSettings):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.timeout, connect=settings.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_connections,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(settings.max_concurrency)
+        # Parked on its yield while the loop runs, see OllamaClient._state
+        self.closer: Optional[AsyncIterator[None]] = None
+
+
+async def _close_with_loop(states: "weakref.WeakKeyDictionary", loop: asyncio.AbstractEventLoop, state: _LoopState):
+    """Closes state's pool when its loop shuts down.
+
+    asyncio.run (and so async_to_sync and uvicorn) closes the async generators
+    still suspended in a loop before closing the loop; that runs the finally
+    below while the loop can still await.
+    """
+    try:
+        yield
+    finally:
+        if states.get(loop) is state:
+            del states[loop]
+        await state.client.aclose()
+
+
+class OllamaClient:
+    """Non-blocking Ollama client shared by all agents.
+
+    Keeps one pooled httpx.AsyncClient per event loop (the job worker,
+    FastAPI and every asyncio.run call run on different loops), closed when
+    that loop shuts down; caps the number of in-flight generations and
+    retries transient failures with exponential backoff.
+    """
+
+    def __init__(self, settings: Optional[OllamaSettings] = None):
+        self.settings = settings or OllamaSettings.from_env()
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = _LoopState(self.settings)
+            self._states[loop] = state
+            state.closer = _close_with_loop(self._states, loop, state)
+            await state.closer.__anext__()
+        return state
+
+    @asynccontextmanager
+    async def _slot(self, state: _LoopState) -> AsyncIterator[None]:
+        """Hold a concurrency slot, reporting the wait for it and the time holding it to the running stage"""
+        waiting_since = time.perf_counter()
+        async with state.semaphore:
+            acquired_at = time.perf_counter()
+            record_queue_wait((acquired_at - waiting_since) * 1000)
+            try:
+                yield
+            finally:
+                record_llm_time((time.perf_counter() - acquired_at) * 1000)
+
+    async def generate(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = "json",
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Run a non-streaming generation and return Ollama's response body"""
+        import httpx
+
+        payload = self._payload(prompt, model, format, options, stream=False)
+        state = await self._state()
+        request_timeout = self._timeout(timeout)
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.settings.max_retries + 1):
+            try:
+                async with self._slot(state):
+                    response = await state.client.post(
+                        self.settings.generate_url, json=payload, timeout=request_timeout
+                    )
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                # Client errors (bad model name, bad payload) won't fix themselves
+                if e.response.status_code < 500:
+                    raise OllamaRequestError(f"Ollama rejected the request: {e}") from e
+                last_error = e
+            except httpx.TransportError as e:
+                last_error = e
+
+            if attempt < self.settings.max_retries:
+                await asyncio.sleep(self.settings.retry_backoff * (2 ** attempt))
+
+        raise OllamaError(
+            f"Ollama request failed after {self.settings.max_retries + 1} attempts: {last_error}"
+        ) from last_error
+
+    async def generate_json_stream(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = "json",
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        on_partial: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Stream a generation and hang up as soon as the top-level JSON object closes.
+
+        on_partial is called with the accumulated text after every chunk. The
+        returned body mirrors the non-streaming one, plus "stopped_early" when
+        the connection was closed before Ollama finished generating.
+        """
+        import httpx
+
+        payload = self._payload(prompt, model, format, options, stream=True)
+        state = await self._state()
+        request_timeout = self._timeout(timeout)
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.settings.max_retries + 1):
+            tracker = JsonObjectTracker()
+            body: Dict[str, Any] = {}
+            try:
+                async with self._slot(state):
+                    async with state.client.stream(
+                        "POST", self.settings.generate_url, json=payload, timeout=request_timeout
+                    ) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line:
+                                continue
+                            body = json.loads(line)
+                            if body.get("error"):
+                                raise OllamaError(f"Ollama stream error: {body['error']}")
+
+                            complete = tracker.feed(body.get("response", ""))
+                            if on_partial is not None:
+                                on_partial(tracker.result)
+                            if complete or body.get("done"):
+                                break
+                # Leaving the stream context closes the connection, which cancels generation upstream
+                body.update(
+                    {
+                        "response": tracker.result,
+                        "stopped_early": tracker.complete and not body.get("done", False),
+                    }
+                )
+                return body
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    raise OllamaRequestError(f"Ollama rejected the request: {e}") from e
+                last_error = e
+            except httpx.TransportError as e:
+                # Only retry if nothing was streamed yet; otherwise the caller already saw partial text
+                if tracker.text:
+                    raise OllamaError(f"Ollama stream interrupted: {e}") from e
+                last_error = e
+
+            if attempt < self.settings.max_retries:
+                await asyncio.sleep(self.settings.retry_backoff * (2 ** attempt))
+
+        raise OllamaError(
+            f"Ollama request failed after {self.settings.max_retries + 1} attempts: {last_error}"
+        ) from last_error
+
+    def check_health(self) -> None:
+        """Blocking liveness check (lists local models); raises if Ollama is unreachable"""
+        import httpx
+
+        response = httpx.get(f"{self.settings.host}/api/tags", timeout=self.settings.connect_timeout)
+        response.raise_for_status()
+
+    def _payload(
+        self,
+        prompt: str,
+        model: Optional[str],
+        format: Optional[Union[str, Dict[str, Any]]],
+        options: Optional[Dict[str, Any]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "model": model or self.settings.model,
+            "prompt": prompt,
+            "stream": stream,
+        }
+        if format:
+            payload["format"] = format
+        if options:
+            payload["options"] = options
+        return payload
+
+    def _timeout(self, timeout: Optional[float]):
+        import httpx
+
+        if timeout is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return httpx.Timeout(timeout, connect=self.settings.connect_timeout)
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the current event loop (also happens when the loop shuts down)"""
+        state = self._states.get(asyncio.get_running_loop())
+        if state is not None:
+            await state.closer.aclose()
+
+
+_client: Optional[OllamaClient] = None
+
+
+def get_ollama_client() -> OllamaClient:
+    """Process-wide client used by every agent"""
+    global _client
+    if _client is None:
+        _client = OllamaClient()
+    return _client
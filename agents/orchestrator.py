@@ -1,13 +1,30 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional
+import asyncio
+import inspect
+import os
 from .base_agent import BaseAgent
 from .extractor_agent import ExtractorAgent
 from .analyzer_agent import AnalyzerAgent
 from .matcher_agent import MatcherAgent
 from .screener_agent import ScreenerAgent
 from .recommender_agent import RecommenderAgent
+from .skill_scanner_agent import SkillScannerAgent
+from .workflow import WorkflowStage, run_workflow
+from .messages import AgentMessage
+from .progress import ProgressCallback
 
 
 class OrchestratorAgent(BaseAgent):
+    # Default per-stage deadlines in seconds
+    stage_timeouts = {
+        "skill_scan": 60,
+        "extraction": 180,
+        "analysis": 120,
+        "matching": 30,
+        "screening": 120,
+        "recommendation": 120,
+    }
+
     def __init__(self):
         super().__init__(
             name="Orchestrator",
@@ -16,9 +33,12 @@ class OrchestratorAgent(BaseAgent):
             Maintain context and aggregate results from each stage.""",
         )
         self._setup_agents()
+        # Context of the most recent run, kept for telemetry when it fails
+        self.last_context: Optional[Dict[str, Any]] = None
 
     def _setup_agents(self):
         """Initialize all specialized agents"""
+        self.skill_scanner = SkillScannerAgent()
         self.extractor = ExtractorAgent()
         self.analyzer = AnalyzerAgent()
         self.matcher = MatcherAgent()
@@ -28,11 +48,94 @@ class OrchestratorAgent(BaseAgent):
     async def run(self, messages: list) -> Dict[str, Any]:
         """Process a single message through the agent"""
         prompt = messages[-1]["content"]
-        response = self._query_ollama(prompt)
+        response = await self._query_ollama(prompt)
         return self._parse_json_safely(response)
 
-    async def process_application(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Main workflow orchestrator for processing job applications"""
+    def _build_workflow(self) -> List[WorkflowStage]:
+        """Declare the workflow as a dependency graph.
+
+        The dictionary skill scan runs first and hands the resume text to the
+        extractor. Matching only needs the analysis and screening doesn't need
+        the matches, so the two run concurrently; the recommender waits for
+        both. With the fast path (AI_SKILL_FAST_PATH=1) matching and the
+        recommendation run from the skill scan instead, and the LLM stages
+        only enrich the result.
+        """
+        fast_path = self._fast_path_enabled()
+        return [
+            WorkflowStage(
+                name="skill_scan",
+                output_key="skill_scan",
+                run=lambda inputs: self.skill_scanner.run(
+                    [AgentMessage(inputs["resume_data"])]
+                ),
+                timeout=self._stage_timeout("skill_scan"),
+            ),
+            WorkflowStage(
+                name="extraction",
+                output_key="extracted_data",
+                run=lambda inputs: self.extractor.run(
+                    [AgentMessage({"text": inputs["skill_scan"]["raw_text"]})]
+                ),
+                depends_on=("skill_scan",),
+                timeout=self._stage_timeout("extraction"),
+            ),
+            WorkflowStage(
+                name="analysis",
+                output_key="analysis_results",
+                run=lambda inputs: self.analyzer.run(
+                    [AgentMessage(inputs["extracted_data"])]
+                ),
+                depends_on=("extraction",),
+                timeout=self._stage_timeout("analysis"),
+            ),
+            WorkflowStage(
+                name="matching",
+                output_key="job_matches",
+                run=lambda inputs: self.matcher.run(
+                    [AgentMessage(inputs["skill_scan"] if fast_path else inputs["analysis_results"])]
+                ),
+                depends_on=("skill_scan",) if fast_path else ("analysis",),
+                timeout=self._stage_timeout("matching"),
+            ),
+            WorkflowStage(
+                name="screening",
+                output_key="screening_results",
+                run=lambda inputs: self.screener.run(
+                    [AgentMessage(inputs)]
+                ),
+                depends_on=("analysis",),
+                timeout=self._stage_timeout("screening"),
+            ),
+            WorkflowStage(
+                name="recommendation",
+                output_key="final_recommendation",
+                run=lambda inputs: self.recommender.run(
+                    # The scan stands in for the analysis the recommender would otherwise wait for
+                    [AgentMessage(dict(inputs, analysis_results=inputs["skill_scan"]) if fast_path else inputs)]
+                ),
+                depends_on=("matching",) if fast_path else ("matching", "screening"),
+                timeout=self._stage_timeout("recommendation"),
+            ),
+        ]
+
+    @staticmethod
+    def _fast_path_enabled() -> bool:
+        return os.getenv("AI_SKILL_FAST_PATH", "0").lower() in ("1", "true", "yes")
+
+    def _stage_timeout(self, stage: str) -> Optional[float]:
+        """Per-stage deadline in seconds, overridable with AI_STAGE_TIMEOUT_<STAGE> (0 disables it)"""
+        value = float(os.getenv(f"AI_STAGE_TIMEOUT_{stage.upper()}", self.stage_timeouts.get(stage, 0)))
+        return value or None
+
+    async def process_application(
+        self, resume_data: Dict[str, Any], on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """Main workflow orchestrator for processing job applications.
+
+        on_progress receives an event as each stage completes:
+        {"stage", "output_key", "result", "duration_ms", "completed", "total"}.
+        """
         print("🎯 Orchestrator: Starting application process")
 
         workflow_context = {
@@ -40,53 +143,67 @@ class OrchestratorAgent(BaseAgent):
             "status": "initiated",
             "current_stage": "extraction",
         }
+        self.last_context = workflow_context
+        workflow = self._build_workflow()
+        completed = []
 
-        try:
-            # Extract resume information
-            extracted_data = await self.extractor.run(
-                [{"role": "user", "content": str(resume_data)}]
-            )
-            workflow_context.update(
-                {"extracted_data": extracted_data, "current_stage": "analysis"}
-            )
-
-            # Analyze candidate profile
-            analysis_results = await self.analyzer.run(
-                [{"role": "user", "content": str(extracted_data)}]
-            )
-            workflow_context.update(
-                {"analysis_results": analysis_results, "current_stage": "matching"}
-            )
+        async def report(stage: WorkflowStage, result: Any, timing: Dict[str, Any]) -> None:
+            completed.append(stage.name)
+            notified = on_progress({
+                "stage": stage.name,
+                "output_key": stage.output_key,
+                "result": result,
+                "duration_ms": timing.get("duration_ms"),
+                "completed": len(completed),
+                "total": len(workflow),
+            })
+            if inspect.isawaitable(notified):
+                await notified
 
-            # Match with jobs
-            job_matches = await self.matcher.run(
-                [{"role": "user", "content": str(analysis_results)}]
-            )
-            workflow_context.update(
-                {"job_matches": job_matches, "current_stage": "screening"}
-            )
-
-            # Screen candidate
-            screening_results = await self.screener.run(
-                [{"role": "user", "content": str(workflow_context)}]
-            )
-            workflow_context.update(
-                {
-                    "screening_results": screening_results,
-                    "current_stage": "recommendation",
-                }
-            )
-
-            # Generate recommendations
-            final_recommendation = await self.recommender.run(
-                [{"role": "user", "content": str(workflow_context)}]
-            )
-            workflow_context.update(
-                {"final_recommendation": final_recommendation, "status": "completed"}
+        try:
+            await run_workflow(
+                workflow,
+                workflow_context,
+                base_keys=("resume_data",),
+                on_stage_complete=report if on_progress is not None else None,
             )
-
+            workflow_context.update({"current_stage": "recommendation", "status": "completed"})
             return workflow_context
 
         except Exception as e:
             workflow_context.update({"status": "failed", "error": str(e)})
             raise
+
+    async def stream_application(self, resume_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """process_application as a stream of events.
+
+        Yields {"event": "stage", ...} per completed stage (see
+        process_application), then {"event": "complete", "result": context}
+        or {"event": "error", "error", "failed_stage"}. Closing the iterator
+        early (a client that went away) cancels the stages still running.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        run = asyncio.create_task(self.process_application(resume_data, on_progress=events.put_nowait))
+        run.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while (event := await events.get()) is not None:
+                yield dict(event, event="stage")
+            if run.cancelled():
+                # Cancelled from outside (server shutdown): there's no result to report
+                yield {
+                    "event": "error",
+                    "error": "Analysis was cancelled",
+                    "failed_stage": (self.last_context or {}).get("current_stage"),
+                }
+            elif run.exception() is None:
+                yield {"event": "complete", "result": run.result()}
+            else:
+                yield {
+                    "event": "error",
+                    "error": str(run.exception()),
+                    "failed_stage": (self.last_context or {}).get("failed_stage"),
+                }
+        finally:
+            if not run.done():
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
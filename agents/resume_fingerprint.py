@@ -0,0 +1,40 @@
+from typing import Dict, Any, Optional
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def content_sha256(data: bytes) -> str:
+    """Hash of the uploaded file as-is"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize_resume_text(text: str) -> str:
+    """Extracted text with layout noise removed.
+
+    Re-exporting the same resume (new PDF producer, timestamps, reflowed
+    lines) changes the bytes but not this form.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def is_degraded_analysis(result: Dict[str, Any]) -> bool:
+    """Whether an analysis came out of a fallback path and must not be reused for other uploads.
+
+    The Analyzer reports confidence_score 0.5 when it couldn't parse the
+    model's answer; other stages leave an "error" in their output.
+    """
+    analysis = result.get("analysis_results")
+    if isinstance(analysis, dict) and analysis.get("confidence_score", 1.0) <= 0.5:
+        return True
+    return any(isinstance(section, dict) and "error" in section for section in result.values())
+
+
+def text_sha256(text: str) -> Optional[str]:
+    """Hash of the normalized text (None for empty text, which must never match)"""
+    normalized = normalize_resume_text(text or "")
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
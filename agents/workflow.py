@@ -0,0 +1,134 @@
+from typing import Dict, Any, Callable, Awaitable, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import asyncio
+import inspect
+import time
+
+from .telemetry import track_stage_usage
+
+
+class StageTimeoutError(Exception):
+    """Raised when a workflow stage misses its deadline"""
+
+    pass
+
+
+@dataclass
+class WorkflowStage:
+    """One node of the workflow graph.
+
+    run receives the stage input (the base context plus the outputs of all
+    upstream stages) and its return value is stored under output_key.
+    """
+
+    name: str
+    output_key: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+
+
+# Called with (stage, result, timing) as each stage completes; may be a coroutine function
+StageCallback = Callable[[WorkflowStage, Any, Dict[str, Any]], Any]
+
+
+def _upstream(stage: WorkflowStage, stages: Dict[str, WorkflowStage]) -> Sequence[str]:
+    """All transitive dependencies of a stage, in declaration order"""
+    seen = []
+    pending = list(stage.depends_on)
+    while pending:
+        name = pending.pop(0)
+        if name not in seen:
+            seen.append(name)
+            pending.extend(stages[name].depends_on)
+    return [name for name in stages if name in seen]
+
+
+async def run_workflow(
+    stages: Sequence[WorkflowStage],
+    context: Dict[str, Any],
+    base_keys: Sequence[str] = (),
+    on_stage_complete: Optional[StageCallback] = None,
+) -> Dict[str, Any]:
+    """Run stages concurrently as soon as their dependencies are done.
+
+    Results are written into context as they complete, together with a
+    per-stage timing breakdown under "stage_timings", and handed to
+    on_stage_complete so callers can report progress. If a stage fails or
+    misses its deadline the stages still running are cancelled and the
+    error is re-raised.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {missing}")
+
+    timings: Dict[str, Dict[str, Any]] = context.setdefault("stage_timings", {})
+    started = time.perf_counter()
+    done = set()
+    running: Dict[asyncio.Task, WorkflowStage] = {}
+
+    async def _run_stage(stage: WorkflowStage, stage_input: Dict[str, Any]) -> Any:
+        # LLM calls made by this stage report their token usage into its timing entry
+        with track_stage_usage() as usage:
+            try:
+                if stage.timeout is None:
+                    return await stage.run(stage_input)
+                return await asyncio.wait_for(stage.run(stage_input), timeout=stage.timeout)
+            except asyncio.TimeoutError as e:
+                raise StageTimeoutError(f"Stage '{stage.name}' exceeded its {stage.timeout}s deadline") from e
+            finally:
+                timings[stage.name].update(usage.as_dict())
+
+    def _start_ready() -> None:
+        for stage in stages:
+            if stage.name in done or stage in running.values():
+                continue
+            if all(dep in done for dep in stage.depends_on):
+                # Each stage only sees its own inputs, so results don't depend on scheduling order
+                stage_input = {key: context[key] for key in base_keys if key in context}
+                for dep in _upstream(stage, by_name):
+                    stage_input[by_name[dep].output_key] = context[by_name[dep].output_key]
+
+                timings[stage.name] = {
+                    "status": "running",
+                    "started_ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+                context["current_stage"] = stage.name
+                running[asyncio.create_task(_run_stage(stage, stage_input))] = stage
+
+    _start_ready()
+    try:
+        while running:
+            finished, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                stage = running.pop(task)
+                timing = timings[stage.name]
+                timing["duration_ms"] = round(
+                    (time.perf_counter() - started) * 1000 - timing["started_ms"], 1
+                )
+
+                error = task.exception()
+                if error is not None:
+                    timing["status"] = "failed"
+                    context["failed_stage"] = stage.name
+                    raise error
+
+                timing["status"] = "completed"
+                context[stage.output_key] = task.result()
+                done.add(stage.name)
+                if on_stage_complete is not None:
+                    notified = on_stage_complete(stage, context[stage.output_key], timing)
+                    if inspect.isawaitable(notified):
+                        await notified
+            _start_ready()
+    finally:
+        # Cancel whatever is still in flight after a failure (or our own cancellation)
+        for task, stage in running.items():
+            task.cancel()
+            timings[stage.name]["status"] = "cancelled"
+        if running:
+            await asyncio.gather(*running.keys(), return_exceptions=True)
+
+    return context
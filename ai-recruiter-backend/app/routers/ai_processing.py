@@ -1,5 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from typing import Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional
+import asyncio
 import sys
 import os
 import json
@@ -11,171 +13,302 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.
 
 try:
     from agents.orchestrator import OrchestratorAgent
+    from agents.skill_matcher import set_vocabulary_loader
+    # Only used once an endpoint has checked OrchestratorAgent
+    from agents.pdf_pool import PdfPoolBusyError
+    from agents.progress import format_sse
+    from agents.resume_fingerprint import text_sha256
+    from agents.resume_store import read_chunks, store_resume
 except ImportError:
     print("Warning: Could not import OrchestratorAgent. Agents might not be available.")
     OrchestratorAgent = None
 
+try:
+    from agents.circuit_breaker import breaker_report
+except ImportError:
+    breaker_report = None
+
 from ..utils_pdf import extract_text_from_pdf
-from ..routers.auth import get_current_user
+from ..routers.auth import get_current_user, get_optional_user
 from ..services.database import db
 
+if OrchestratorAgent:
+    # Vocabulary of the fast-path skill scan (AI_SKILL_FAST_PATH); without signals
+    # here, changes show up on the next reload (AI_SKILL_VOCABULARY_TTL)
+    set_vocabulary_loader(db.skill_vocabulary)
+
+# Uploaded resumes, stored by content hash
+UPLOAD_DIR = os.getenv(
+    "RESUME_UPLOAD_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "../../uploads"))
+)
+
 router = APIRouter(
     prefix="/ai-processing",
     tags=["ai-processing"]
 )
 
 
+@router.get("/llm-health")
+async def llm_health(current_user: Optional[dict] = Depends(get_optional_user)):
+    """Circuit breaker state of the LLM backends in this worker (error details for admins only)"""
+    if not breaker_report:
+        raise HTTPException(status_code=500, detail="AI Agents not available")
+    return breaker_report(detailed=current_user is not None and current_user["role"] == "admin")
+
+
 @router.post("/process-resume")
 async def process_resume_and_apply(
     file: UploadFile = File(...),
+    force: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Upload a resume (PDF), extract text, and run the AI Orchestrator
     to analyze, match, screen, and recommend.
+
+    A resume identical to one analyzed before (same file, or same text once
+    normalized) reuses that analysis; ?force=true always re-analyzes.
     """
+    upload = await _prepare_upload(file, force)
+    if upload["previous"]:
+        return _reuse_analysis(current_user, upload)
 
+    orchestrator = OrchestratorAgent()
+
+    try:
+        # ================= AI ORCHESTRATION =================
+        result = await orchestrator.process_application(_resume_data(upload, file, current_user))
+        print(f"DEBUG: Agent raw result: {result}")
+        return _save_report(current_user, upload, result)
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"AI processing failed: {str(e)}"
+        )
+
+
+@router.post("/process-resume/stream")
+async def process_resume_stream(
+    file: UploadFile = File(...),
+    force: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Same as /process-resume, streamed as Server-Sent Events.
+
+    Sends a "stage" event with each stage's result as soon as it completes
+    (skill_scan, extraction, analysis, matching, screening, recommendation),
+    then "complete" with the consolidated report, or "error". Disconnecting
+    cancels the stages still running.
+    """
+    upload = await _prepare_upload(file, force)
+
+    async def events():
+        if upload["previous"]:
+            yield format_sse("complete", _reuse_analysis(current_user, upload))
+            return
+
+        stream = OrchestratorAgent().stream_application(_resume_data(upload, file, current_user))
+        try:
+            async for event in stream:
+                kind = event.pop("event")
+                if kind == "complete":
+                    yield format_sse("complete", _save_report(current_user, upload, event["result"]))
+                else:
+                    yield format_sse(kind, event)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield format_sse("error", {"error": f"AI processing failed: {str(e)}"})
+        finally:
+            # Runs when the client disconnects too: cancels the workflow
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _prepare_upload(file: UploadFile, force: bool) -> Dict[str, Any]:
+    """Store the upload and extract its text, unless an identical resume was analyzed before"""
     if not OrchestratorAgent:
         raise HTTPException(status_code=500, detail="AI Agents not available")
 
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
-    content = await file.read()
-    text = await extract_text_from_pdf(content)
+    # Streamed to disk and hashed in one pass; the parser then maps the stored file
+    stored = await asyncio.to_thread(store_resume, read_chunks(file.file), UPLOAD_DIR)
+    content_hash = stored.content_sha256
+    previous = None if force else await asyncio.to_thread(db.find_resume_analysis, content_sha256=content_hash)
+
+    text = None
+    text_hash = previous["text_sha256"] if previous else None
+    if not previous:
+        try:
+            text = await extract_text_from_pdf(stored.path)
+        except PdfPoolBusyError:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many resumes are being processed, please retry shortly",
+                headers={"Retry-After": "5"},
+            )
+
+        if not text:
+            raise HTTPException(status_code=400, detail="Could not extract text from PDF")
 
-    if not text:
-        raise HTTPException(status_code=400, detail="Could not extract text from PDF")
+        text_hash = text_sha256(text)
+        if not force and text_hash:
+            previous = await asyncio.to_thread(db.find_resume_analysis, text_sha256=text_hash)
 
-    orchestrator = OrchestratorAgent()
+    return {"content_hash": content_hash, "text": text, "text_hash": text_hash, "previous": previous}
+
+
+def _reuse_analysis(current_user: dict, upload: Dict[str, Any]) -> Dict[str, Any]:
+    previous = upload["previous"]
+    print(f"DEBUG: Resume matches analysis {previous['id']}, reusing it")
+    original_id = previous["reused_from"] or previous["id"]
+    candidate_id = _store_for_candidate(current_user, previous["report"], previous["skills"])
+    db.save_resume_analysis(
+        candidate_id, upload["content_hash"], upload["text_hash"], previous["report"], previous["skills"],
+        reused_from=original_id
+    )
+    return dict(previous["report"], reused_analysis_id=original_id)
 
-    resume_data = {
-        "text": text,
+
+def _resume_data(upload: Dict[str, Any], file: UploadFile, current_user: dict) -> Dict[str, Any]:
+    return {
+        "text": upload["text"],
         "candidate_id": current_user["id"],
         "candidate_email": current_user["email"],
         "filename": file.filename
     }
 
-    try:
-        # ================= AI ORCHESTRATION =================
-        result = await orchestrator.process_application(resume_data)
-        print(f"DEBUG: Agent raw result: {result}")
 
-        # ================= CONSOLIDATED REPORT =================
-        raw_rec = result.get("final_recommendation") or {}
+def _save_report(current_user: dict, upload: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Consolidate the workflow result into the report, and store it for the candidate"""
+    # ================= CONSOLIDATED REPORT =================
+    raw_rec = result.get("final_recommendation") or {}
 
-        consolidated_report = {
-            "analysis_results": result.get("analysis_results", {}),
-            "job_matches": result.get("job_matches", {}),
-            "screening_results": result.get("screening_results", {}),
-            "summary": "Analysis completed. Review your strengths and matches below."
-        }
+    consolidated_report = {
+        "analysis_results": result.get("analysis_results", {}),
+        "job_matches": result.get("job_matches", {}),
+        "screening_results": result.get("screening_results", {}),
+        "summary": "Analysis completed. Review your strengths and matches below."
+    }
 
-        # ---------- Parse final recommendation summary ----------
-        try:
-            inner_rec_str = raw_rec.get("final_recommendation")
-            if isinstance(inner_rec_str, str):
-                inner_rec_json = json.loads(inner_rec_str)
-                recs = inner_rec_json.get("final_recommendations", [])
-                if recs and isinstance(recs, list):
-                    consolidated_report["summary"] = recs[0].get(
-                        "description", consolidated_report["summary"]
-                    )
-        except Exception as e:
-            print(f"[WARN] Could not parse final recommendation JSON: {e}")
-
-        # ================= SKILLS EXTRACTION =================
-        extracted = result.get("extracted_data") or {}
-        extracted_data = extracted if isinstance(extracted, dict) else {}
-
-        skills = extracted_data.get("skills", [])
-
-        if not skills:
-            try:
-                struct_data_str = extracted_data.get("structured_data")
-                if isinstance(struct_data_str, str):
-                    struct_json = json.loads(struct_data_str)
-                    skills = (
-                        struct_json.get("Technical Skills")
-                        or struct_json.get("skills")
-                        or struct_json.get("Skills")
-                        or []
-                    )
-                    if not isinstance(skills, list):
-                        skills = []
-            except Exception as e:
-                print(f"[WARN] Could not extract skills from structured data: {e}")
-
-        # ================= MAP STRENGTHS & TECH SKILLS =================
-        try:
-            ar = consolidated_report.get("analysis_results", {})
-            sa = ar.get("skills_analysis", {})
+    # ---------- Parse final recommendation summary ----------
+    try:
+        inner_rec_str = raw_rec.get("final_recommendation")
+        if isinstance(inner_rec_str, str):
+            inner_rec_json = json.loads(inner_rec_str)
+            recs = inner_rec_json.get("final_recommendations", [])
+            if recs and isinstance(recs, list):
+                consolidated_report["summary"] = recs[0].get(
+                    "description", consolidated_report["summary"]
+                )
+    except Exception as e:
+        print(f"[WARN] Could not parse final recommendation JSON: {e}")
 
-            if "strengths" not in ar:
-                ar["strengths"] = sa.get("key_achievements", [])
+    # ================= SKILLS EXTRACTION =================
+    extracted = result.get("extracted_data") or {}
+    extracted_data = extracted if isinstance(extracted, dict) else {}
 
-            if not sa.get("technical_skills") and skills:
-                sa["technical_skills"] = skills
+    skills = extracted_data.get("skills", [])
 
+    if not skills:
+        try:
+            struct_data_str = extracted_data.get("structured_data")
+            if isinstance(struct_data_str, str):
+                struct_json = json.loads(struct_data_str)
+                skills = (
+                    struct_json.get("Technical Skills")
+                    or struct_json.get("skills")
+                    or struct_json.get("Skills")
+                    or []
+                )
+                if not isinstance(skills, list):
+                    skills = []
         except Exception as e:
-            print(f"[WARN] Strengths/skills mapping failed: {e}")
+            print(f"[WARN] Could not extract skills from structured data: {e}")
 
-        # ================= DATABASE UPDATE =================
-        candidate = db.get_candidate_by_user_id(current_user["id"])
+    # ================= MAP STRENGTHS & TECH SKILLS =================
+    try:
+        ar = consolidated_report.get("analysis_results", {})
+        sa = ar.get("skills_analysis", {})
 
-        if candidate:
-            candidate_dict = dict(candidate)
+        if "strengths" not in ar:
+            ar["strengths"] = sa.get("key_achievements", [])
 
-            try:
-                db.update_candidate_analysis(
-                    candidate_dict["id"],
-                    consolidated_report,
-                    skills
-                )
-            except Exception as e:
-                print(f"[WARN] Failed to update candidate analysis: {e}")
-
-            # ================= JOB MATCHING =================
-            exp_level = (
-                consolidated_report
-                .get("analysis_results", {})
-                .get("skills_analysis", {})
-                .get("experience_level")
-                or candidate_dict.get("experience_level")
-            )
+        if not sa.get("technical_skills") and skills:
+            sa["technical_skills"] = skills
 
-            print(f"Looking for matches with skills: {skills}")
-            matches = db.find_matching_jobs(skills, exp_level)
-            print(f"Found {len(matches)} matches")
+    except Exception as e:
+        print(f"[WARN] Strengths/skills mapping failed: {e}")
 
-            for job in matches:
-                try:
-                    job_reqs = set(job.get("requirements", []))
-                    user_skills = set(skills)
+    # ================= DATABASE UPDATE =================
+    candidate_id = _store_for_candidate(current_user, consolidated_report, skills)
+    db.save_resume_analysis(candidate_id, upload["content_hash"], upload["text_hash"], consolidated_report, skills)
 
-                    if not job_reqs:
-                        score = 0.5
-                    else:
-                        overlap = len(job_reqs.intersection(user_skills))
-                        score = overlap / len(job_reqs)
+    consolidated_report["reused_analysis_id"] = None
+    return consolidated_report
 
-                    if score > 0:
-                        db.save_recommendation(
-                            job["id"],
-                            candidate_dict["id"],
-                            score,
-                            f"Matched based on skills: {', '.join(user_skills & job_reqs)}"
-                        )
 
-                except Exception as e:
-                    print(f"[WARN] Job matching failed for job {job.get('id')}: {e}")
+def _store_for_candidate(current_user: dict, consolidated_report: Dict[str, Any], skills: list):
+    """Save the report on the user's candidate profile and refresh their job recommendations"""
+    candidate = db.get_candidate_by_user_id(current_user["id"])
+    if not candidate:
+        return None
 
-        return consolidated_report
+    candidate_dict = dict(candidate)
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=500,
-            detail=f"AI processing failed: {str(e)}"
+    try:
+        db.update_candidate_analysis(
+            candidate_dict["id"],
+            consolidated_report,
+            skills
         )
+    except Exception as e:
+        print(f"[WARN] Failed to update candidate analysis: {e}")
+
+    # ================= JOB MATCHING =================
+    exp_level = (
+        consolidated_report
+        .get("analysis_results", {})
+        .get("skills_analysis", {})
+        .get("experience_level")
+        or candidate_dict.get("experience_level")
+    )
+
+    print(f"Looking for matches with skills: {skills}")
+    matches = db.find_matching_jobs(skills, exp_level)
+    print(f"Found {len(matches)} matches")
+
+    for job in matches:
+        try:
+            job_reqs = set(job.get("requirements", []))
+            user_skills = set(skills)
+
+            if not job_reqs:
+                score = 0.5
+            else:
+                overlap = len(job_reqs.intersection(user_skills))
+                score = overlap / len(job_reqs)
+
+            if score > 0:
+                db.save_recommendation(
+                    job["id"],
+                    candidate_dict["id"],
+                    score,
+                    f"Matched based on skills: {', '.join(user_skills & job_reqs)}"
+                )
+
+        except Exception as e:
+            print(f"[WARN] Job matching failed for job {job.get('id')}: {e}")
+
+    return candidate_dict["id"]
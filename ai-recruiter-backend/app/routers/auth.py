@@ -5,6 +5,7 @@ from ..services.database import db
 from ..utils import verify_password, get_password_hash, create_access_token, SECRET_KEY, ALGORITHM
 from ..models.auth import Token, UserCreate, UserResponse, TokenData
 from datetime import timedelta
+from typing import Optional
 
 router = APIRouter(
     prefix="/auth",
@@ -12,6 +13,8 @@ router = APIRouter(
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+# For endpoints that also answer anonymous callers
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
@@ -46,6 +49,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             
     return user_dict
 
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    """The signed-in user, or None without a token (an invalid token is still rejected)"""
+    if token is None:
+        return None
+    return await get_current_user(token)
+
 @router.post("/register", response_model=UserResponse)
 async def register(user: UserCreate):
     try:
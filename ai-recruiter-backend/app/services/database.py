@@ -1,5 +1,6 @@
 import sqlite3
 import json
+import os
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
@@ -395,5 +396,62 @@ class JobDatabase:
             cursor.execute(query, (candidate_id,))
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
+    def skill_vocabulary(self) -> List[tuple]:
+        """(source key, terms) for every skill and job, for the fast-path skill matcher"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            vocabulary = [(f"skill:{row['id']}", [row["name"]]) for row in cursor.execute("SELECT id, name FROM skills")]
+            for row in cursor.execute("SELECT id, requirements FROM jobs").fetchall():
+                requirements = json.loads(row["requirements"]) if row["requirements"] else []
+                if isinstance(requirements, str):
+                    requirements = [requirements]
+                vocabulary.append((f"job:{row['id']}", [str(requirement) for requirement in requirements]))
+            return vocabulary
+
+    # --- Resume analyses (deduplication) ---
+    def find_resume_analysis(self, content_sha256: str = None, text_sha256: str = None) -> Optional[Dict]:
+        """Most recent reusable analysis of an identical resume, by file hash or normalized-text hash.
+
+        Degraded analyses (see is_degraded_analysis) and ones older than
+        AI_ANALYSIS_REUSE_MAX_AGE_DAYS are skipped.
+        """
+        from agents.resume_fingerprint import is_degraded_analysis
+
+        if content_sha256:
+            query, param = "SELECT * FROM resume_analyses WHERE content_sha256 = ?", content_sha256
+        elif text_sha256:
+            query, param = "SELECT * FROM resume_analyses WHERE text_sha256 = ?", text_sha256
+        else:
+            return None
+        max_age_days = float(os.getenv("AI_ANALYSIS_REUSE_MAX_AGE_DAYS", 30))
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                query + " AND created_at >= datetime('now', ?) ORDER BY id DESC LIMIT 20",
+                (param, f"-{max_age_days} days"),
+            )
+            for row in cursor.fetchall():
+                d = dict(row)
+                d["report"] = json.loads(d["report"])
+                if is_degraded_analysis(d["report"]):
+                    continue
+                d["skills"] = json.loads(d["skills"]) if d["skills"] else []
+                return d
+            return None
+
+    def save_resume_analysis(self, candidate_id: Optional[int], content_sha256: str, text_sha256: Optional[str],
+                             report: dict, skills: list, reused_from: Optional[int] = None) -> int:
+        query = """
+        INSERT INTO resume_analyses (candidate_id, content_sha256, text_sha256, report, skills, reused_from)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (
+                candidate_id, content_sha256, text_sha256, json.dumps(report), json.dumps(skills), reused_from
+            ))
+            return cursor.lastrowid
+
 # Global database instance  
 db = JobDatabase()
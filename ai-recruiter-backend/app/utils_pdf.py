@@ -1,14 +1,22 @@
-import PyPDF2
-from io import BytesIO
+from typing import Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def extract_text_from_pdf(source: Union[bytes, str]) -> str:
+    """Extract text from PDF file content, or from a PDF file on disk given its path.
+
+    Parsing runs in the shared PDF process pool (agents.pdf_pool), not on
+    the event loop. PdfPoolBusyError is raised when the pool's queue is full;
+    any other failure returns "".
+    """
+    from agents.pdf_pool import PdfPoolBusyError, get_pdf_pool
 
-async def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from a PDF file content"""
     try:
-        pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return await get_pdf_pool().extract(source)
+    except PdfPoolBusyError:
+        raise
     except Exception as e:
-        print(f"Error reading PDF: {e}")
+        logger.warning("Error reading PDF: %s", e, exc_info=True)
         return ""
@@ -218,14 +218,14 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Main async function to process the resume
-async def process_resume(file_path: str) -> dict:
+async def process_resume(file_path: str, on_progress=None) -> dict:
     try:
         orchestrator = OrchestratorAgent()
         resume_data = {
             "file_path": file_path,
             "submission_timestamp": datetime.now().isoformat(),
         }
-        return await orchestrator.process_application(resume_data)
+        return await orchestrator.process_application(resume_data, on_progress=on_progress)
     except Exception as e:
         logger.error(f"Error processing resume: {str(e)}")
         raise
@@ -287,11 +287,16 @@ def main():
                 progress_bar = st.progress(0)
                 status_text = st.empty()
 
+                def show_progress(event):
+                    # Called by the orchestrator as each workflow stage completes
+                    progress_bar.progress(event["completed"] / event["total"])
+                    status_text.text(f"Completed {event['stage'].replace('_', ' ')} "
+                                     f"({event['completed']}/{event['total']})...")
+
                 try:
                     status_text.text("Analyzing resume...")
-                    progress_bar.progress(25)
 
-                    result = asyncio.run(process_resume(file_path))
+                    result = asyncio.run(process_resume(file_path, on_progress=show_progress))
 
                     if result["status"] == "completed":
                         progress_bar.progress(100)
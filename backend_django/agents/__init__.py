@@ -0,0 +1,37 @@
+"""Recruitment agents.
+
+Nothing is imported with the package itself: the public names below are
+resolved on first access, and the heavy dependencies (transformers/torch,
+onnxruntime, pdfminer, httpx) are only imported once a model is loaded or a
+resume parsed. Importing agents (or agents.orchestrator) is cheap enough
+for worker boot and management commands.
+"""
+import importlib
+
+_EXPORTS = {
+    "BaseAgent": "base_agent",
+    "OrchestratorAgent": "orchestrator",
+    "SkillScannerAgent": "skill_scanner_agent",
+    "ExtractorAgent": "extractor_agent",
+    "AnalyzerAgent": "analyzer_agent",
+    "MatcherAgent": "matcher_agent",
+    "ScreenerAgent": "screener_agent",
+    "RecommenderAgent": "recommender_agent",
+    "AgentMessage": "messages",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Cache it so the next access is a plain attribute lookup
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,111 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import os
+
+from .messages import to_prompt_text
+from .model_registry import model_registry, get_default_model_path
+
+
+def _tokenizer_path() -> str:
+    # Point AI_TOKENIZER_PATH at the tokenizer of the Ollama model for exact counts on that path
+    return os.getenv("AI_TOKENIZER_PATH", get_default_model_path())
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the deployment's tokenizer, or a ~4 chars/token estimate without one"""
+    tokenizer = model_registry.get_tokenizer(_tokenizer_path())
+    if tokenizer is None:
+        return (len(text) + 3) // 4
+    return len(tokenizer.encode(text))
+
+
+@dataclass
+class ContextField:
+    """A value an agent needs from the workflow context.
+
+    path walks nested dicts; lower priority numbers are kept first. Lists are
+    cut to max_items and strings to max_chars before the budget is applied.
+    """
+
+    path: Tuple[str, ...]
+    priority: int = 0
+    max_items: Optional[int] = None
+    max_chars: Optional[int] = None
+
+
+def _lookup(context: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = context
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _assign(target: Dict[str, Any], path: Tuple[str, ...], value: Any) -> None:
+    for key in path[:-1]:
+        target = target.setdefault(key, {})
+    target[path[-1]] = value
+
+
+def _remove(target: Dict[str, Any], path: Tuple[str, ...]) -> None:
+    parent = _lookup(target, path[:-1])
+    if isinstance(parent, dict):
+        parent.pop(path[-1], None)
+        # Don't leave empty parents behind
+        if not parent and len(path) > 1:
+            _remove(target, path[:-1])
+
+
+def _shrink(value: Any, max_items: Optional[int], max_chars: Optional[int]) -> Any:
+    if isinstance(value, list) and max_items is not None:
+        return value[:max_items]
+    if isinstance(value, str) and max_chars is not None and len(value) > max_chars:
+        return value[:max_chars] + " ...[truncated]"
+    return value
+
+
+class ContextBudgeter:
+    """Builds the smallest useful prompt context for an agent.
+
+    Fields are added in priority order. When a field would push the prompt
+    over max_tokens it is shrunk (lists halved, strings cut) until it fits,
+    or dropped if even its smallest form doesn't.
+    """
+
+    def __init__(self, fields: Sequence[ContextField], max_tokens: int):
+        self.fields = sorted(fields, key=lambda f: f.priority)
+        self.max_tokens = max_tokens
+
+    def build(self, context: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """Return (trimmed context, prompt token count)"""
+        trimmed: Dict[str, Any] = {}
+        tokens = count_tokens(to_prompt_text(trimmed))
+
+        for spec in self.fields:
+            value = _lookup(context, spec.path)
+            if value is None:
+                continue
+
+            max_items, max_chars = spec.max_items, spec.max_chars
+            while True:
+                _assign(trimmed, spec.path, _shrink(value, max_items, max_chars))
+                candidate_tokens = count_tokens(to_prompt_text(trimmed))
+                if candidate_tokens <= self.max_tokens:
+                    tokens = candidate_tokens
+                    break
+
+                # Over budget: halve the field and try again, or give up on it
+                if isinstance(value, list) and (max_items is None or max_items > 1):
+                    max_items = max((max_items or len(value)) // 2, 1)
+                elif isinstance(value, str) and (max_chars is None or max_chars > 200):
+                    max_chars = max((max_chars or len(value)) // 2, 200)
+                else:
+                    _remove(trimmed, spec.path)
+                    break
+
+        return trimmed, tokens
+
+
+def budget_from_env(agent_name: str, default: int) -> int:
+    return int(os.getenv(f"AI_CONTEXT_BUDGET_{agent_name.upper()}", default))
@@ -0,0 +1,434 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import os
+import re
+
+# Schema-constrained decoding for the local model.
+#
+# A JSON schema is compiled into a small pushdown automaton over characters.
+# Its state is an immutable tuple of frames, so checking whether a candidate
+# token keeps the output valid is just feeding the token's characters to a
+# copy of the state. Output is canonical compact JSON: properties in schema
+# order, ", " and ": " separators, no other whitespace.
+
+# feed() results of a single node
+_REJECT = 0
+_CONSUMED = 1  # char consumed, node continues with the new state
+_DONE = 2  # char consumed, node finished
+_DONE_UNCONSUMED = 3  # node finished before this char (numbers), parent must handle it
+_PUSH = 4  # node moved to a new state and wants child pushed; the child handles this char
+
+
+class _Literal:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def start(self):
+        return 0
+
+    def feed(self, offset, ch):
+        if ch != self.text[offset]:
+            return _REJECT, None, None
+        if offset + 1 == len(self.text):
+            return _DONE, None, None
+        return _CONSUMED, offset + 1, None
+
+    def can_finish(self, offset):
+        return False
+
+
+class _String:
+    __slots__ = ("enum", "max_length")
+
+    def __init__(self, enum: Optional[Sequence[str]] = None, max_length: int = 200):
+        self.enum = tuple(enum) if enum else None
+        self.max_length = max_length
+
+    def start(self):
+        # (opened, text so far, inside an escape)
+        return (False, "", False)
+
+    def feed(self, state, ch):
+        opened, text, escaped = state
+        if not opened:
+            return (_CONSUMED, (True, "", False), None) if ch == '"' else (_REJECT, None, None)
+        if escaped:
+            if ch in '"\\/bfnrt':
+                return _CONSUMED, (True, text + "\\" + ch, False), None
+            return _REJECT, None, None
+        if ch == '"':
+            if self.enum is not None and text not in self.enum:
+                return _REJECT, None, None
+            return _DONE, None, None
+        if len(text) >= self.max_length or ch < " " or ch == "\x7f":
+            return _REJECT, None, None
+        if self.enum is not None:
+            candidate = text + ch
+            if not any(value.startswith(candidate) for value in self.enum):
+                return _REJECT, None, None
+            return _CONSUMED, (True, candidate, False), None
+        if ch == "\\":
+            return _CONSUMED, (True, text, True), None
+        return _CONSUMED, (True, text + ch, False), None
+
+    def can_finish(self, state):
+        return False
+
+
+class _Number:
+    __slots__ = ("integer", "max_digits")
+
+    def __init__(self, integer: bool, max_digits: int = 8):
+        self.integer = integer
+        self.max_digits = max_digits
+
+    def start(self):
+        return ""
+
+    def _complete(self, text):
+        return bool(text) and text[-1].isdigit()
+
+    def feed(self, text, ch):
+        if ch == "-" and not text:
+            return _CONSUMED, ch, None
+        if ch.isdigit() and ch.isascii():
+            digits = text.lstrip("-")
+            # No leading zeros ("0" is fine, "01" is not)
+            if digits == "0" or sum(c.isdigit() for c in text) >= self.max_digits:
+                return _REJECT, None, None
+            return _CONSUMED, text + ch, None
+        if ch == "." and not self.integer and "." not in text and self._complete(text):
+            return _CONSUMED, text + ch, None
+        if self._complete(text):
+            return _DONE_UNCONSUMED, None, None
+        return _REJECT, None, None
+
+    def can_finish(self, text):
+        return self._complete(text)
+
+
+class _Choice:
+    """One of a few literal words (true/false)"""
+
+    __slots__ = ("options",)
+
+    def __init__(self, options: Sequence[str]):
+        self.options = tuple(options)
+
+    def start(self):
+        return ""
+
+    def feed(self, text, ch):
+        candidate = text + ch
+        matches = [option for option in self.options if option.startswith(candidate)]
+        if not matches:
+            return _REJECT, None, None
+        if candidate in matches and len(matches) == 1:
+            return _DONE, None, None
+        return _CONSUMED, candidate, None
+
+    def can_finish(self, text):
+        return False
+
+
+class _Array:
+    __slots__ = ("item", "max_items")
+
+    def __init__(self, item, max_items: int = 20):
+        self.item = item
+        self.max_items = max_items
+
+    def start(self):
+        # (phase, items so far); phases: open, first, after, space, next
+        return ("open", 0)
+
+    def feed(self, state, ch):
+        phase, count = state
+        if phase == "open":
+            return (_CONSUMED, ("first", 0), None) if ch == "[" else (_REJECT, None, None)
+        if phase == "first":
+            if ch == "]":
+                return _DONE, None, None
+            if self.max_items == 0:
+                return _REJECT, None, None
+            return _PUSH, ("after", 1), self.item
+        if phase == "after":
+            if ch == "]":
+                return _DONE, None, None
+            if ch == "," and count < self.max_items:
+                return _CONSUMED, ("space", count), None
+            return _REJECT, None, None
+        if phase == "space":
+            # Canonical ", " separator
+            return (_CONSUMED, ("next", count), None) if ch == " " else (_REJECT, None, None)
+        return _PUSH, ("after", count + 1), self.item
+
+    def can_finish(self, state):
+        return False
+
+
+class _Sequence:
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: Sequence[Any]):
+        self.parts = tuple(parts)
+
+    def start(self):
+        return 0
+
+    def feed(self, index, ch):
+        if index == len(self.parts):
+            return _DONE_UNCONSUMED, None, None
+        return _PUSH, index + 1, self.parts[index]
+
+    def can_finish(self, index):
+        return index == len(self.parts)
+
+
+def _compile(schema: Dict[str, Any]):
+    if "enum" in schema:
+        return _String(enum=[str(value) for value in schema["enum"]])
+
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        if not properties:
+            return _Literal("{}")
+        parts: List[Any] = []
+        for index, (name, subschema) in enumerate(properties.items()):
+            prefix = "{" if index == 0 else ", "
+            parts.append(_Literal(f'{prefix}"{name}": '))
+            parts.append(_compile(subschema))
+        parts.append(_Literal("}"))
+        return _Sequence(parts)
+    if kind == "array":
+        return _Array(_compile(schema.get("items", {"type": "string"})), schema.get("maxItems", 20))
+    if kind == "string":
+        return _String(max_length=schema.get("maxLength", 200))
+    if kind in ("integer", "number"):
+        return _Number(integer=kind == "integer")
+    if kind == "boolean":
+        return _Choice(("true", "false"))
+    raise ValueError(f"Unsupported schema for constrained decoding: {schema}")
+
+
+class SchemaMatcher:
+    """Incremental validator of canonical JSON text against a schema.
+
+    States are immutable; feed() returns a new state or None when the text
+    can no longer become valid.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.root = _Sequence([_compile(schema)])
+
+    def start(self) -> Tuple:
+        return ((self.root, self.root.start()),)
+
+    def feed(self, state: Tuple, text: str) -> Optional[Tuple]:
+        for ch in text:
+            state = self._feed_char(state, ch)
+            if state is None:
+                return None
+        return state
+
+    def _feed_char(self, stack: Tuple, ch: str) -> Optional[Tuple]:
+        while stack:
+            node, node_state = stack[-1]
+            result, new_state, child = node.feed(node_state, ch)
+            if result == _REJECT:
+                return None
+            if result == _CONSUMED:
+                return stack[:-1] + ((node, new_state),)
+            if result == _DONE:
+                return stack[:-1]
+            if result == _DONE_UNCONSUMED:
+                stack = stack[:-1]
+                continue
+            # _PUSH: parent advances, child takes the char
+            stack = stack[:-1] + ((node, new_state), (child, child.start()))
+        return None
+
+    def is_complete(self, state: Tuple) -> bool:
+        return all(node.can_finish(node_state) for node, node_state in state)
+
+
+class _TokenTable:
+    """Text every token adds to a completion, grouped by first character for fast pre-filtering"""
+
+    OTHER = "é"  # stands in for every non-ASCII first character
+    CONTROL = "\n"  # and this for control characters
+
+    def __init__(self, tokenizer):
+        import torch
+
+        size = len(tokenizer)
+        self.texts, byte_values = self.token_texts(tokenizer)
+        # A UTF-8 lead byte feeds the matcher the whole character (OTHER); the
+        # continuation bytes it needs follow without adding text
+        self.continuations = {
+            token_id: _utf8_continuations(value) for token_id, value in byte_values.items()
+            if _utf8_continuations(value)
+        }
+        self.continuation_ids = [token_id for token_id, value in byte_values.items() if 0x80 <= value < 0xC0]
+        groups: Dict[str, List[int]] = {}
+        for token_id, text in enumerate(self.texts):
+            if text:
+                first = text[0]
+                key = first if " " <= first < "\x7f" else (self.CONTROL if first < " " else self.OTHER)
+                groups.setdefault(key, []).append(token_id)
+
+        self.group_masks = {}
+        for key, ids in groups.items():
+            mask = torch.zeros(size, dtype=torch.bool)
+            mask[torch.tensor(ids, dtype=torch.long)] = True
+            self.group_masks[key] = mask
+        self._union_cache: Dict[frozenset, Any] = {}
+
+    def first_char_mask(self, matcher: SchemaMatcher, state: Tuple):
+        """Tokens whose first character is acceptable in this state"""
+        allowed = frozenset(key for key in self.group_masks if matcher.feed(state, key) is not None)
+        mask = self._union_cache.get(allowed)
+        if mask is None:
+            import torch
+
+            mask = torch.zeros_like(next(iter(self.group_masks.values())))
+            for key in allowed:
+                mask |= self.group_masks[key]
+            if len(self._union_cache) < 256:
+                self._union_cache[allowed] = mask
+        return mask
+
+    @classmethod
+    def token_texts(cls, tokenizer) -> Tuple[List[str], Dict[int, int]]:
+        """Text of every token id, and the byte value of the byte-fallback tokens
+
+        Each token is decoded after an anchor token whose text is then cut
+        off: decoded alone, SentencePiece drops the space a leading "▁"
+        stands for. Byte-fallback tokens ("<0xC3>") decode to U+FFFD on their
+        own, so they're mapped from their piece instead: ASCII bytes to their
+        character, UTF-8 lead bytes to OTHER. Special tokens, continuation
+        bytes and anything else that isn't whole characters get no text.
+        """
+        size = len(tokenizer)
+        special = set(tokenizer.all_special_ids)
+        pieces = tokenizer.convert_ids_to_tokens(list(range(size)))
+        anchor = next(
+            token_id for token_id in range(size)
+            if token_id not in special and tokenizer.decode([token_id], clean_up_tokenization_spaces=False).isalnum()
+        )
+        anchor_text = tokenizer.decode([anchor], clean_up_tokenization_spaces=False)
+
+        texts: List[str] = []
+        byte_values: Dict[int, int] = {}
+        for token_id, piece in enumerate(pieces):
+            byte_token = _BYTE_TOKEN.match(piece or "")
+            if token_id in special:
+                text = ""
+            elif byte_token:
+                value = byte_values[token_id] = int(byte_token.group(1), 16)
+                text = chr(value) if value < 0x80 else (cls.OTHER if _utf8_continuations(value) else "")
+            else:
+                text = tokenizer.decode([anchor, token_id], clean_up_tokenization_spaces=False)
+                text = text[len(anchor_text):] if text.startswith(anchor_text) else ""
+                if "�" in text:
+                    text = ""
+            texts.append(text)
+        return texts, byte_values
+
+
+_BYTE_TOKEN = re.compile(r"<0x([0-9A-Fa-f]{2})>$")
+
+
+def _utf8_continuations(value: int) -> int:
+    """Continuation bytes a UTF-8 lead byte needs (0 if it doesn't start a character)"""
+    if 0xC2 <= value <= 0xDF:
+        return 1
+    if 0xE0 <= value <= 0xEF:
+        return 2
+    if 0xF0 <= value <= 0xF4:
+        return 3
+    return 0
+
+
+_token_tables: Dict[int, _TokenTable] = {}
+
+
+def _token_table(tokenizer) -> _TokenTable:
+    table = _token_tables.get(id(tokenizer))
+    if table is None:
+        table = _token_tables[id(tokenizer)] = _TokenTable(tokenizer)
+    return table
+
+
+def schema_logits_processor(tokenizer, schema: Dict[str, Any], prompt_length: int, batch_size: int):
+    """LogitsProcessorList that keeps every row's completion valid for schema.
+
+    Candidates are checked best-score first (top_k at a time), so the
+    Python-side validation only touches a handful of tokens per step; once a
+    row's JSON is complete only EOS is allowed, which ends that row.
+    """
+    import torch
+    from transformers import LogitsProcessor, LogitsProcessorList
+
+    matcher = SchemaMatcher(schema)
+    table = _token_table(tokenizer)
+    eos_id = tokenizer.eos_token_id
+    top_k = int(os.getenv("AI_CONSTRAINED_TOP_K", 32))
+    states: List[Optional[Tuple]] = [matcher.start() for _ in range(batch_size)]
+    consumed = [0] * batch_size
+    # Continuation bytes each row still owes for a character it started with a byte-fallback token
+    pending = [0] * batch_size
+
+    class _SchemaConstrained(LogitsProcessor):
+        def __call__(self, input_ids, scores):
+            for row in range(scores.shape[0]):
+                state = states[row]
+                generated = input_ids[row, prompt_length + consumed[row]:].tolist()
+                for token_id in generated:
+                    if state is None or matcher.is_complete(state):
+                        break
+                    if pending[row]:
+                        # The lead byte already fed the matcher this character
+                        pending[row] -= 1
+                        continue
+                    state = matcher.feed(state, table.texts[token_id])
+                    pending[row] = table.continuations.get(token_id, 0)
+                consumed[row] += len(generated)
+                states[row] = state
+
+                allowed = torch.zeros(scores.shape[1], dtype=torch.bool, device=scores.device)
+                if state is None or matcher.is_complete(state):
+                    allowed[eos_id] = True
+                elif pending[row]:
+                    allowed[table.continuation_ids] = True
+                else:
+                    allowed[self._allowed_tokens(scores[row], state)] = True
+                scores[row] = scores[row].masked_fill(~allowed, float("-inf"))
+            return scores
+
+        def _allowed_tokens(self, row_scores, state) -> List[int]:
+            prefilter = table.first_char_mask(matcher, state).to(row_scores.device)
+            candidates = row_scores[: prefilter.shape[0]].masked_fill(~prefilter, float("-inf"))
+            remaining = int(prefilter.sum())
+            checked = 0
+            k = top_k
+            while checked < remaining:
+                order = torch.topk(candidates, min(k, remaining)).indices.tolist()
+                allowed = [
+                    token_id for token_id in order[checked:]
+                    if matcher.feed(state, table.texts[token_id]) is not None
+                ]
+                if allowed:
+                    return allowed
+                checked = len(order)
+                k *= 4
+            return [eos_id]
+
+    return LogitsProcessorList([_SchemaConstrained()])
+
+
+def constrained_decoding_enabled() -> bool:
+    return os.getenv("AI_CONSTRAINED_DECODING", "1").lower() not in ("0", "false", "no")
@@ -1,5 +1,6 @@
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
+from .messages import message_payload
 from core.models import Job
 import json
 from django.db.models import Q
@@ -18,12 +19,9 @@ class MatcherAgent(BaseAgent):
         """Match candidate with available positions"""
         print("🎯 Matcher: Finding suitable job matches")
 
-        try:
-            # Convert single quotes to double quotes to make it valid JSON
-            content = messages[-1].get("content", "{}").replace("'", '"')
-            analysis_results = json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"Error parsing analysis results: {e}")
+        analysis_results = message_payload(messages[-1])
+        if not isinstance(analysis_results, dict):
+            print(f"Error parsing analysis results: unexpected payload {type(analysis_results).__name__}")
             return {
                 "matched_jobs": [],
                 "match_timestamp": "2024-03-14",
@@ -0,0 +1,293 @@
+"""PDF text extraction in a bounded process pool.
+
+PyPDF2 and pdfminer are pure Python and hold the GIL for the whole parse,
+so parsing on the event loop (or in a thread) stalls every other request
+in the worker. Documents are parsed in separate processes instead, with a
+page limit, a per-document timeout and a cap on how many may be waiting.
+"""
+from typing import Dict, Any, Iterator, Optional, Union
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import asyncio
+import io
+import itertools
+import logging
+import mmap
+import multiprocessing
+import os
+import signal
+import threading
+
+# Raw file content, or the path of a file on disk (mapped by the worker, nothing is copied across)
+PdfSource = Union[bytes, str]
+
+DEFAULT_BACKEND = "pypdf2"
+
+logger = logging.getLogger(__name__)
+
+
+class PdfExtractionError(Exception):
+    """Raised when a document could not be parsed within the limits"""
+
+    pass
+
+
+class PdfTimeoutError(PdfExtractionError):
+    """Raised when parsing a document ran past the pool's timeout"""
+
+    pass
+
+
+class PdfPoolBusyError(PdfExtractionError):
+    """Raised instead of queueing a document when queue_depth documents are already waiting"""
+
+    pass
+
+
+# --- Run in the worker processes ---
+class _MappedFile(io.RawIOBase):
+    """Read-only file object over an mmap (pdfminer only accepts real file objects)"""
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mapped = mapped
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._mapped.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+
+    def tell(self) -> int:
+        return self._mapped.tell()
+
+
+@contextmanager
+def _opened(source: PdfSource) -> Iterator[Any]:
+    """Binary stream over the document; files on disk are memory-mapped rather than read in"""
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+        return
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # An empty file can't be mapped; let the parser report it
+            yield f
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield _MappedFile(mapped)
+
+
+@contextmanager
+def _deadline(seconds: float) -> Iterator[None]:
+    """Interrupt the parse after `seconds` (process workers only: signals need the main thread)"""
+    if seconds <= 0 or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expired(signum, frame):
+        raise PdfTimeoutError(f"PDF parsing took longer than {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _extract_pypdf2(source: PdfSource, max_pages: int) -> str:
+    import PyPDF2
+
+    with _opened(source) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        text = ""
+        for page in itertools.islice(reader.pages, max_pages or None):
+            text += page.extract_text() + "\n"
+        return text
+
+
+def _extract_pdfminer(source: PdfSource, max_pages: int) -> str:
+    from pdfminer.high_level import extract_text
+
+    with _opened(source) as stream:
+        # maxpages=0 reads every page
+        return extract_text(stream, maxpages=max_pages)
+
+
+_EXTRACTORS = {"pypdf2": _extract_pypdf2, "pdfminer": _extract_pdfminer}
+
+
+def _extract(backend: str, source: PdfSource, max_pages: int, timeout: float) -> str:
+    with _deadline(timeout):
+        return _EXTRACTORS[backend](source, max_pages)
+
+
+# --- Parent side ---
+class PdfExtractionPool:
+    """Process pool for PDF parsing, shared by everything in this process.
+
+    At most queue_depth documents are accepted at a time (parsing or
+    waiting for one of the max_workers processes); beyond that callers get
+    PdfPoolBusyError right away instead of an ever-growing backlog. Each
+    document is parsed up to max_pages pages and interrupted after timeout
+    seconds of parsing. The processes are started on first use.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        queue_depth: int = 16,
+        timeout: float = 30.0,
+        max_pages: int = 50,
+        start_method: str = "spawn",
+        in_process: bool = False,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.queue_depth = max(self.max_workers, queue_depth)
+        self.timeout = timeout
+        self.max_pages = max(0, max_pages)
+        # spawn: forking a worker that holds model threads and sockets isn't safe
+        self.start_method = start_method
+        # Threads instead of processes: no isolation and no timeout, for environments without subprocesses
+        self.in_process = in_process
+
+        self._slots = threading.BoundedSemaphore(self.queue_depth)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._stats = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "restarts": 0}
+        self._in_flight = 0
+
+    @classmethod
+    def from_env(cls, **overrides) -> "PdfExtractionPool":
+        """Pool configured from AI_PDF_*; keyword arguments take precedence"""
+        config = dict(
+            max_workers=int(os.getenv("AI_PDF_WORKERS", min(4, max(1, (os.cpu_count() or 2) // 2)))),
+            queue_depth=int(os.getenv("AI_PDF_QUEUE_DEPTH", 16)),
+            timeout=float(os.getenv("AI_PDF_TIMEOUT", 30)),
+            max_pages=int(os.getenv("AI_PDF_MAX_PAGES", 50)),
+            start_method=os.getenv("AI_PDF_START_METHOD", "spawn"),
+            in_process=os.getenv("AI_PDF_IN_PROCESS", "0").lower() in ("1", "true", "yes"),
+        )
+        config.update(overrides)
+        return cls(**config)
+
+    async def extract(self, source: PdfSource, backend: str = DEFAULT_BACKEND) -> str:
+        """Text of the PDF, parsed off the event loop"""
+        with self._slot():
+            for retry in (False, True):
+                executor = self._current_executor()
+                try:
+                    return self._finished(await asyncio.wrap_future(self._submit(executor, source, backend)))
+                except BrokenProcessPool:
+                    self._replace(executor, retry)
+                except BaseException as e:
+                    self._failed(e)
+                    raise
+
+    def extract_sync(self, source: PdfSource, backend: str = DEFAULT_BACKEND) -> str:
+        """Same as extract(), for code already running in a worker thread"""
+        with self._slot():
+            for retry in (False, True):
+                executor = self._current_executor()
+                try:
+                    return self._finished(self._submit(executor, source, backend).result())
+                except BrokenProcessPool:
+                    self._replace(executor, retry)
+                except BaseException as e:
+                    self._failed(e)
+                    raise
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self._in_flight,
+                "started": self._executor is not None,
+                "mode": "threads" if self.in_process else "processes",
+                **self._stats,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @contextmanager
+    def _slot(self) -> Iterator[None]:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise PdfPoolBusyError(f"PDF extraction queue is full ({self.queue_depth} documents)")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _current_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.in_process:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pdf-extraction")
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        self.max_workers, mp_context=multiprocessing.get_context(self.start_method)
+                    )
+            return self._executor
+
+    def _submit(self, executor: Executor, source: PdfSource, backend: str) -> Future:
+        if backend not in _EXTRACTORS:
+            raise ValueError(f"Unknown PDF backend {backend!r} (expected one of {sorted(_EXTRACTORS)})")
+        return executor.submit(_extract, backend, source, self.max_pages, self.timeout)
+
+    def _replace(self, broken: Executor, give_up: bool) -> None:
+        """A worker died (crash, OOM kill): start a fresh pool and retry the document once"""
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self._stats["restarts"] += 1
+                logger.warning("PDF extraction pool broke, restarting it")
+        broken.shutdown(wait=False, cancel_futures=True)
+        if give_up:
+            self._failed(None)
+            raise PdfExtractionError("PDF extraction worker died twice on this document")
+
+    def _finished(self, text: str) -> str:
+        with self._lock:
+            self._stats["completed"] += 1
+        return text
+
+    def _failed(self, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._stats["failed"] += 1
+            if isinstance(error, PdfTimeoutError):
+                self._stats["timeouts"] += 1
+
+
+_pool: Optional[PdfExtractionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> PdfExtractionPool:
+    """Process-wide PDF extraction pool, configured from the environment"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PdfExtractionPool.from_env()
+    return _pool
@@ -0,0 +1,61 @@
+from typing import Any, Dict, List, Tuple
+from collections import OrderedDict
+import copy
+import threading
+
+
+class PrefixKVCache:
+    """Past key/values of static prompt prefixes (agent instructions).
+
+    Each agent sends the same instruction block in front of every prompt, so
+    its key/values are computed once per model and reused: only the suffix
+    tokens are prefilled per request. Entries are evicted LRU beyond
+    max_entries.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "prefix_tokens_reused": 0}
+
+    def get(self, model, prefix_ids: List[int], batch_size: int = 1):
+        """Return a private copy of the prefix cache, expanded to batch_size rows"""
+        key = tuple(prefix_ids)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["prefix_tokens_reused"] += len(prefix_ids) * batch_size
+
+        if cached is None:
+            cached = self._compute(model, prefix_ids)
+            with self._lock:
+                self._stats["misses"] += 1
+                self._entries[key] = cached
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        # generate() extends the cache in place, so every call works on its own copy
+        past = copy.deepcopy(cached)
+        if batch_size > 1:
+            past.batch_repeat_interleave(batch_size)
+        return past
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+    def _compute(self, model, prefix_ids: List[int]):
+        import torch
+        from transformers import DynamicCache
+
+        with torch.no_grad():
+            outputs = model(input_ids=torch.tensor([prefix_ids], dtype=torch.long), use_cache=True)
+        past = outputs.past_key_values
+        if isinstance(past, tuple):
+            past = DynamicCache.from_legacy_cache(past)
+        return past
@@ -0,0 +1,16 @@
+from typing import Dict, Any, Callable
+import json
+
+# Receives one event per completed workflow stage (see OrchestratorAgent.process_application);
+# may be a coroutine function
+ProgressCallback = Callable[[Dict[str, Any]], Any]
+
+
+def format_sse(event: str, data: Any) -> str:
+    """One Server-Sent Events message"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+# Sent on an idle stream so proxies don't close it
+SSE_KEEPALIVE = ": keep-alive\n\n"
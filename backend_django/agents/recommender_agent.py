@@ -1,5 +1,16 @@
 from typing import Dict, Any
 from .base_agent import BaseAgent
+from .messages import message_payload, to_prompt_text
+from .context_budget import ContextBudgeter, ContextField, budget_from_env
+
+# What the recommender needs from the workflow context, most important first
+RECOMMENDER_CONTEXT_FIELDS = [
+    ContextField(("analysis_results", "skills_analysis"), priority=0),
+    ContextField(("job_matches", "matched_jobs"), priority=0, max_items=3),
+    ContextField(("screening_results", "screening_score"), priority=1),
+    ContextField(("screening_results", "screening_report"), priority=1, max_chars=3000),
+    ContextField(("extracted_data", "structured_data"), priority=2, max_chars=3000),
+]
 
 
 class RecommenderAgent(BaseAgent):
@@ -13,13 +24,18 @@ class RecommenderAgent(BaseAgent):
             4. Screening results
             Provide clear next steps and specific recommendations.""",
         )
+        self.context_budgeter = ContextBudgeter(
+            RECOMMENDER_CONTEXT_FIELDS, budget_from_env(self.name, 1500)
+        )
 
     async def run(self, messages: list) -> Dict[str, Any]:
         """Generate final recommendations"""
         print("💡 Recommender: Generating final recommendations")
 
-        workflow_context = eval(messages[-1]["content"])
-        recommendation = self._query_ollama(str(workflow_context))
+        workflow_context = message_payload(messages[-1])
+        prompt_context, prompt_tokens = self.context_budgeter.build(workflow_context)
+        print(f"💡 Recommender: prompt context is {prompt_tokens} tokens")
+        recommendation = await self._query_ollama(to_prompt_text(prompt_context))
 
         return {
             "final_recommendation": recommendation,
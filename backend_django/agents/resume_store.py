@@ -0,0 +1,56 @@
+"""Content-addressed storage for uploaded resumes.
+
+Uploads are streamed chunk by chunk into a temporary file next to their
+final location while their SHA-256 is computed, then renamed to
+<sha[:2]>/<sha>.pdf. The whole file is never held in memory, identical
+uploads share one file, and two different resumes with the same name no
+longer overwrite each other.
+"""
+from typing import Iterable, NamedTuple
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StoredResume(NamedTuple):
+    path: str
+    # Path relative to the storage directory (for URLs)
+    name: str
+    content_sha256: str
+    size: int
+
+
+def store_resume(chunks: Iterable[bytes], storage_dir: str, suffix: str = ".pdf") -> StoredResume:
+    """Write the upload to storage_dir in one pass, hashing it on the way (blocking I/O)"""
+    os.makedirs(storage_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=storage_dir, prefix=".upload-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+
+        sha = digest.hexdigest()
+        name = os.path.join(sha[:2], sha + suffix)
+        path = os.path.join(storage_dir, name)
+        if os.path.exists(path):
+            # Same bytes stored before
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return StoredResume(path=path, name=name.replace(os.sep, "/"), content_sha256=sha, size=size)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_chunks(f, chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    """Chunks of a binary file object, for store_resume"""
+    return iter(lambda: f.read(chunk_size), b"")
@@ -1,5 +1,15 @@
 from typing import Dict, Any
 from .base_agent import BaseAgent
+from .messages import message_payload, to_prompt_text
+from .context_budget import ContextBudgeter, ContextField, budget_from_env
+
+# What the screener needs from the workflow context, most important first
+SCREENER_CONTEXT_FIELDS = [
+    ContextField(("analysis_results", "skills_analysis"), priority=0),
+    ContextField(("analysis_results", "confidence_score"), priority=0),
+    ContextField(("extracted_data", "structured_data"), priority=1, max_chars=6000),
+    ContextField(("extracted_data", "raw_text"), priority=2, max_chars=4000),
+]
 
 
 class ScreenerAgent(BaseAgent):
@@ -14,13 +24,18 @@ class ScreenerAgent(BaseAgent):
             - Red flags or concerns
             Provide comprehensive screening reports.""",
         )
+        self.context_budgeter = ContextBudgeter(
+            SCREENER_CONTEXT_FIELDS, budget_from_env(self.name, 1500)
+        )
 
     async def run(self, messages: list) -> Dict[str, Any]:
         """Screen the candidate"""
         print("👥 Screener: Conducting initial screening")
 
-        workflow_context = eval(messages[-1]["content"])
-        screening_results = self._query_ollama(str(workflow_context))
+        workflow_context = message_payload(messages[-1])
+        prompt_context, prompt_tokens = self.context_budgeter.build(workflow_context)
+        print(f"👥 Screener: prompt context is {prompt_tokens} tokens")
+        screening_results = await self._query_ollama(to_prompt_text(prompt_context))
 
         return {
             "screening_report": screening_results,
@@ -0,0 +1,237 @@
+from typing import Dict, Any, Awaitable, Callable, Iterator, Optional, Tuple
+from concurrent.futures import Future
+from contextlib import contextmanager
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from .llm_cache import DEFAULT_CACHE_DIR
+
+
+class _LeaderCancelled(Exception):
+    """The request that waiters were sharing was cancelled; they retry on their own"""
+
+    pass
+
+
+class SingleFlight:
+    """Coalesces identical in-flight LLM requests.
+
+    The first caller for a key becomes the leader and runs the upstream
+    request; callers arriving while it runs wait for the leader's result
+    instead of sending the same prompt again. Waiters can live on other
+    event loops (each Django request thread runs its own).
+
+    With a lease_path the same happens across processes (e.g. the gunicorn
+    workers): the leader holds a lease row in a shared SQLite file, other
+    processes poll it for the result. The leader renews the lease while its
+    request runs, however long that takes; a lease whose owner died expires
+    after lease_seconds so someone else takes over.
+    """
+
+    def __init__(
+        self,
+        lease_path: Optional[str] = None,
+        lease_seconds: float = 180.0,
+        poll_interval: float = 0.2,
+        result_ttl: float = 30.0,
+    ):
+        self.lease_path = lease_path
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        # Finished results stay readable this long for processes still polling
+        self.result_ttl = result_ttl
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "shared_coalesced": 0}
+
+        if lease_path:
+            os.makedirs(os.path.dirname(lease_path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_flights (
+                        key TEXT PRIMARY KEY,
+                        owner TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        result TEXT,
+                        finished_at REAL
+                    )
+                    """
+                )
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        shared = os.getenv("AI_SINGLE_FLIGHT_SHARED", "0").lower() in ("1", "true", "yes")
+        cache_dir = os.getenv("AI_LLM_CACHE_DIR", DEFAULT_CACHE_DIR)
+        return cls(
+            lease_path=os.path.join(cache_dir, "llm_flights.sqlite3") if shared else None,
+            lease_seconds=float(os.getenv("AI_SINGLE_FLIGHT_LEASE", 180)),
+        )
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        """Run fn once per key across concurrent callers.
+
+        Returns (result, shared); shared is True when the result came from
+        another caller's request.
+        """
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[key] = Future()
+
+            if not leader:
+                try:
+                    # Shielded: a waiter that gets cancelled (a stage deadline, a client
+                    # that went away) must not cancel the future the others share
+                    result = await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+                with self._lock:
+                    self._stats["coalesced"] += 1
+                return result, True
+
+            try:
+                if self.lease_path:
+                    result, shared = await self._do_shared(key, fn)
+                else:
+                    result, shared = await fn(), False
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                if not future.done():
+                    future.set_exception(e)
+                raise
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+            with self._lock:
+                self._stats["shared_coalesced" if shared else "leaders"] += 1
+            return result, shared
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._inflight)
+        stats["shared"] = bool(self.lease_path)
+        return stats
+
+    # --- Cross-process leases ---
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.lease_path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    async def _do_shared(self, key: str, fn: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        while True:
+            try:
+                acquired, result = await asyncio.to_thread(self._acquire, key)
+            except sqlite3.Error as e:
+                # Never let the lease file stand between us and the LLM
+                print(f"Warning: single-flight lease unavailable: {e}")
+                return await fn(), False
+
+            if result is not None:
+                return result, True
+            if acquired:
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        result = None
+        renewal = asyncio.create_task(self._renew(key))
+        try:
+            result = await fn()
+        finally:
+            renewal.cancel()
+            # result is None when fn failed
+            await asyncio.to_thread(self._release, key, result)
+        return result, False
+
+    def _acquire(self, key: str) -> Tuple[bool, Optional[str]]:
+        """Take the lease for key, or report the finished result; (False, None) means keep waiting"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT owner, expires_at, result, finished_at FROM llm_flights WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    owner, expires_at, result, finished_at = row
+                    if result is not None and now - finished_at <= self.result_ttl:
+                        return False, result
+                    if result is None and expires_at > now and owner != self.owner:
+                        return False, None
+
+                conn.execute("DELETE FROM llm_flights WHERE finished_at < ?", (now - self.result_ttl,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_flights (key, owner, expires_at, result, finished_at) "
+                    "VALUES (?, ?, ?, NULL, NULL)",
+                    (key, self.owner, now + self.lease_seconds),
+                )
+                return True, None
+            finally:
+                conn.execute("COMMIT")
+
+    async def _renew(self, key: str) -> None:
+        """Keep extending the lease until cancelled: an LLM call with retries can outlast any fixed lease"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self._extend, key)
+            except sqlite3.Error as e:
+                print(f"Warning: could not renew single-flight lease: {e}")
+
+    def _extend(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE llm_flights SET expires_at = ? WHERE key = ? AND owner = ? AND result IS NULL",
+                (time.time() + self.lease_seconds, key, self.owner),
+            )
+
+    def _release(self, key: str, result: Optional[str]) -> None:
+        try:
+            with self._connect() as conn:
+                if result is None:
+                    # Failed: let the next waiter take over
+                    conn.execute("DELETE FROM llm_flights WHERE key = ? AND owner = ?", (key, self.owner))
+                else:
+                    conn.execute(
+                        "UPDATE llm_flights SET result = ?, finished_at = ? WHERE key = ? AND owner = ?",
+                        (result, time.time(), key, self.owner),
+                    )
+        except sqlite3.Error as e:
+            print(f"Warning: could not release single-flight lease: {e}")
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Process-wide single-flight group (None when disabled with AI_SINGLE_FLIGHT=0)"""
+    global _single_flight
+    if os.getenv("AI_SINGLE_FLIGHT", "1").lower() in ("0", "false", "no"):
+        return None
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight.from_env()
+    return _single_flight
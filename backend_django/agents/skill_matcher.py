@@ -0,0 +1,203 @@
+from typing import Dict, Callable, Iterable, List, Optional, Tuple
+from collections import Counter
+import os
+import re
+import threading
+import time
+
+# Everything except letters, digits and the "+#" of C++/C#/F# separates words
+_SEPARATORS = re.compile(r"[^\w+#]+")
+_HAS_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_skill(text: str) -> str:
+    """Case- and punctuation-insensitive form used for matching ("Node.js" -> "node js")"""
+    return " ".join(_SEPARATORS.sub(" ", text.casefold().replace("_", " ")).split())
+
+
+def _variants(term: str) -> List[str]:
+    normalized = normalize_skill(term)
+    if not normalized:
+        return []
+    variants = [normalized]
+    # "Node.js" is also written "NodeJS", "CI/CD" also "CICD"
+    if " " in normalized and _HAS_PUNCTUATION.search(term.strip()):
+        variants.append(normalized.replace(" ", ""))
+    return variants
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over a skill vocabulary.
+
+    Terms come from named sources ("skill:3", "job:12") so a single job or
+    skill can be replaced or dropped without rebuilding from the database.
+    Matching runs on normalized text padded with spaces, so only whole
+    words match ("java" doesn't fire inside "javascript").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Trie: goto transitions, failure links and the pattern ending at each node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[Optional[str]] = [None]
+        # Patterns reachable from a node through failure links, filled in by _link()
+        self._outputs: List[Tuple[str, ...]] = [()]
+        self._dirty = False
+
+        self._sources: Dict[str, List[str]] = {}
+        # pattern -> display names referencing it (several sources can share a pattern)
+        self._names: Dict[str, Counter] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def set_source(self, key: str, terms: Iterable[str]) -> None:
+        """Replace the terms contributed by one source"""
+        terms = [str(term).strip() for term in terms if term and str(term).strip()]
+        with self._lock:
+            for term in self._sources.pop(key, []):
+                self._unref(term)
+            if terms:
+                self._sources[key] = terms
+                for term in terms:
+                    self._ref(term)
+
+    def drop_source(self, key: str) -> None:
+        self.set_source(key, [])
+
+    def extract(self, text: str) -> List[str]:
+        """Vocabulary skills mentioned in text, in order of first mention"""
+        haystack = f" {normalize_skill(text)} "
+        found: Dict[str, None] = {}
+        with self._lock:
+            if self._dirty:
+                self._link()
+            goto, fail, outputs = self._goto, self._fail, self._outputs
+            state = 0
+            for ch in haystack:
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+                for pattern in outputs[state]:
+                    found.setdefault(pattern)
+            return [self._names[pattern].most_common(1)[0][0] for pattern in found]
+
+    def _ref(self, term: str) -> None:
+        for pattern in _variants(term):
+            names = self._names.get(pattern)
+            if names is None:
+                names = self._names[pattern] = Counter()
+                self._insert(pattern)
+            names[term] += 1
+
+    def _unref(self, term: str) -> None:
+        for pattern in _variants(term):
+            names = self._names.get(pattern)
+            if names is None:
+                continue
+            names[term] -= 1
+            if names[term] <= 0:
+                del names[term]
+            if not names:
+                del self._names[pattern]
+                self._remove(pattern)
+
+    def _insert(self, pattern: str) -> None:
+        node = 0
+        for ch in f" {pattern} ":
+            child = self._goto[node].get(ch)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][ch] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(None)
+                self._outputs.append(())
+            node = child
+        self._terminal[node] = pattern
+        self._dirty = True
+
+    def _remove(self, pattern: str) -> None:
+        # The trie nodes stay; they are reclaimed on the next full rebuild
+        node = 0
+        for ch in f" {pattern} ":
+            node = self._goto[node][ch]
+        self._terminal[node] = None
+        self._dirty = True
+
+    def _link(self) -> None:
+        """Recompute failure links and outputs breadth-first (cheap: linear in the trie size)"""
+        queue = []
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        self._outputs[0] = ()
+        for node in queue:
+            terminal = self._terminal[node]
+            inherited = self._outputs[self._fail[node]]
+            self._outputs[node] = (terminal,) + inherited if terminal else inherited
+            for ch, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                queue.append(child)
+        self._dirty = False
+
+
+# Where the vocabulary comes from: the Django app registers a loader yielding
+# (source key, terms) pairs from its Skill and Job tables
+_vocabulary_loader: Optional[Callable[[], Iterable[Tuple[str, Iterable[str]]]]] = None
+_matcher: Optional[SkillMatcher] = None
+_loaded_at = 0.0
+_matcher_lock = threading.Lock()
+
+
+def set_vocabulary_loader(loader: Callable[[], Iterable[Tuple[str, Iterable[str]]]]) -> None:
+    global _vocabulary_loader, _matcher
+    _vocabulary_loader = loader
+    # Rebuild from the new source on next use
+    _matcher = None
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """Process-wide matcher, built on first use.
+
+    Changes saved in this process are applied incrementally (see
+    update_skill_source); a full reload every AI_SKILL_VOCABULARY_TTL
+    seconds picks up changes made by other processes.
+    """
+    global _matcher, _loaded_at
+    ttl = float(os.getenv("AI_SKILL_VOCABULARY_TTL", 300))
+    matcher = _matcher
+    if matcher is not None and (ttl <= 0 or time.monotonic() - _loaded_at < ttl):
+        return matcher
+
+    with _matcher_lock:
+        if _matcher is matcher:
+            started = time.perf_counter()
+            fresh = SkillMatcher()
+            if _vocabulary_loader is not None:
+                try:
+                    for key, terms in _vocabulary_loader():
+                        fresh.set_source(key, terms)
+                except Exception as e:
+                    print(f"Warning: could not load the skill vocabulary: {e}")
+                    if matcher is not None:
+                        fresh = matcher
+            print(f"DEBUG: Skill vocabulary loaded ({len(fresh)} patterns) in {(time.perf_counter() - started) * 1000:.0f}ms")
+            _matcher, _loaded_at = fresh, time.monotonic()
+        return _matcher
+
+
+def update_skill_source(key: str, terms: Iterable[str]) -> None:
+    """Apply a saved skill/job to the matcher if it has been built (otherwise the next load sees it)"""
+    if _matcher is not None:
+        _matcher.set_source(key, terms)
+
+
+def drop_skill_source(key: str) -> None:
+    if _matcher is not None:
+        _matcher.drop_source(key)
@@ -0,0 +1,69 @@
+from typing import Dict, Any, Optional
+import asyncio
+import re
+import time
+from .base_agent import BaseAgent
+from .messages import message_payload
+from .pdf_pool import get_pdf_pool
+from .skill_matcher import get_skill_matcher
+
+_YEARS = re.compile(r"\b(\d{1,2})\+?\s*(?:years?|yrs?)\b", re.IGNORECASE)
+
+
+def estimate_years_of_experience(text: str) -> int:
+    """Largest "N years" mentioned in the text (0 when there is none)"""
+    return max((int(years) for years in _YEARS.findall(text) if int(years) <= 50), default=0)
+
+
+def experience_level_for(years: int) -> str:
+    if years < 3:
+        return "Junior"
+    if years < 7:
+        return "Mid-level"
+    return "Senior"
+
+
+class SkillScannerAgent(BaseAgent):
+    """Dictionary-based skill detection, no LLM involved.
+
+    Produces a skills_analysis in the Analyzer's shape within milliseconds,
+    so matching can start before the LLM stages finish. Also hands the
+    extracted resume text on so the PDF is only parsed once.
+    """
+
+    def __init__(self):
+        super().__init__(
+            name="SkillScanner",
+            instructions="Detect known skills in resume text using the skill vocabulary.",
+        )
+
+    async def run(self, messages: list) -> Dict[str, Any]:
+        """Scan the resume for vocabulary skills"""
+        print("⚡ SkillScanner: Scanning resume for known skills")
+        resume_data = message_payload(messages[-1])
+        # The vocabulary load (a DB query) and waiting on the PDF pool are blocking
+        return await asyncio.to_thread(self.scan, resume_data)
+
+    def scan(self, resume_data: Dict[str, Any], raw_text: Optional[str] = None) -> Dict[str, Any]:
+        if raw_text is None:
+            if resume_data.get("file_path"):
+                raw_text = get_pdf_pool().extract_sync(resume_data["file_path"], backend="pdfminer")
+            else:
+                raw_text = resume_data.get("text", "")
+
+        started = time.perf_counter()
+        skills = get_skill_matcher().extract(raw_text)
+        years = estimate_years_of_experience(raw_text)
+        scan_ms = (time.perf_counter() - started) * 1000
+        print(f"⚡ SkillScanner: {len(skills)} skills in {scan_ms:.1f}ms")
+
+        return {
+            "raw_text": raw_text,
+            "skills_analysis": {
+                "technical_skills": skills,
+                "years_of_experience": years,
+                "experience_level": experience_level_for(years),
+            },
+            "scan_ms": round(scan_ms, 2),
+            "source": "dictionary",
+        }
@@ -0,0 +1,78 @@
+from typing import Dict, Any, Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class StageUsage:
+    """LLM usage accumulated while one workflow stage runs"""
+
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Time spent generating vs waiting for a slot (concurrency limit, batch window, a coalesced request)
+    llm_ms: float = 0.0
+    queue_wait_ms: float = 0.0
+    cache_hits: int = 0
+
+    def add(self, prompt_tokens: int = 0, completion_tokens: int = 0, llm_ms: float = 0.0) -> None:
+        self.llm_calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.llm_ms += llm_ms
+
+    @property
+    def cache_hit(self) -> bool:
+        """Every answer this stage needed came from the cache"""
+        return self.cache_hits > 0 and self.llm_calls == 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["llm_ms"] = round(self.llm_ms, 1)
+        data["queue_wait_ms"] = round(self.queue_wait_ms, 1)
+        data["cache_hit"] = self.cache_hit
+        return data
+
+
+# Set per stage by the workflow runner; asyncio tasks and to_thread calls inherit it
+_current_usage: ContextVar[Optional[StageUsage]] = ContextVar("stage_usage", default=None)
+
+
+def current_usage() -> Optional[StageUsage]:
+    return _current_usage.get()
+
+
+@contextmanager
+def track_stage_usage() -> Iterator[StageUsage]:
+    usage = StageUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_llm_call(prompt_tokens: int = 0, completion_tokens: int = 0, llm_ms: float = 0.0) -> None:
+    """Attribute one LLM call to the stage currently running (no-op outside a workflow)"""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(prompt_tokens, completion_tokens, llm_ms)
+
+
+def record_llm_time(llm_ms: float) -> None:
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.llm_ms += llm_ms
+
+
+def record_queue_wait(wait_ms: float) -> None:
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.queue_wait_ms += wait_ms
+
+
+def record_cache_hit() -> None:
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.cache_hits += 1
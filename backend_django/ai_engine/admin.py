@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AIAgent, AILog
+from .models import AIAgent, AILog, AIStageMetric
 
 
 @admin.register(AIAgent)
@@ -8,8 +8,16 @@ class AIAgentAdmin(admin.ModelAdmin):
     search_fields = ('name', 'function')
 
 
+class AIStageMetricInline(admin.TabularInline):
+    model = AIStageMetric
+    extra = 0
+    readonly_fields = ('stage', 'status', 'duration_ms', 'llm_ms', 'queue_wait_ms', 'llm_calls',
+                       'prompt_tokens', 'completion_tokens', 'cache_hit', 'created_at')
+
+
 @admin.register(AILog)
 class AILogAdmin(admin.ModelAdmin):
     list_display = ('action_type', 'agent', 'execution_time_ms', 'created_at')
     search_fields = ('action_type', 'agent__name')
     readonly_fields = ('created_at',)
+    inlines = [AIStageMetricInline]
@@ -1,9 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import time
 from asgiref.sync import sync_to_async
 
-from agents.orchestrator import OrchestratorAgent 
-from .models import AIAgent, AILog
+from agents.progress import ProgressCallback
+from .models import AIAgent, AILog, AIStageMetric
 
 class AgentManager:
     """Central management for interacting with AI agents.
@@ -11,10 +11,15 @@ class AgentManager:
     """
 
     def __init__(self):
+        # Imported here so loading the URLconf (every worker, every management command) stays cheap
+        from agents.orchestrator import OrchestratorAgent
+
         self.orchestrator = OrchestratorAgent()
       
         # record from async code.
         self.agent_record = None
+        # AILog of the most recent run, so callers can attach their own stages
+        self.last_log = None
 
     async def ensure_agent(self):
         """Asynchronously ensure the AIAgent DB record exists and cache it.
@@ -37,13 +42,16 @@ class AgentManager:
         )
         return self.agent_record
 
-    async def analyze_resume(self, resume_text: str) -> Dict[str, Any]:
+    async def analyze_resume(self, resume_text: str, on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Run the workflow on the resume text; on_progress gets an event per completed stage"""
         start_time = time.time()
 
         try:
             
+            # The skill scanner and extractor read the resume from "text" (or "file_path");
+            # under any other key they analyze an empty resume
             result = await self.orchestrator.process_application(
-                {"resume_text": resume_text}
+                {"text": resume_text}, on_progress=on_progress
             )
 
           
@@ -51,12 +59,12 @@ class AgentManager:
                 # best-effort: if ensure_agent wasn't called earlier, create now
                 await self.ensure_agent()
 
-            await sync_to_async(AILog.objects.create, thread_sensitive=True)(
-                agent=self.agent_record,
+            self.last_log = await sync_to_async(self._create_log, thread_sensitive=True)(
                 action_type="ResumeAnalysis",
                 input_data={"resume_text_length": len(resume_text)},
                 output_data=result,
-                execution_time_ms=int((time.time() - start_time) * 1000)
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                stage_timings=result.get("stage_timings"),
             )
 
             return result
@@ -66,13 +74,42 @@ class AgentManager:
             if self.agent_record is None:
                 await self.ensure_agent()
 
-            await sync_to_async(AILog.objects.create, thread_sensitive=True)(
-                agent=self.agent_record,
+            self.last_log = await sync_to_async(self._create_log, thread_sensitive=True)(
                 action_type="ResumeAnalysis_Failed",
                 input_data={
                     "resume_text_length": len(resume_text),
                     "error": str(e)
                 },
-                execution_time_ms=int((time.time() - start_time) * 1000)
+                execution_time_ms=int((time.time() - start_time) * 1000),
+                # Stages that ran before the failure still tell where the time went
+                stage_timings=(self.orchestrator.last_context or {}).get("stage_timings"),
+            )
+            raise RuntimeError(f"AgentManager: {e}")
+
+    def _create_log(self, stage_timings: Optional[Dict[str, Dict[str, Any]]] = None, **fields) -> AILog:
+        """Create the AILog and one AIStageMetric per workflow stage"""
+        log = AILog.objects.create(agent=self.agent_record, **fields)
+        AIStageMetric.objects.bulk_create([
+            AIStageMetric(
+                log=log,
+                stage=stage,
+                status=timing.get("status", "completed"),
+                duration_ms=timing.get("duration_ms", 0),
+                llm_ms=timing.get("llm_ms", 0),
+                queue_wait_ms=timing.get("queue_wait_ms", 0),
+                llm_calls=timing.get("llm_calls", 0),
+                prompt_tokens=timing.get("prompt_tokens", 0),
+                completion_tokens=timing.get("completion_tokens", 0),
+                cache_hit=timing.get("cache_hit", False),
             )
-            raise RuntimeError(f"AgentManager: {e}")
\ No newline at end of file
+            for stage, timing in (stage_timings or {}).items()
+        ])
+        return log
+
+    async def record_stage(self, stage: str, duration_ms: float, status: str = "completed") -> None:
+        """Attach a non-LLM stage (PDF parsing, persistence) to the last run's log"""
+        if self.last_log is None:
+            return
+        await sync_to_async(AIStageMetric.objects.create, thread_sensitive=True)(
+            log=self.last_log, stage=stage, status=status, duration_ms=duration_ms
+        )
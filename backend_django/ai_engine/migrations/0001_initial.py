@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('version', models.CharField(blank=True, max_length=50, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('function', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'AI Agent',
+                'verbose_name_plural': 'AI Agents',
+            },
+        ),
+        migrations.CreateModel(
+            name='AILog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(max_length=100)),
+                ('input_data', models.JSONField(blank=True, null=True)),
+                ('output_data', models.JSONField(blank=True, null=True)),
+                ('execution_time_ms', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('agent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='logs', to='ai_engine.aiagent')),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIStageMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=50)),
+                ('status', models.CharField(default='completed', max_length=20)),
+                ('duration_ms', models.FloatField(default=0)),
+                ('llm_ms', models.FloatField(default=0)),
+                ('queue_wait_ms', models.FloatField(default=0)),
+                ('llm_calls', models.IntegerField(default=0)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('completion_tokens', models.IntegerField(default=0)),
+                ('cache_hit', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stages', to='ai_engine.ailog')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['stage', 'created_at'], name='ai_engine_a_stage_9f7f2c_idx')],
+            },
+        ),
+    ]
@@ -26,4 +26,27 @@ class AILog(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.action_type} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"{self.action_type} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+class AIStageMetric(models.Model):
+    """Timing and LLM usage of one workflow stage of an AI run"""
+    log = models.ForeignKey(AILog, on_delete=models.CASCADE, related_name='stages')
+    stage = models.CharField(max_length=50)  # e.g. 'extraction', 'pdf_extraction', 'persistence'
+    status = models.CharField(max_length=20, default='completed')
+
+    duration_ms = models.FloatField(default=0)
+    llm_ms = models.FloatField(default=0)
+    queue_wait_ms = models.FloatField(default=0)
+    llm_calls = models.IntegerField(default=0)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    cache_hit = models.BooleanField(default=False)
+
+    # Indexed with stage so time-window aggregates stay cheap
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['stage', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.stage} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,1021 @@
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from agents.batching import GenerationBatcher
+from agents.circuit_breaker import CircuitBreaker, get_breaker
+from agents.context_budget import ContextBudgeter, ContextField
+from agents.inference_service import InferenceClient, InferenceServer, InferenceServiceError
+from agents.json_schema import SchemaMatcher, _TokenTable
+from agents.json_stream import IncrementalDetokenizer, json_object_text
+from agents.messages import AgentMessage, message_payload, to_prompt_text
+from agents.llm_cache import LLMCache
+from agents.ollama_client import OllamaClient, OllamaSettings
+from agents.model_registry import LoadedModel, ModelRegistry, get_inference_backend
+from agents.orchestrator import OrchestratorAgent
+from agents.pdf_pool import PdfExtractionPool, PdfPoolBusyError, PdfTimeoutError, _deadline
+from agents.prefix_cache import PrefixKVCache
+from agents.single_flight import SingleFlight
+from agents.skill_matcher import SkillMatcher
+from agents.skill_scanner_agent import SkillScannerAgent
+from agents.telemetry import current_usage, record_cache_hit, record_llm_call, track_stage_usage
+from agents.workflow import StageTimeoutError, WorkflowStage, run_workflow
+from authentication.models import User
+from utils_pdf import extract_text_from_pdf
+from .agent_manager import AgentManager
+from .models import AIAgent, AIStageMetric
+
+
+class SentencePieceStyleTokenizer:
+    """Decodes like the Llama/SentencePiece tokenizers in transformers.
+
+    "▁" marks a word boundary, the space in front of the first piece of a
+    sequence is dropped, and characters outside the vocabulary are spelled
+    as byte-fallback tokens ("<0xC3>") that decode to U+FFFD on their own.
+    """
+
+    SPECIAL = ["<s>", "</s>"]
+
+    def __init__(self, pieces):
+        self.vocab = self.SPECIAL + list(pieces)
+        self.all_special_ids = [0, 1]
+        self.eos_token_id = 1
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def ids(self, *pieces):
+        return [self.vocab.index(piece) for piece in pieces]
+
+    def convert_ids_to_tokens(self, ids):
+        return [self.vocab[i] for i in ids]
+
+    def decode(self, ids, skip_special_tokens=False, clean_up_tokenization_spaces=False):
+        data = b""
+        for piece in self.convert_ids_to_tokens(list(ids)):
+            if piece in self.SPECIAL:
+                if not skip_special_tokens:
+                    data += piece.encode()
+            elif piece.startswith("<0x") and piece.endswith(">"):
+                data += bytes([int(piece[3:-1], 16)])
+            else:
+                data += piece.replace("▁", " ").encode()
+        text = data.decode("utf-8", errors="replace")
+        return text[1:] if text.startswith(" ") else text
+
+
+NAME_PIECES = ['{"', 'name', '":', '▁"', 'John', '▁Smith', '▁Jos', '<0xC3>', '<0xA9>', '"}', '▁trailing']
+
+
+class IncrementalDetokenizerTests(SimpleTestCase):
+    def setUp(self):
+        self.tokenizer = SentencePieceStyleTokenizer(NAME_PIECES)
+
+    def stream(self, *pieces):
+        ids = self.tokenizer.ids(*pieces)
+        detokenizer = IncrementalDetokenizer(self.tokenizer)
+        return [detokenizer.feed(ids[: end + 1]) for end in range(len(ids))]
+
+    def test_keeps_word_boundary_spaces(self):
+        chunks = self.stream('{"', 'name', '":', '▁"', 'John', '▁Smith', '"}')
+        self.assertEqual("".join(chunks), '{"name": "John Smith"}')
+
+    def test_holds_back_split_multibyte_characters(self):
+        chunks = self.stream('▁"', '▁Jos', '<0xC3>', '<0xA9>', '"}')
+        self.assertEqual(chunks[2], "")
+        self.assertEqual("".join(chunks), '" José"}')
+        self.assertNotIn("�", "".join(chunks))
+
+    def test_answer_is_cut_after_the_object(self):
+        ids = self.tokenizer.ids('{"', 'name', '":', '▁"', 'John', '▁Smith', '"}', '▁trailing')
+        text = self.tokenizer.decode(ids, skip_special_tokens=True)
+        self.assertEqual(json_object_text(text), '{"name": "John Smith"}')
+
+
+class TokenTableTests(SimpleTestCase):
+    """Token texts must be what each token adds to a completion, not what it decodes to alone"""
+
+    def setUp(self):
+        self.tokenizer = SentencePieceStyleTokenizer(NAME_PIECES + ['<0x41>', '<0xE2>', '<0x82>', '<0xAC>'])
+        self.texts, self.byte_values = _TokenTable.token_texts(self.tokenizer)
+
+    def text(self, piece):
+        return self.texts[self.tokenizer.ids(piece)[0]]
+
+    def test_keeps_word_boundary_spaces(self):
+        self.assertEqual(self.text('▁Smith'), ' Smith')
+        self.assertEqual(self.text('▁"'), ' "')
+        self.assertEqual(self.text('John'), 'John')
+
+    def test_byte_fallback_tokens(self):
+        self.assertEqual(self.text('<0x41>'), 'A')
+        # Lead bytes stand for the character they start, continuation bytes add nothing
+        self.assertEqual(self.text('<0xC3>'), _TokenTable.OTHER)
+        self.assertEqual(self.text('<0xE2>'), _TokenTable.OTHER)
+        self.assertEqual(self.text('<0xA9>'), '')
+        self.assertEqual(self.byte_values[self.tokenizer.ids('<0xE2>')[0]], 0xE2)
+        self.assertEqual(self.texts[:2], ['', ''])
+
+    def test_schema_accepts_sentencepiece_completion(self):
+        matcher = SchemaMatcher({"type": "object", "properties": {"name": {"type": "string"}}})
+        pieces = ('{"', 'name', '":', '▁"', 'John', '▁Jos', '<0xC3>', '<0xA9>', '"}')
+        state = matcher.feed(matcher.start(), "".join(self.text(piece) for piece in pieces))
+        self.assertIsNotNone(state)
+        self.assertTrue(matcher.is_complete(state))
+
+
+class LLMCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/llm_cache.sqlite3'
+        self.now = 1000.0
+        clock = mock.patch('agents.llm_cache.time.time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = LLMCache(self.path, ttl_seconds=60)
+        cache.put('key', 'answer')
+        self.now += 59
+        self.assertEqual(cache.get('key'), 'answer')
+        self.now += 2
+        self.assertIsNone(cache.get('key'))
+        # Gone from the disk tier too
+        self.assertIsNone(LLMCache(self.path, ttl_seconds=3600).get('key'))
+
+    def test_memory_tier_evicts_least_recently_used_to_disk(self):
+        cache = LLMCache(self.path, max_memory_entries=2)
+        cache.put('a', 'A')
+        cache.put('b', 'B')
+        cache.get('a')
+        cache.put('c', 'C')
+        self.assertEqual(cache.get('b'), 'B')
+        stats = cache.stats()
+        self.assertEqual((stats['memory_hits'], stats['disk_hits'], stats['memory_entries']), (1, 1, 2))
+
+    def test_disk_tier_is_trimmed_by_last_access(self):
+        cache = LLMCache(self.path, max_memory_entries=0, max_disk_bytes=12)
+        for key in ('a', 'b', 'c'):
+            self.now += 1
+            cache.put(key, key * 5)
+        self.now += 1
+        cache.get('a')
+        cache.evict()
+        self.assertEqual([cache.get(key) for key in ('a', 'b', 'c')], ['aaaaa', None, 'ccccc'])
+
+
+class LazyImportTests(SimpleTestCase):
+    HEAVY = ('torch', 'transformers', 'onnxruntime', 'pdfminer', 'PyPDF2', 'httpx')
+
+    def loaded_after(self, code):
+        """Heavy modules loaded by running code in a fresh interpreter"""
+        script = (
+            "import os, sys\n"
+            "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ai_recruiter_django.settings')\n"
+            "import django\n"
+            "django.setup()\n"
+            f"{code}\n"
+            f"print('loaded:' + ','.join(m for m in {self.HEAVY!r} if m in sys.modules))\n"
+        )
+        output = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return output.rsplit('loaded:', 1)[1].strip()
+
+    def test_worker_boot_loads_no_heavy_dependency(self):
+        self.assertEqual(self.loaded_after("from django.urls import get_resolver\nget_resolver().url_patterns"), '')
+
+    def test_building_the_orchestrator_loads_no_heavy_dependency(self):
+        self.assertEqual(self.loaded_after("from agents import OrchestratorAgent\nOrchestratorAgent()"), '')
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def test_concurrent_first_requests_share_one_load(self):
+        registry = ModelRegistry()
+        loads = []
+
+        def load(path):
+            loads.append(path)
+            time.sleep(0.05)
+            return LoadedModel(path, tokenizer=None, model=object(), load_seconds=0.05,
+                               weights_bytes=0, rss_delta_bytes=0)
+
+        results = []
+        with mock.patch.object(registry, '_load', side_effect=load):
+            workers = [threading.Thread(target=lambda: results.append(registry.get('/models/a'))) for _ in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            registry.get('/models/b')
+
+        self.assertEqual(sorted(loads), ['/models/a', '/models/b'])
+        self.assertEqual(len({id(loaded.model) for loaded in results}), 1)
+        self.assertEqual(registry.loaded_paths(), ['/models/a', '/models/b'])
+
+    def test_missing_model_is_looked_for_once(self):
+        registry = ModelRegistry()
+        with mock.patch('agents.model_registry.print', create=True) as warn:
+            self.assertIsNone(registry.get('/does/not/exist'))
+            self.assertIsNone(registry.get('/does/not/exist'))
+        warn.assert_called_once()
+        self.assertFalse(registry.is_loaded('/does/not/exist'))
+
+
+class InferenceBackendTests(SimpleTestCase):
+    def test_onnx_backend_loads_the_int8_export(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        os.mkdir(f'{directory}/model-onnx-int8')
+        registry = ModelRegistry()
+        fake = (None, object(), 1024)
+        with mock.patch.dict(os.environ, {'AI_INFERENCE_BACKEND': 'onnx'}), \
+                mock.patch.object(registry, '_load_onnx', return_value=fake) as load_onnx, \
+                mock.patch.object(registry, '_load_torch') as load_torch, \
+                mock.patch('agents.model_registry.print', create=True):
+            loaded = registry.get(f'{directory}/model/')
+
+        load_onnx.assert_called_once_with(f'{directory}/model-onnx-int8')
+        load_torch.assert_not_called()
+        self.assertEqual((loaded.backend, loaded.path), ('onnx', f'{directory}/model/'))
+
+    def test_unknown_backend_is_rejected(self):
+        with mock.patch.dict(os.environ, {'AI_INFERENCE_BACKEND': 'tensorrt'}):
+            with self.assertRaises(ValueError):
+                get_inference_backend()
+
+    def test_onnx_models_skip_the_prefix_cache(self):
+        loaded = LoadedModel('fake-model', tokenizer=None, model=None, load_seconds=0,
+                             weights_bytes=0, rss_delta_bytes=0, backend='onnx')
+        with mock.patch.object(GenerationBatcher, '_run', return_value=None):
+            self.assertIsNone(GenerationBatcher(loaded).prefix_cache)
+
+
+class GenerationBatcherTests(SimpleTestCase):
+    """Batch collection, with the generate() call replaced (it needs torch)"""
+
+    def setUp(self):
+        self.batches = []
+
+        def run_batch(batcher, batch):
+            self.batches.append([request.input_ids[0] for request in batch])
+            for request in batch:
+                request.future.set_result(f'answer {request.input_ids[0]}')
+
+        patcher = mock.patch.object(GenerationBatcher, '_run_batch', run_batch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def batcher(self, **kwargs):
+        loaded = LoadedModel('fake-model', tokenizer=None, model=None, load_seconds=0,
+                             weights_bytes=0, rss_delta_bytes=0, backend='onnx')
+        return GenerationBatcher(loaded, **kwargs)
+
+    def test_concurrent_requests_share_one_batch(self):
+        batcher = self.batcher(max_batch_size=3, max_wait_ms=5000)
+        futures = [batcher.submit([n], {'max_new_tokens': 8}) for n in range(3)]
+        self.assertEqual([f.result(timeout=5) for f in futures], ['answer 0', 'answer 1', 'answer 2'])
+        self.assertEqual(self.batches, [[0, 1, 2]])
+
+    def test_different_settings_are_held_for_a_later_batch(self):
+        # (The held request then waits out its own window)
+        batcher = self.batcher(max_batch_size=2, max_wait_ms=200)
+        futures = [
+            batcher.submit([0], {'temperature': 0}),
+            batcher.submit([1], {'temperature': 0.7}),
+            batcher.submit([2], {'temperature': 0}),
+        ]
+        futures[0].result(timeout=5)
+        self.assertEqual(futures[1].result(timeout=5), 'answer 1')
+        self.assertEqual(self.batches, [[0, 2], [1]])
+
+    def test_window_closes_a_partial_batch(self):
+        batcher = self.batcher(max_batch_size=8, max_wait_ms=20)
+        self.assertEqual(batcher.generate([0], {}), 'answer 0')
+        self.assertEqual(self.batches, [[0]])
+
+
+class _FakeKVCache:
+    def __init__(self, prefix_ids):
+        self.rows = [list(prefix_ids)]
+
+    def batch_repeat_interleave(self, repeats):
+        self.rows = [row for row in self.rows for _ in range(repeats)]
+
+
+class PrefixKVCacheTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(PrefixKVCache, '_compute', side_effect=lambda model, ids: _FakeKVCache(ids))
+        self.compute = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_prefix_is_computed_once_and_copied_per_call(self):
+        cache = PrefixKVCache()
+        first = cache.get(None, [1, 2, 3])
+        first.rows[0].append(4)
+        second = cache.get(None, [1, 2, 3], batch_size=2)
+        self.assertEqual(second.rows, [[1, 2, 3], [1, 2, 3]])
+        self.assertEqual(self.compute.call_count, 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'prefix_tokens_reused': 6, 'entries': 1})
+
+    def test_least_recently_used_prefix_is_evicted(self):
+        cache = PrefixKVCache(max_entries=2)
+        for prefix in ([1], [2], [1], [3], [1], [2]):
+            cache.get(None, prefix)
+        # [2] was evicted by [3] and had to be computed again
+        self.assertEqual([call.args[1] for call in self.compute.call_args_list], [[1], [2], [3], [2]])
+
+
+class RunWorkflowTests(SimpleTestCase):
+    def test_independent_stages_overlap_and_see_only_their_inputs(self):
+        seen = {}
+        both_started = asyncio.Event()
+        started = []
+
+        def stage(name, *depends_on):
+            async def run(stage_input):
+                seen[name] = sorted(stage_input)
+                if not depends_on:
+                    started.append(name)
+                    if len(started) == 2:
+                        both_started.set()
+                    # Only finishes if the other root stage runs at the same time
+                    await asyncio.wait_for(both_started.wait(), timeout=1)
+                return name.upper()
+            return WorkflowStage(name, f'{name}_out', run, depends_on)
+
+        stages = [stage('a'), stage('b'), stage('c', 'a'), stage('d', 'c', 'b')]
+        context = asyncio.run(run_workflow(stages, {'text': 'resume', 'other': 1}, base_keys=['text']))
+
+        self.assertEqual(seen, {'a': ['text'], 'b': ['text'], 'c': ['a_out', 'text'],
+                                'd': ['a_out', 'b_out', 'c_out', 'text']})
+        self.assertEqual(context['d_out'], 'D')
+        self.assertEqual({t['status'] for t in context['stage_timings'].values()}, {'completed'})
+
+    def test_timeout_cancels_the_stages_still_running(self):
+        cancelled = []
+
+        async def slow(stage_input):
+            await asyncio.sleep(5)
+
+        async def waiting(stage_input):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append('sibling')
+                raise
+
+        context = {}
+        stages = [WorkflowStage('slow', 'slow_out', slow, timeout=0.05),
+                  WorkflowStage('sibling', 'sibling_out', waiting),
+                  WorkflowStage('after', 'after_out', waiting, depends_on=('slow',))]
+        with self.assertRaises(StageTimeoutError):
+            asyncio.run(run_workflow(stages, context))
+
+        self.assertEqual(cancelled, ['sibling'])
+        self.assertEqual(context['failed_stage'], 'slow')
+        self.assertEqual(context['stage_timings']['slow']['status'], 'failed')
+        self.assertEqual(context['stage_timings']['sibling']['status'], 'cancelled')
+        self.assertNotIn('after', context['stage_timings'])
+
+    def test_cancelling_the_workflow_cancels_its_stages(self):
+        cancelled = asyncio.Event()
+
+        async def waiting(stage_input):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def main():
+            workflow = asyncio.create_task(run_workflow([WorkflowStage('wait', 'out', waiting)], {}))
+            await asyncio.sleep(0.01)
+            workflow.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await workflow
+            return cancelled.is_set()
+
+        self.assertTrue(asyncio.run(main()))
+
+    def test_llm_usage_is_attributed_to_the_stage_that_made_the_calls(self):
+        async def extract(stage_input):
+            record_llm_call(prompt_tokens=100, completion_tokens=20, llm_ms=50)
+            # Calls made from worker threads count too
+            await asyncio.to_thread(record_llm_call, 10, 5, 5)
+            return {}
+
+        async def analyze(stage_input):
+            record_cache_hit()
+            return {}
+
+        context = asyncio.run(run_workflow([WorkflowStage('extraction', 'extracted', extract),
+                                            WorkflowStage('analysis', 'analyzed', analyze)], {}))
+        extraction, analysis = context['stage_timings']['extraction'], context['stage_timings']['analysis']
+        self.assertEqual((extraction['llm_calls'], extraction['prompt_tokens'], extraction['completion_tokens'],
+                          extraction['llm_ms']), (2, 110, 25, 55.0))
+        self.assertEqual((analysis['llm_calls'], analysis['cache_hit']), (0, True))
+
+    def test_unknown_dependency_is_rejected(self):
+        async def run(stage_input):
+            return None
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run_workflow([WorkflowStage('a', 'a_out', run, depends_on=('missing',))], {}))
+
+
+class AgentMessageTests(SimpleTestCase):
+    def test_payload_is_passed_through_without_serializing(self):
+        payload = {'skills': ['Python'], 'years': 5}
+        message = AgentMessage(payload)
+        self.assertIs(message_payload(message), payload)
+        self.assertIsNone(message._content)
+        self.assertEqual(message['content'], '{"skills": ["Python"], "years": 5}')
+        self.assertEqual(message.get('role'), 'user')
+
+    def test_text_messages_from_older_callers_are_parsed_not_evaluated(self):
+        self.assertEqual(message_payload({'role': 'user', 'content': '{"skills": ["SQL"]}'}), {'skills': ['SQL']})
+        self.assertEqual(message_payload({'role': 'user', 'content': "{'skills': ['SQL'], 'ok': True}"}),
+                         {'skills': ['SQL'], 'ok': True})
+        code = "__import__('os').getcwd()"
+        self.assertEqual(message_payload({'role': 'user', 'content': code}), code)
+
+    def test_strings_are_sent_to_prompts_as_is(self):
+        self.assertEqual(to_prompt_text('plain resume text'), 'plain resume text')
+        self.assertEqual(to_prompt_text({'name': 'José'}), '{"name": "José"}')
+
+
+class ContextBudgeterTests(SimpleTestCase):
+    CONTEXT = {
+        'candidate': {'name': 'Jane Doe', 'summary': 'x' * 2000},
+        'skills': [f'skill{n}' for n in range(40)],
+        'job': {'title': 'Engineer'},
+    }
+
+    def setUp(self):
+        # One token per character
+        patcher = mock.patch('agents.context_budget.count_tokens', side_effect=len)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fields_that_fit_are_kept_whole(self):
+        budgeter = ContextBudgeter([ContextField(('job', 'title')), ContextField(('missing',))], max_tokens=1000)
+        trimmed, tokens = budgeter.build(self.CONTEXT)
+        self.assertEqual(trimmed, {'job': {'title': 'Engineer'}})
+        self.assertEqual(tokens, len(to_prompt_text(trimmed)))
+
+    def test_lists_are_halved_and_long_text_dropped_to_fit(self):
+        budgeter = ContextBudgeter([
+            ContextField(('job', 'title'), priority=3),
+            ContextField(('candidate', 'summary'), priority=2, max_chars=1000),
+            ContextField(('skills',), priority=1),
+            ContextField(('candidate', 'name')),
+        ], max_tokens=300)
+        trimmed, tokens = budgeter.build(self.CONTEXT)
+
+        self.assertEqual(trimmed['skills'], self.CONTEXT['skills'][:20])
+        # Even cut to its 200-character minimum the summary doesn't fit after the skills
+        self.assertNotIn('summary', trimmed['candidate'])
+        self.assertEqual(trimmed['job'], {'title': 'Engineer'})
+        self.assertLessEqual(tokens, 300)
+
+    def test_dropped_field_leaves_no_empty_parent(self):
+        budgeter = ContextBudgeter([ContextField(('candidate', 'name')), ContextField(('job', 'title'), priority=1)],
+                                   max_tokens=40)
+        trimmed, _ = budgeter.build(self.CONTEXT)
+        self.assertEqual(trimmed, {'candidate': {'name': 'Jane Doe'}})
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 100.0
+        for patcher in (mock.patch('agents.circuit_breaker.time.monotonic', side_effect=lambda: self.now),
+                        mock.patch('agents.circuit_breaker.print', create=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=30)
+
+    def open_breaker(self):
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.breaker.record_failure(ConnectionError('refused'))
+
+    def test_consecutive_failures_open_it(self):
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.breaker.record_success()
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        snapshot = self.breaker.snapshot()
+        self.assertEqual((snapshot['rejected'], snapshot['opened'], snapshot['last_error']), (1, 1, 'refused'))
+        self.assertEqual(snapshot['retry_in_seconds'], 30)
+
+    def test_half_open_lets_one_trial_through_and_success_closes(self):
+        self.open_breaker()
+        self.now += 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_trial_reopens_and_released_trial_frees_the_slot(self):
+        self.open_breaker()
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure(TimeoutError('slow'))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.snapshot()['opened'], 2)
+
+    def test_trip_opens_it_right_away(self):
+        self.breaker.trip(ConnectionError('probe failed'))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.snapshot()['last_error'], 'probe failed')
+
+
+class SkillMatcherTests(SimpleTestCase):
+    def test_matches_whole_words_in_order_of_first_mention(self):
+        matcher = SkillMatcher()
+        matcher.set_source('skill:1', ['Java', 'JavaScript', 'C++', 'C#', 'Go', 'Machine Learning', 'Learning'])
+        self.assertEqual(
+            matcher.extract('Some javascript, then C# and c++ for machine-learning. Going on.'),
+            ['JavaScript', 'C#', 'C++', 'Machine Learning', 'Learning'],
+        )
+
+    def test_punctuated_terms_match_their_joined_spelling(self):
+        matcher = SkillMatcher()
+        matcher.set_source('skill:1', ['Node.js', 'CI/CD'])
+        self.assertEqual(matcher.extract('NodeJS services with CICD'), ['Node.js', 'CI/CD'])
+        self.assertEqual(matcher.extract('node js, ci cd'), ['Node.js', 'CI/CD'])
+
+    def test_sources_are_replaced_and_dropped_independently(self):
+        matcher = SkillMatcher()
+        matcher.set_source('job:1', ['Python', 'Django'])
+        matcher.set_source('job:2', ['Python'])
+        matcher.set_source('job:1', ['Flask'])
+        self.assertEqual(matcher.extract('Python, Django and Flask'), ['Python', 'Flask'])
+        matcher.drop_source('job:2')
+        self.assertEqual(matcher.extract('Python, Django and Flask'), ['Flask'])
+        self.assertEqual(len(matcher), 1)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_request(self):
+        async def scenario():
+            flights = SingleFlight()
+            calls = []
+
+            async def generate():
+                calls.append(1)
+                await asyncio.sleep(0.05)
+                return "answer"
+
+            results = await asyncio.gather(*(flights.do("key", generate) for _ in range(4)))
+            return calls, results, flights.stats()
+
+        calls, results, stats = asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [("answer", False)] + [("answer", True)] * 3)
+        self.assertEqual((stats["leaders"], stats["coalesced"], stats["in_flight"]), (1, 3, 0))
+
+    def test_cancelled_waiter_leaves_the_others_their_result(self):
+        async def scenario():
+            flights = SingleFlight()
+            release = asyncio.Event()
+
+            async def generate():
+                await release.wait()
+                return "answer"
+
+            leader = asyncio.create_task(flights.do("key", generate))
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(flights.do("key", generate)) for _ in range(3)]
+            await asyncio.sleep(0)
+            # A stage deadline or a disconnected client
+            waiters[0].cancel()
+            await asyncio.sleep(0)
+            release.set()
+            return await leader, await asyncio.gather(*waiters[1:]), waiters[0].cancelled()
+
+        leader, others, cancelled = asyncio.run(scenario())
+        self.assertEqual(leader, ("answer", False))
+        self.assertEqual(others, [("answer", True), ("answer", True)])
+        self.assertTrue(cancelled)
+
+    def test_failed_leader_fails_its_waiters(self):
+        async def scenario():
+            flights = SingleFlight()
+
+            async def generate():
+                await asyncio.sleep(0.01)
+                raise RuntimeError("upstream down")
+
+            return await asyncio.gather(*(flights.do("key", generate) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate and records the client port of every request"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.client_ports.append(self.client_address[1])
+        body = json.dumps({"response": "{}", "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OllamaClientPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaHandler)
+        self.server.daemon_threads = True
+        self.server.client_ports = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        self.client = OllamaClient(OllamaSettings(host=f"http://{host}:{port}", max_retries=0))
+
+    def test_requests_on_one_loop_share_a_connection(self):
+        async def scenario():
+            await self.client.generate("first")
+            await self.client.generate("second")
+
+        asyncio.run(scenario())
+        self.assertEqual(len(self.server.client_ports), 2)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    def test_pool_is_closed_when_its_loop_ends(self):
+        async def scenario():
+            await self.client.generate("prompt")
+            return next(iter(self.client._states.values())).client
+
+        pool = asyncio.run(scenario())
+        self.assertTrue(pool.is_closed)
+        self.assertEqual(len(self.client._states), 0)
+
+
+class LLMHealthViewTests(TestCase):
+    def setUp(self):
+        get_breaker("health-test").record_failure(RuntimeError("connect to 10.0.0.7:11434 refused"))
+        service = mock.Mock()
+        service.health.return_value = {"status": "ok", "pid": 4242, "memory": {"rss_mb": 900}}
+        service.metrics.return_value = {"requests": 1}
+        patcher = mock.patch("ai_engine.views.get_inference_client", return_value=service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def test_anonymous_callers_only_see_states(self):
+        response = self.client.get("/ai/llm-health/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["backends"]["health-test"], {"state": "closed"})
+        self.assertEqual(response.data["inference_service"], {"status": "ok"})
+        self.assertNotIn("10.0.0.7", json.dumps(response.data))
+
+    def test_admins_see_errors_and_process_details(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+        response = self.client.get("/ai/llm-health/")
+        self.assertIn("10.0.0.7", response.data["backends"]["health-test"]["last_error"])
+        self.assertEqual(response.data["inference_service"]["health"]["pid"], 4242)
+
+
+# Transactional: the run log is written from sync_to_async's thread
+class StreamApplicationTests(SimpleTestCase):
+    """OrchestratorAgent.stream_application with the agent stages replaced"""
+
+    def stream(self, stages, take=None):
+        async def collect():
+            orchestrator = OrchestratorAgent()
+            events = []
+            with mock.patch.object(orchestrator, '_build_workflow', return_value=stages):
+                stream = orchestrator.stream_application({'text': 'resume'})
+                async for event in stream:
+                    events.append(event)
+                    if len(events) == take:
+                        await stream.aclose()
+                        break
+            return events
+
+        return asyncio.run(collect())
+
+    def test_stage_events_then_the_result(self):
+        async def scan(inputs):
+            return {'skills': ['Python']}
+
+        async def analyze(inputs):
+            return {'score': inputs['skill_scan']['skills']}
+
+        events = self.stream([WorkflowStage('scan', 'skill_scan', scan),
+                              WorkflowStage('analysis', 'analysis_results', analyze, ('scan',))])
+        self.assertEqual([(e['event'], e.get('stage')) for e in events],
+                         [('stage', 'scan'), ('stage', 'analysis'), ('complete', None)])
+        self.assertEqual((events[1]['completed'], events[1]['total']), (2, 2))
+        self.assertEqual(events[-1]['result']['analysis_results'], {'score': ['Python']})
+
+    def test_failed_stage_ends_the_stream_with_an_error(self):
+        async def broken(inputs):
+            raise RuntimeError('model crashed')
+
+        events = self.stream([WorkflowStage('analysis', 'analysis_results', broken)])
+        self.assertEqual(events, [{'event': 'error', 'error': 'model crashed', 'failed_stage': 'analysis'}])
+
+    def test_closing_the_stream_cancels_running_stages(self):
+        cancelled = []
+
+        async def quick(inputs):
+            return {}
+
+        async def slow(inputs):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append('slow')
+                raise
+
+        events = self.stream([WorkflowStage('quick', 'quick_out', quick), WorkflowStage('slow', 'slow_out', slow)],
+                             take=1)
+        self.assertEqual([e['stage'] for e in events], ['quick'])
+        self.assertEqual(cancelled, ['slow'])
+
+
+class AgentManagerTests(TransactionTestCase):
+    def test_resume_text_reaches_the_workflow_as_text(self):
+        # The skill scanner and extractor read "text"; under the old "resume_text" key they saw an empty resume
+        workflow = mock.AsyncMock(return_value={"stage_timings": {}})
+        with mock.patch.object(OrchestratorAgent, "process_application", new=workflow):
+            manager = AgentManager()
+            asyncio.run(manager.analyze_resume("Jane Doe\nPython, Django"))
+
+        resume_data = workflow.call_args.args[0]
+        self.assertEqual(resume_data, {"text": "Jane Doe\nPython, Django"})
+        self.assertEqual(SkillScannerAgent().scan(resume_data)["raw_text"], "Jane Doe\nPython, Django")
+        self.assertEqual(manager.last_log.action_type, "ResumeAnalysis")
+
+
+    def test_failed_run_keeps_the_stages_that_ran(self):
+        async def scan(inputs):
+            record_llm_call(prompt_tokens=30, completion_tokens=10)
+            return {"raw_text": inputs["resume_data"]["text"]}
+
+        async def broken(inputs):
+            raise RuntimeError("model crashed")
+
+        stages = [WorkflowStage("skill_scan", "skill_scan", scan),
+                  WorkflowStage("extraction", "extracted_data", broken, ("skill_scan",))]
+        with mock.patch.object(OrchestratorAgent, "_build_workflow", return_value=stages):
+            manager = AgentManager()
+            with self.assertRaises(RuntimeError):
+                asyncio.run(manager.analyze_resume("Jane Doe"))
+
+        self.assertEqual(manager.last_log.action_type, "ResumeAnalysis_Failed")
+        metrics = {m.stage: m for m in AIStageMetric.objects.filter(log=manager.last_log)}
+        self.assertEqual({stage: m.status for stage, m in metrics.items()},
+                         {"skill_scan": "completed", "extraction": "failed"})
+        self.assertEqual((metrics["skill_scan"].prompt_tokens, metrics["skill_scan"].completion_tokens), (30, 10))
+
+
+class StageMetricsViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        manager = AgentManager()
+        manager.agent_record = AIAgent.objects.create(name="Orchestrator", function="orchestrator")
+        log = manager._create_log(action_type="ResumeAnalysis", stage_timings={
+            "extraction": {"duration_ms": 100, "llm_ms": 80, "prompt_tokens": 300},
+        })
+        for duration in (200, 300, 1000):
+            AIStageMetric.objects.create(log=log, stage="analysis", duration_ms=duration, cache_hit=duration == 200)
+
+    def test_admins_get_percentiles_per_stage(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+        stages = self.client.get("/ai/metrics/stages/", {"hours": 1}).data["stages"]
+        self.assertEqual(stages["analysis"]["runs"], 3)
+        self.assertEqual(stages["analysis"]["duration_ms"], {"p50": 300.0, "p95": 1000.0})
+        self.assertEqual(stages["analysis"]["cache_hit_rate"], 0.333)
+        self.assertEqual(stages["extraction"]["avg_prompt_tokens"], 300.0)
+
+    def test_other_users_are_refused(self):
+        user = User.objects.create_user(username="sam", email="sam@example.com", password="x")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get("/ai/metrics/stages/").status_code, 403)
+
+
+def _failed_future(error):
+    future = Future()
+    future.set_exception(error)
+    return future
+
+
+class PdfExtractionPoolTests(SimpleTestCase):
+    def test_deadline_interrupts_a_long_parse(self):
+        with self.assertRaises(PdfTimeoutError):
+            with _deadline(0.05):
+                time.sleep(1)
+
+    def test_timeouts_are_counted_apart_from_parse_errors(self):
+        pool = PdfExtractionPool(in_process=True)
+        with mock.patch.object(pool, '_submit', return_value=_failed_future(PdfTimeoutError('too slow'))):
+            with self.assertRaises(PdfTimeoutError):
+                pool.extract_sync(b'%PDF')
+        with mock.patch.object(pool, '_submit', return_value=_failed_future(ValueError('not a PDF'))):
+            with self.assertRaises(ValueError):
+                pool.extract_sync(b'junk')
+        stats = pool.snapshot()
+        self.assertEqual((stats['failed'], stats['timeouts']), (2, 1))
+
+    def test_full_queue_rejects_instead_of_waiting(self):
+        pool = PdfExtractionPool(max_workers=1, queue_depth=1, in_process=True)
+        parsing = Future()
+
+        async def main():
+            with mock.patch.object(pool, '_submit', return_value=parsing):
+                first = asyncio.create_task(pool.extract(b'%PDF'))
+                await asyncio.sleep(0)
+                with self.assertRaises(PdfPoolBusyError):
+                    await pool.extract(b'%PDF')
+                parsing.set_result('text')
+                return await first
+
+        self.assertEqual(asyncio.run(main()), 'text')
+        stats = pool.snapshot()
+        self.assertEqual((stats['completed'], stats['rejected'], stats['in_flight']), (1, 1, 0))
+
+    def test_unreadable_pdf_is_logged_and_gives_no_text(self):
+        pool = PdfExtractionPool(in_process=True)
+        with mock.patch('agents.pdf_pool.get_pdf_pool', return_value=pool), \
+                mock.patch.object(pool, '_submit', return_value=_failed_future(ValueError('not a PDF'))), \
+                self.assertLogs('utils_pdf', 'WARNING') as logs:
+            self.assertEqual(asyncio.run(extract_text_from_pdf(b'junk')), '')
+        self.assertIn('not a PDF', logs.output[0])
+
+
+class _FakeBatcher:
+    """Answers at once, or holds answers until release() when hold is set"""
+
+    def __init__(self, hold=False):
+        self.hold = hold
+        self.held = []
+
+    def submit(self, input_ids, params, prefix_ids=None, on_partial=None, **kwargs):
+        current_usage().add(len(prefix_ids) + len(input_ids), 3, 12.0)
+        if on_partial is not None:
+            on_partial('{"skills"')
+        future = Future()
+        if self.hold:
+            self.held.append(future)
+        else:
+            future.set_result('{"skills": []}')
+        return future
+
+    def release(self):
+        for future in self.held:
+            future.set_result('{"skills": []}')
+
+
+class InferenceServiceTests(SimpleTestCase):
+    """Client and server over a real Unix socket; only tokenizing and generating are faked"""
+
+    def start_server(self, batcher, max_queue=8):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        socket_path = os.path.join(directory, 'inference.sock')
+        prepared = None if batcher is None else (batcher, [1, 2], [3])
+        patcher = mock.patch.object(InferenceServer, '_prepare', return_value=prepared)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        loop = asyncio.new_event_loop()
+        server = InferenceServer(socket_path, max_queue=max_queue)
+        with mock.patch('agents.inference_service.print', create=True):
+            serving = loop.create_task(server.serve())
+
+            async def run():
+                # Stopped by cancelling it
+                await asyncio.gather(serving, return_exceptions=True)
+
+            thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+            thread.start()
+            for _ in range(100):
+                if os.path.exists(socket_path):
+                    break
+                time.sleep(0.01)
+
+        def stop():
+            loop.call_soon_threadsafe(serving.cancel)
+            thread.join(5)
+            loop.close()
+        self.addCleanup(stop)
+        return InferenceClient(socket_path, timeout=5), server
+
+    def test_generation_streams_partials_and_reports_usage_to_the_caller(self):
+        client, server = self.start_server(_FakeBatcher())
+        partials = []
+        with track_stage_usage() as usage:
+            response = client.generate('/models/a', 'Extract skills', 'resume', {'max_new_tokens': 8},
+                                       on_partial=partials.append)
+        self.assertEqual(response, '{"skills": []}')
+        self.assertEqual(partials, ['{"skills"'])
+        self.assertEqual((usage.llm_calls, usage.prompt_tokens, usage.completion_tokens), (1, 3, 3))
+        self.assertEqual(client.metrics()['completed'], 1)
+        self.assertEqual(client.health()['status'], 'ok')
+
+    def test_requests_beyond_max_queue_are_refused(self):
+        batcher = _FakeBatcher(hold=True)
+        client, server = self.start_server(batcher, max_queue=1)
+        first = threading.Thread(target=client.generate, args=('/models/a', '', 'one', {}))
+        first.start()
+        for _ in range(100):
+            if batcher.held:
+                break
+            time.sleep(0.01)
+        with self.assertRaisesRegex(InferenceServiceError, 'Busy'):
+            client.generate('/models/a', '', 'two', {})
+        batcher.release()
+        first.join(5)
+        self.assertEqual(client.metrics()['rejected'], 1)
+
+    def test_missing_model_is_an_error_not_an_answer(self):
+        client, server = self.start_server(None)
+        with self.assertRaisesRegex(InferenceServiceError, 'Model not loaded'):
+            client.generate('/models/missing', '', 'resume', {})
+
+    def test_unreachable_service_raises(self):
+        with self.assertRaisesRegex(InferenceServiceError, 'unavailable'):
+            InferenceClient('/nonexistent/inference.sock').health()
+
+
+class BenchmarkToolsTests(SimpleTestCase):
+    """The benchmark tools under tools/ at the repository root, run as they are from the command line"""
+
+    REPO_ROOT = os.path.dirname(settings.BASE_DIR)
+
+    def run_python(self, *args):
+        process = subprocess.run([sys.executable, *args], cwd=self.REPO_ROOT, capture_output=True, text=True,
+                                 timeout=120)
+        self.assertEqual(process.returncode, 0, process.stderr)
+        return process.stdout
+
+    def test_fake_ollama_answers_each_agent_deterministically(self):
+        script = """
+import json, urllib.error, urllib.request
+from tools.fake_ollama import start_fake_ollama
+
+def generate(server, prompt):
+    body = json.dumps({"model": "llama3.1", "prompt": prompt, "stream": False}).encode()
+    try:
+        with urllib.request.urlopen(server.url + "/api/generate", body) as response:
+            return json.loads(json.loads(response.read())["response"])
+    except urllib.error.HTTPError as e:
+        return e.code
+
+server = start_fake_ollama("instant")
+prompt = "Extract and structure information from resumes. Python and Docker, 5 years"
+failing = start_fake_ollama("instant", error_rate=1.0)
+print(json.dumps([generate(server, prompt), generate(server, prompt), generate(failing, prompt)]))
+"""
+        first, second, failed = json.loads(self.run_python('-c', script).strip().splitlines()[-1])
+        self.assertEqual(first, second)
+        self.assertEqual(first['skills'], ['Python', 'Docker'])
+        self.assertEqual(failed, 500)
+
+    def test_pipeline_benchmark_runs_end_to_end(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, 'bench.json')
+        self.run_python('-m', 'tools.bench_pipeline', '--profile', 'instant', '--synthetic', '2', '--concurrency', '1',
+                        '--warmup', '0', '--skip-micro', '--resumes-dir', directory, '--output', output)
+
+        with open(output) as f:
+            level, = json.load(f)['levels']
+        self.assertEqual((level['documents'], level['failures']), (2, 0))
+        self.assertEqual(set(level['stages_ms']), {'pdf_extraction', 'skill_scan', 'extraction', 'analysis',
+                                                   'matching', 'screening', 'recommendation'})
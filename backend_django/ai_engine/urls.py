@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import LLMHealthView, StageMetricsView
+
+urlpatterns = [
+    path('llm-health/', LLMHealthView.as_view(), name='llm-health'),
+    path('metrics/stages/', StageMetricsView.as_view(), name='stage-metrics'),
+]
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from agents.circuit_breaker import breaker_report
+from agents.inference_service import InferenceServiceError, get_inference_client
+from .models import AIStageMetric
+
+
+class LLMHealthView(APIView):
+    """Circuit breaker state of the LLM backends in this worker, plus the shared inference service if used.
+
+    Anyone (load balancers, uptime checks) gets the states; error messages,
+    counters and the service's process details only go to admins.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        detailed = bool(request.user and request.user.is_staff)
+        report = breaker_report(detailed)
+        service = get_inference_client()
+        if service is not None:
+            try:
+                health = service.health()
+                report["inference_service"] = (
+                    {"health": health, "metrics": service.metrics()} if detailed else {"status": health["status"]}
+                )
+            except InferenceServiceError as e:
+                report["inference_service"] = {"status": "unavailable"}
+                if detailed:
+                    report["inference_service"]["error"] = str(e)
+        return Response(report)
+
+
+def _percentile(ordered, p):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 1)
+
+
+class StageMetricsView(APIView):
+    """p50/p95 per workflow stage over the last ?hours= (default 24)"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            hours = float(request.query_params.get('hours', 24))
+        except ValueError:
+            return Response({"error": "hours must be a number"}, status=400)
+        since = timezone.now() - timedelta(hours=hours)
+
+        rows = AIStageMetric.objects.filter(created_at__gte=since).values_list(
+            'stage', 'status', 'duration_ms', 'llm_ms', 'queue_wait_ms',
+            'prompt_tokens', 'completion_tokens', 'cache_hit'
+        )
+        by_stage = {}
+        for stage, status, duration, llm, wait, prompt, completion, cache_hit in rows:
+            by_stage.setdefault(stage, []).append((status, duration, llm, wait, prompt, completion, cache_hit))
+
+        stages = {}
+        for stage, samples in by_stage.items():
+            durations = sorted(s[1] for s in samples)
+            llm = sorted(s[2] for s in samples)
+            waits = sorted(s[3] for s in samples)
+            stages[stage] = {
+                "runs": len(samples),
+                "failed": sum(1 for s in samples if s[0] != 'completed'),
+                "duration_ms": {"p50": _percentile(durations, 50), "p95": _percentile(durations, 95)},
+                "llm_ms": {"p50": _percentile(llm, 50), "p95": _percentile(llm, 95)},
+                "queue_wait_ms": {"p50": _percentile(waits, 50), "p95": _percentile(waits, 95)},
+                "avg_prompt_tokens": round(sum(s[4] for s in samples) / len(samples), 1),
+                "avg_completion_tokens": round(sum(s[5] for s in samples) / len(samples), 1),
+                "cache_hit_rate": round(sum(1 for s in samples if s[6]) / len(samples), 3),
+            }
+
+        return Response({"since": since, "hours": hours, "stages": stages})
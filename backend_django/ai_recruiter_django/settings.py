@@ -153,6 +153,9 @@ LOGGING = {
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Days an analysis stays reusable for identical uploads (the pipeline and jobs change; 0 disables reuse)
+AI_ANALYSIS_REUSE_MAX_AGE_DAYS = env.int('AI_ANALYSIS_REUSE_MAX_AGE_DAYS', default=30)
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
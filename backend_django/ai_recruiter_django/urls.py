@@ -9,4 +9,5 @@ urlpatterns = [
     path('auth/', include('authentication.urls')),
     path('', include('core.urls')), # /jobs, /companies
     path('candidates/', include('candidates.urls')),
+    path('ai/', include('ai_engine.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
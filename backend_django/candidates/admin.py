@@ -1,11 +1,11 @@
 from django.contrib import admin
-from .models import Candidate, Application, Interview, Recommendation, ResumeAnalysis
+from .models import Candidate, Application, Interview, Recommendation, ResumeAnalysis, ResumeAnalysisJob
 
 
 @admin.register(Candidate)
 class CandidateAdmin(admin.ModelAdmin):
-	list_display = ('full_name', 'email', 'user', 'experience_level', 'created_at')
-	search_fields = ('full_name', 'email', 'user__username')
+	list_display = ('full_name', 'email', 'user', 'imported_by', 'experience_level', 'created_at')
+	search_fields = ('full_name', 'email', 'user__username', 'imported_by__username')
 	readonly_fields = ('created_at', 'updated_at')
 
 
@@ -34,3 +34,11 @@ class ResumeAnalysisAdmin(admin.ModelAdmin):
 	list_display = ('candidate', 'experience_level', 'created_at')
 	search_fields = ('candidate__full_name',)
 	readonly_fields = ('created_at',)
+
+
+@admin.register(ResumeAnalysisJob)
+class ResumeAnalysisJobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'user', 'status', 'attempts', 'claimed_by', 'created_at', 'finished_at')
+	list_filter = ('status',)
+	search_fields = ('user__username', 'content_sha256')
+	readonly_fields = ('created_at', 'started_at', 'finished_at')
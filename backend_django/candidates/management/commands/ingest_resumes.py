@@ -0,0 +1,274 @@
+import asyncio
+import csv
+import os
+import signal
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_engine.agent_manager import AgentManager
+from agents.pdf_pool import PdfExtractionPool
+from agents.resume_fingerprint import text_sha256
+from agents.resume_store import read_chunks, store_resume
+from candidates.services import BulkIngestionService, ResumeAnalysisService
+
+
+class Document(NamedTuple):
+    path: str
+    # From the manifest; take precedence over what the extractor finds
+    full_name: str = ''
+    email: str = ''
+
+
+class Command(BaseCommand):
+    help = 'Import a directory or manifest of resumes: parse, analyze and store them in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory searched for *.pdf, or a manifest: one path per line, '
+                                           'or a CSV with a "path" column and optional "full_name" and "email"')
+        parser.add_argument('--owner', required=True, help='Email of the recruiter importing the resumes (Candidate.imported_by)')
+        parser.add_argument('--parse-workers', type=int, help='PDF parsing processes (default AI_PDF_WORKERS)')
+        parser.add_argument('--llm-slots', type=int, default=int(os.getenv('AI_INGEST_LLM_SLOTS', 4)),
+                            help='Resumes in the AI pipeline at the same time')
+        parser.add_argument('--batch-size', type=int, default=int(os.getenv('AI_INGEST_BATCH_SIZE', 50)),
+                            help='Results written per transaction')
+        parser.add_argument('--flush-interval', type=float, default=30,
+                            help='Seconds after which a partial batch is written anyway (bounds the work a crash loses)')
+        parser.add_argument('--report-interval', type=float, default=10, help='Seconds between progress lines')
+        parser.add_argument('--limit', type=int, help='Import at most this many documents')
+        parser.add_argument('--force', action='store_true',
+                            help='Run the AI pipeline even for resumes analyzed before (outside this import)')
+
+    def handle(self, *args, **options):
+        try:
+            owner = get_user_model().objects.get(email=options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['owner']}")
+
+        documents = self.discover(options['source'])[:options['limit']]
+        if not documents:
+            raise CommandError(f"No PDFs found in {options['source']}")
+
+        self.stats = Counter()
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.failures: List[tuple] = []
+        started = time.perf_counter()
+        asyncio.run(self.ingest(owner, documents, options))
+        self.report(len(documents), time.perf_counter() - started)
+
+    def discover(self, source: str) -> List[Document]:
+        if os.path.isdir(source):
+            return [
+                Document(os.path.join(root, name))
+                for root, _, names in sorted(os.walk(source))
+                for name in sorted(names) if name.lower().endswith('.pdf')
+            ]
+        if not os.path.isfile(source):
+            raise CommandError(f"{source} is neither a directory nor a manifest file")
+
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, newline='') as f:
+            if source.lower().endswith('.csv'):
+                rows = [
+                    (row['path'], row.get('full_name') or '', row.get('email') or '')
+                    for row in csv.DictReader(f) if row.get('path')
+                ]
+            else:
+                rows = [(line.strip(), '', '') for line in f if line.strip() and not line.startswith('#')]
+        # Relative paths are relative to the manifest
+        return [Document(os.path.join(base, path), full_name, email) for path, full_name, email in rows]
+
+    async def ingest(self, owner, documents: List[Document], options):
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                # Finish the resumes already parsed and write them, start no new ones
+                loop.add_signal_handler(sig, self.stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        self.owner = owner
+        self.options = options
+        self.imported = await sync_to_async(BulkIngestionService.ingested_hashes, thread_sensitive=True)(owner)
+        self.pending: asyncio.Queue = asyncio.Queue()
+        for document in documents:
+            self.pending.put_nowait(document)
+        # Parsed resumes waiting for an LLM slot; small so parsing doesn't run far ahead of analysis
+        self.parsed: asyncio.Queue = asyncio.Queue(maxsize=2 * options['llm_slots'])
+        self.rows: List[Dict[str, Any]] = []
+        self.write_lock = asyncio.Lock()
+
+        overrides = {'max_workers': options['parse_workers']} if options['parse_workers'] else {}
+        self.pool = PdfExtractionPool.from_env(**overrides)
+        self.stdout.write(
+            f"Importing {len(documents)} resumes for {owner.email}: {self.pool.max_workers} parse workers, "
+            f"{options['llm_slots']} LLM slots, batches of {options['batch_size']}"
+        )
+        self.started = time.perf_counter()
+        ticker = asyncio.create_task(self.tick(len(documents)))
+        try:
+            # As many parsers as the pool accepts documents, so none is ever turned away as busy
+            parsers = asyncio.gather(*(self.parse_loop() for _ in range(self.pool.queue_depth)))
+            analyzers = asyncio.gather(*(self.analysis_slot() for _ in range(max(1, options['llm_slots']))))
+            await parsers
+            for _ in range(max(1, options['llm_slots'])):
+                await self.parsed.put(None)
+            await analyzers
+        finally:
+            ticker.cancel()
+            await self.flush()
+            await asyncio.to_thread(self.pool.shutdown)
+
+    async def parse_loop(self):
+        while not self.stopping.is_set():
+            try:
+                document = self.pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                await self.parse(document, started)
+            except Exception as e:
+                self.fail(document, 'parse', e)
+
+    async def parse(self, document: Document, started: float):
+        with open(document.path, 'rb') as f:
+            stored = await asyncio.to_thread(store_resume, read_chunks(f), ResumeAnalysisService.storage_dir())
+        self.timed('store', started)
+        if stored.content_sha256 in self.imported:
+            self.stats['skipped'] += 1
+            return
+        # Also covers the same file listed twice
+        self.imported.add(stored.content_sha256)
+
+        parse_started = time.perf_counter()
+        text = await self.pool.extract(stored.path)
+        parse_ms = self.timed('parse (+wait)', parse_started)
+        if not text.strip():
+            raise ValueError('no text could be extracted')
+        text_hash = text_sha256(text) or ''
+
+        if not self.options['force']:
+            lookup_started = time.perf_counter()
+            reusable = await sync_to_async(BulkIngestionService.find_reusable, thread_sensitive=True)(
+                stored.content_sha256, text_hash
+            )
+            self.timed('lookup', lookup_started)
+            if reusable is not None:
+                self.stats['reused'] += 1
+                await self.add_row(document, stored, text_hash, started, reusable)
+                return
+
+        await self.parsed.put((document, stored, text, text_hash, parse_ms, started))
+
+    async def analysis_slot(self):
+        # One manager per slot: its run log (last_log) belongs to one resume at a time
+        agent_manager = AgentManager()
+        await agent_manager.ensure_agent()
+        while True:
+            item = await self.parsed.get()
+            if item is None:
+                return
+            document, stored, text, text_hash, parse_ms, started = item
+            analysis_started = time.perf_counter()
+            try:
+                result = await agent_manager.analyze_resume(text)
+            except Exception as e:
+                self.fail(document, 'analysis', e)
+                continue
+            self.timed('analysis', analysis_started)
+            for stage, timing in (result.get('stage_timings') or {}).items():
+                self.timings[f'  {stage}'].append(timing.get('duration_ms', 0))
+            await agent_manager.record_stage('pdf_extraction', parse_ms)
+
+            self.stats['analyzed'] += 1
+            await self.add_row(document, stored, text_hash, started, BulkIngestionService.row_from_result(result))
+
+    async def add_row(self, document: Document, stored, text_hash: str, started: float, fields: Dict[str, Any]):
+        row = dict(
+            fields,
+            stored=stored,
+            source_path=document.path,
+            text_sha256=text_hash,
+            processing_time=time.perf_counter() - started,
+        )
+        row['full_name'] = document.full_name or row['full_name']
+        row['email'] = document.email or row['email']
+        self.rows.append(row)
+        if len(self.rows) >= self.options['batch_size']:
+            await self.flush()
+
+    async def flush(self):
+        async with self.write_lock:
+            rows, self.rows = self.rows, []
+            if not rows:
+                return
+            started = time.perf_counter()
+            try:
+                await sync_to_async(BulkIngestionService.save_batch, thread_sensitive=True)(self.owner, rows)
+            except Exception as e:
+                for row in rows:
+                    # Not imported after all: the next run picks them up again
+                    self.imported.discard(row['stored'].content_sha256)
+                    self.fail(Document(row['source_path']), 'write', e)
+                return
+            self.timed('write (batch)', started)
+            self.stats['written'] += len(rows)
+
+    async def tick(self, total: int):
+        last_flush = last_report = time.perf_counter()
+        while True:
+            await asyncio.sleep(1)
+            now = time.perf_counter()
+            if now - last_flush >= self.options['flush_interval']:
+                last_flush = now
+                await self.flush()
+            if now - last_report >= self.options['report_interval']:
+                last_report = now
+                done = self.stats['analyzed'] + self.stats['reused'] + self.stats['skipped'] + self.stats['failed']
+                self.stdout.write(
+                    f"[{done}/{total}] {self.stats['written']} written, {self.stats['failed']} failed, "
+                    f"{(self.stats['analyzed'] + self.stats['reused']) / (now - self.started):.2f} docs/s"
+                )
+
+    def timed(self, stage: str, started: float) -> float:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.timings[stage].append(elapsed_ms)
+        return elapsed_ms
+
+    def fail(self, document: Document, stage: str, error: Exception):
+        self.stats['failed'] += 1
+        self.failures.append((document.path, stage, str(error) or type(error).__name__))
+
+    def report(self, total: int, elapsed: float):
+        processed = self.stats['analyzed'] + self.stats['reused']
+        self.stdout.write(self.style.SUCCESS(
+            f"\nImported {self.stats['written']} of {total} resumes in {elapsed:.1f}s "
+            f"({processed / elapsed if elapsed else 0:.2f} docs/s)"
+        ))
+        self.stdout.write(
+            f"  analyzed {self.stats['analyzed']}, reused an earlier analysis {self.stats['reused']}, "
+            f"already imported {self.stats['skipped']}, failed {self.stats['failed']}"
+        )
+        if self.stopping.is_set():
+            self.stdout.write(self.style.WARNING('  interrupted: run the same command again to import the rest'))
+
+        self.stdout.write(f"\n{'stage':<18} {'count':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'total s':>9}")
+        for stage, values in self.timings.items():
+            ordered = sorted(values)
+            p50 = ordered[int(0.5 * (len(ordered) - 1))]
+            p95 = ordered[int(0.95 * (len(ordered) - 1))]
+            self.stdout.write(
+                f"{stage:<18} {len(values):>6} {sum(values) / len(values):>10.1f} {p50:>10.1f} {p95:>10.1f} "
+                f"{sum(values) / 1000:>9.1f}"
+            )
+
+        for path, stage, error in self.failures[:20]:
+            self.stdout.write(self.style.ERROR(f"  {stage} failed: {path}: {error}"))
+        if len(self.failures) > 20:
+            self.stdout.write(self.style.ERROR(f"  ... and {len(self.failures) - 20} more"))
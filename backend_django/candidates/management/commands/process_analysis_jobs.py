@@ -0,0 +1,74 @@
+import asyncio
+import os
+import signal
+import socket
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+
+from candidates.services import AnalysisJobQueue
+
+
+class Command(BaseCommand):
+    help = 'Run queued resume analyses (ResumeAnalysisJob) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=int(os.getenv('AI_JOB_CONCURRENCY', 2)),
+                            help='Jobs run at the same time')
+        parser.add_argument('--poll-interval', type=float, default=float(os.getenv('AI_JOB_POLL_INTERVAL', 1)),
+                            help='Seconds between checks of an empty queue')
+        parser.add_argument('--lease', type=float, default=float(os.getenv('AI_JOB_LEASE', 900)),
+                            help='Seconds after which a running job is considered abandoned by its worker')
+        parser.add_argument('--max-attempts', type=int, default=int(os.getenv('AI_JOB_MAX_ATTEMPTS', 3)))
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Analysis worker {self.worker_id} running {options['concurrency']} jobs at a time")
+        asyncio.run(self.work(options))
+        self.stdout.write(self.style.SUCCESS(f"Analysis worker {self.worker_id} stopped"))
+
+    async def work(self, options):
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                # Finish the jobs in progress, claim no new ones
+                loop.add_signal_handler(sig, self.stopping.set)
+            except (NotImplementedError, RuntimeError):
+                # Windows, or not running in the main thread
+                pass
+
+        slots = [self.slot(options) for _ in range(max(1, options['concurrency']))]
+        await asyncio.gather(self.reaper(options), *slots)
+
+    async def slot(self, options):
+        while not self.stopping.is_set():
+            job = await sync_to_async(AnalysisJobQueue.claim, thread_sensitive=True)(self.worker_id)
+            if job is None:
+                if options['burst']:
+                    break
+                await self.idle(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Job {job.id}: analyzing {job.resume_name}")
+            if not await AnalysisJobQueue.run(job):
+                self.stdout.write(f"Job {job.id}: PDF pool busy, back in the queue")
+                await self.idle(options['poll_interval'])
+        if options['burst']:
+            self.stopping.set()
+
+    async def reaper(self, options):
+        while not self.stopping.is_set():
+            requeued = await sync_to_async(AnalysisJobQueue.requeue_stale, thread_sensitive=True)(
+                options['lease'], options['max_attempts']
+            )
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} abandoned job(s)")
+            await self.idle(min(60.0, options['lease'] / 4))
+
+    async def idle(self, seconds):
+        try:
+            await asyncio.wait_for(self.stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0002_resumeanalysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumeanalysis',
+            name='content_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resumeanalysis',
+            name='reused_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reuses', to='candidates.resumeanalysis'),
+        ),
+        migrations.AddField(
+            model_name='resumeanalysis',
+            name='text_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0004_resumeanalysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumeanalysisjob',
+            name='progress',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
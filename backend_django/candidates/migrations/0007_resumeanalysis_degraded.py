@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0006_candidate_imported_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumeanalysis',
+            name='degraded',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -3,7 +3,10 @@ from django.conf import settings
 from core.models import Job, Skill
 
 class Candidate(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='candidate_profile')
+    # The candidate's own account; empty for resumes imported in bulk (ingest_resumes), which have none
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='candidate_profile', null=True, blank=True)
+    # The recruiter who imported the resume (ingest_resumes --owner)
+    imported_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, related_name='imported_candidates', null=True, blank=True)
     full_name = models.CharField(max_length=255)
     email = models.EmailField(max_length=255) # Contact email, can be different from user.email
     phone = models.CharField(max_length=50, blank=True, null=True)
@@ -106,6 +109,13 @@ class ResumeAnalysis(models.Model):
     # Metadata
     processing_time = models.FloatField(null=True, blank=True)  # Time in seconds
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Deduplication: identical uploads reuse an earlier analysis instead of re-running the AI pipeline
+    content_sha256 = models.CharField(max_length=64, blank=True, db_index=True)  # Hash of the file bytes
+    text_sha256 = models.CharField(max_length=64, blank=True, db_index=True)  # Hash of the normalized text
+    reused_from = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='reuses')
+    # Produced by a fallback path (unparseable model answer, failed stage): never reused
+    degraded = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-created_at']
@@ -113,3 +123,50 @@ class ResumeAnalysis(models.Model):
     
     def __str__(self):
         return f"{self.candidate.full_name} - Analysis on {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+class ResumeAnalysisJob(models.Model):
+    """A resume waiting for (or done with) the AI pipeline.
+
+    Uploads only store the file and queue a job; the process_analysis_jobs
+    worker claims queued jobs and runs the analysis, so web workers are never
+    held for the length of the pipeline.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='analysis_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    force = models.BooleanField(default=False)  # Re-analyze even if an identical resume was analyzed before
+
+    # The stored upload (content-addressed, see agents.resume_store)
+    resume_path = models.CharField(max_length=500)
+    resume_name = models.CharField(max_length=200)
+    content_sha256 = models.CharField(max_length=64)
+
+    # Claiming
+    attempts = models.IntegerField(default=0)
+    claimed_by = models.CharField(max_length=100, blank=True)
+
+    # One event per completed workflow stage, in completion order (streamed by AnalysisJobEventsView)
+    progress = models.JSONField(default=list, blank=True)
+
+    # Outcome: the response body the upload endpoint used to return, or the error
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        # Workers look up the oldest queued (and stale running) jobs
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Analysis job {self.id} ({self.status})"
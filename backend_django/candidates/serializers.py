@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Candidate, Application, Interview, Recommendation, ResumeAnalysis
+from .models import Candidate, Application, Interview, Recommendation, ResumeAnalysis, ResumeAnalysisJob
 from core.serializers import JobSerializer
 from core.models import Skill, Job
 
@@ -17,7 +17,7 @@ class CandidateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Candidate
         fields = '__all__'
-        read_only_fields = ('user',)
+        read_only_fields = ('user', 'imported_by')
 
 class ApplicationSerializer(serializers.ModelSerializer):
     # Allow clients to provide a job by its PK on create/update, but return
@@ -51,3 +51,10 @@ class ResumeAnalysisSerializer(serializers.ModelSerializer):
     class Meta:
         model = ResumeAnalysis
         fields = '__all__'
+
+class ResumeAnalysisJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = ResumeAnalysisJob
+        fields = ['job_id', 'status', 'attempts', 'progress', 'result', 'error', 'created_at', 'started_at', 'finished_at']
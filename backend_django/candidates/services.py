@@ -1,38 +1,125 @@
 import os
 import json
+import time
 import asyncio
-from typing import Dict, Any, List
+import traceback
+from datetime import timedelta
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from django.core.files.uploadedfile import UploadedFile
-from .models import Candidate, ResumeAnalysis, Recommendation
+from .models import Candidate, ResumeAnalysis, ResumeAnalysisJob, Recommendation
 from core.models import Skill, Job
 from utils_pdf import extract_text_from_pdf
 from ai_engine.agent_manager import AgentManager
+from agents.pdf_pool import PdfPoolBusyError
+from agents.progress import ProgressCallback, format_sse
+from agents.resume_fingerprint import is_degraded_analysis, text_sha256
+from agents.resume_store import StoredResume, store_resume
 
 class ResumeAnalysisService:
     @staticmethod
-    async def process_resume_upload(user: Any, resume_file: UploadedFile) -> Dict[str, Any]:
-        # 1. Save file locally
-        upload_dir = os.path.join(settings.BASE_DIR, 'uploads')
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, resume_file.name)
-        
-        with open(file_path, 'wb+') as destination:
-            for chunk in resume_file.chunks():
-                destination.write(chunk)
-                
-        # 2. Extract Text
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-        resume_text = await extract_text_from_pdf(file_content)
+    def storage_dir() -> str:
+        return os.path.join(settings.BASE_DIR, 'uploads')
+
+    @staticmethod
+    def store_upload(resume_file: UploadedFile) -> StoredResume:
+        """Store the upload (content-addressed) and hash it in the same pass (blocking I/O)"""
+        return store_resume(resume_file.chunks(), ResumeAnalysisService.storage_dir())
+
+    @staticmethod
+    async def process_resume_upload(user: Any, resume_file: UploadedFile, force: bool = False) -> Dict[str, Any]:
+        """Store and analyze an uploaded resume in one go (see analyze_stored_resume)"""
+        stored = await asyncio.to_thread(ResumeAnalysisService.store_upload, resume_file)
+        return await ResumeAnalysisService.analyze_stored_resume(user, stored, force=force)
+
+    @staticmethod
+    async def analyze_stored_resume(
+        user: Any, stored: StoredResume, force: bool = False, on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """Analyze a stored resume.
+
+        A resume identical to one analyzed before (same bytes, or same text
+        once normalized) reuses that analysis instead of running the AI
+        pipeline again; force=True always re-analyzes. on_progress gets an
+        event per completed workflow stage.
+        """
+        started = time.perf_counter()
+
+        resume_url = f"/media/uploads/{stored.name}"
+        content_hash = stored.content_sha256
+
+        # 1. Same file analyzed before?
+        previous = None if force else await sync_to_async(
+            ResumeAnalysisService.find_previous_analysis, thread_sensitive=True
+        )(content_sha256=content_hash)
+
+        # 2. Extract Text (not needed when the exact file was seen before)
+        text_hash = previous.text_sha256 if previous is not None else ''
+        if previous is None:
+            pdf_started = time.perf_counter()
+            resume_text = await extract_text_from_pdf(stored.path)
+            pdf_ms = (time.perf_counter() - pdf_started) * 1000
+            text_hash = text_sha256(resume_text) or ''
+            if not force and text_hash:
+                previous = await sync_to_async(
+                    ResumeAnalysisService.find_previous_analysis, thread_sensitive=True
+                )(text_sha256=text_hash)
+
+        if previous is not None:
+            print(f"DEBUG: Resume matches analysis {previous.id}, reusing it")
+            candidate = await sync_to_async(ResumeAnalysisService._save_analysis, thread_sensitive=True)(
+                user,
+                resume_url=resume_url,
+                final_report=ResumeAnalysisService._report_from_analysis(previous),
+                detected_skills=previous.extracted_skills,
+                experience_level=previous.experience_level,
+                hashes=(content_hash, text_hash),
+                started=started,
+                reused_from=previous,
+            )
+            return {
+                "report": candidate.analysis_report,
+                "candidate": candidate,
+                "skills_count": len(previous.extracted_skills),
+                "reused_analysis_id": previous.reused_from_id or previous.id,
+            }
 
         # 3. AI Analysis via AgentManager
         agent_manager = AgentManager()
         # ensure DB-backed agent record exists (async)
         await agent_manager.ensure_agent()
-        result = await agent_manager.analyze_resume(resume_text)
+        result = await agent_manager.analyze_resume(resume_text, on_progress=on_progress)
+        await agent_manager.record_stage('pdf_extraction', pdf_ms)
+        persistence_started = time.perf_counter()
 
+        final_report, detected_skills = ResumeAnalysisService._build_report(result)
+
+        # 4. Persistence and recommendations (ORM ops in thread to be safe in async context)
+        candidate = await sync_to_async(ResumeAnalysisService._save_analysis, thread_sensitive=True)(
+            user,
+            resume_url=resume_url,
+            final_report=final_report,
+            detected_skills=detected_skills,
+            experience_level=ResumeAnalysisService._experience_level(result),
+            hashes=(content_hash, text_hash),
+            started=started,
+            degraded=is_degraded_analysis(result),
+        )
+        await agent_manager.record_stage('persistence', (time.perf_counter() - persistence_started) * 1000)
+
+        return {
+            "report": final_report,
+            "candidate": candidate,
+            "skills_count": len(detected_skills)
+        }
+
+    @staticmethod
+    def _build_report(result: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Report stored on the candidate, and the detected skills, from the workflow result"""
         analysis_data = result.get('analysis_results', {})
         detected_skills = ResumeAnalysisService._extract_skills(result, analysis_data)
 
@@ -45,49 +132,85 @@ class ResumeAnalysisService:
             "skills": detected_skills,
             "job_matches": result.get('job_matches', {})
         }
+        return final_report, detected_skills
 
-        # 4. Persistence (perform ORM ops in thread to be safe in async context)
-        candidate, _ = await sync_to_async(Candidate.objects.get_or_create, thread_sensitive=True)(
+    @staticmethod
+    def _experience_level(result: Dict[str, Any]) -> str:
+        return result.get('extracted_data', {}).get('experience_level', 'Mid-level')
+
+    @staticmethod
+    def find_previous_analysis(**hash_filter) -> Optional[ResumeAnalysis]:
+        """Most recent reusable analysis of an identical resume, matched on content_sha256 or text_sha256.
+
+        Degraded analyses and ones older than AI_ANALYSIS_REUSE_MAX_AGE_DAYS
+        don't count: the upload gets a fresh analysis instead.
+        """
+        max_age = timedelta(days=settings.AI_ANALYSIS_REUSE_MAX_AGE_DAYS)
+        return (
+            ResumeAnalysis.objects.filter(degraded=False, created_at__gte=timezone.now() - max_age, **hash_filter)
+            .order_by('-created_at').first()
+        )
+
+    @staticmethod
+    def _report_from_analysis(analysis: ResumeAnalysis) -> Dict[str, Any]:
+        return {
+            "summary": analysis.summary,
+            "analysis_results": {"strengths": analysis.strengths, "gaps": analysis.gaps},
+            "skills": analysis.extracted_skills,
+            "job_matches": analysis.job_matches,
+        }
+
+    @staticmethod
+    def _save_analysis(
+        user: Any,
+        resume_url: str,
+        final_report: Dict[str, Any],
+        detected_skills: List[str],
+        experience_level: str,
+        hashes: Tuple[str, str],
+        started: float,
+        reused_from: Optional[ResumeAnalysis] = None,
+        degraded: bool = False,
+    ) -> Candidate:
+        candidate, _ = Candidate.objects.get_or_create(
             user=user,
             defaults={'email': user.email, 'full_name': f"{user.first_name} {user.last_name}"}
         )
 
-        candidate.resume_url = f"/media/uploads/{resume_file.name}"
+        candidate.resume_url = resume_url
         candidate.analysis_report = final_report
 
         # Skill Normalization
         skill_objs = []
         for s_name in detected_skills:
-            skill_obj, _ = await sync_to_async(Skill.objects.get_or_create, thread_sensitive=True)(
-                name=s_name.strip().title()
-            )
+            skill_obj, _ = Skill.objects.get_or_create(name=s_name.strip().title())
             skill_objs.append(skill_obj)
 
-        # set many-to-many via thread
-        await sync_to_async(candidate.skills.set, thread_sensitive=True)(skill_objs)
-        await sync_to_async(candidate.save, thread_sensitive=True)()
+        candidate.skills.set(skill_objs)
+        candidate.save()
 
         # History Table
-        await sync_to_async(ResumeAnalysis.objects.create, thread_sensitive=True)(
+        content_hash, text_hash = hashes
+        ResumeAnalysis.objects.create(
             candidate=candidate,
             resume_url=candidate.resume_url,
             extracted_skills=detected_skills,
-            experience_level=result.get('extracted_data', {}).get('experience_level', 'Mid-level'),
-            strengths=analysis_data.get('strengths', []),
-            gaps=analysis_data.get('gaps', []) or analysis_data.get('weaknesses', []),
+            experience_level=experience_level,
+            strengths=final_report['analysis_results']['strengths'],
+            gaps=final_report['analysis_results']['gaps'],
             summary=final_report['summary'],
-            job_matches=final_report['job_matches']
+            job_matches=final_report['job_matches'],
+            processing_time=time.perf_counter() - started,
+            content_sha256=content_hash,
+            text_sha256=text_hash,
+            # Point at the original analysis, not at another reuse
+            reused_from=(reused_from.reused_from or reused_from) if reused_from is not None else None,
+            degraded=degraded,
         )
 
-        # 5. Recommendation Logic
-        # run update_or_create in thread for each job
-        await sync_to_async(ResumeAnalysisService._generate_recommendations, thread_sensitive=True)(candidate, detected_skills)
-
-        return {
-            "report": final_report,
-            "candidate": candidate,
-            "skills_count": len(detected_skills)
-        }
+        # 5. Recommendation Logic (always against the current jobs, even for a reused analysis)
+        ResumeAnalysisService._generate_recommendations(candidate, detected_skills)
+        return candidate
 
     @staticmethod
     def _extract_skills(result: Dict[str, Any], analysis_data: Dict[str, Any]) -> List[str]:
@@ -111,9 +234,18 @@ class ResumeAnalysisService:
 
     @staticmethod
     def _generate_recommendations(candidate: Candidate, detected_skills: List[str]):
-        jobs = Job.objects.all()[:20]
+        for job, score, explanation in ResumeAnalysisService._match_jobs(Job.objects.all()[:20], detected_skills):
+            Recommendation.objects.update_or_create(
+                candidate=candidate,
+                job=job,
+                defaults={'match_score': score, 'explanation': explanation}
+            )
+
+    @staticmethod
+    def _match_jobs(jobs: Iterable[Job], detected_skills: List[str]) -> Iterator[Tuple[Job, float, str]]:
+        """(job, score, explanation) for each job the skills cover more than 20% of"""
         user_skills = set(detected_skills)
-        
+
         for job in jobs:
             job_reqs = job.requirements if isinstance(job.requirements, list) else []
             job_reqs_set = set(job_reqs)
@@ -124,11 +256,240 @@ class ResumeAnalysisService:
                 score = len(job_reqs_set.intersection(user_skills)) / len(job_reqs_set)
             
             if score > 0.2:
-                Recommendation.objects.update_or_create(
+                yield job, score, f"Match based on skills: {', '.join(user_skills.intersection(job_reqs_set)) or 'general fit'}"
+
+
+class AnalysisJobQueue:
+    """DB-backed queue of resume analyses (ResumeAnalysisJob).
+
+    Needs nothing but the database (SQLite locally, Postgres/SQL Server in
+    production): a job is claimed with a conditional UPDATE, so two workers
+    never run the same one.
+    """
+
+    @staticmethod
+    def enqueue(user: Any, stored: StoredResume, force: bool = False) -> ResumeAnalysisJob:
+        return ResumeAnalysisJob.objects.create(
+            user=user,
+            force=force,
+            resume_path=stored.path,
+            resume_name=stored.name,
+            content_sha256=stored.content_sha256,
+        )
+
+    @staticmethod
+    def claim(worker_id: str) -> Optional[ResumeAnalysisJob]:
+        """Oldest queued job, now marked running for worker_id (None when the queue is empty)"""
+        queued = ResumeAnalysisJob.objects.filter(status='queued').order_by('created_at')
+        for job_id in queued.values_list('id', flat=True)[:10]:
+            # Another worker may have claimed it since the SELECT; only one UPDATE matches
+            claimed = ResumeAnalysisJob.objects.filter(id=job_id, status='queued').update(
+                status='running', claimed_by=worker_id, started_at=timezone.now(), attempts=F('attempts') + 1
+            )
+            if claimed:
+                return ResumeAnalysisJob.objects.select_related('user').get(id=job_id)
+        return None
+
+    @staticmethod
+    def queue_position(job: ResumeAnalysisJob) -> int:
+        """Queued jobs ahead of this one"""
+        return ResumeAnalysisJob.objects.filter(status='queued', created_at__lt=job.created_at).count()
+
+    @staticmethod
+    def requeue_stale(lease_seconds: float, max_attempts: int) -> int:
+        """Give running jobs whose worker died (older than the lease) back to the queue, or fail them"""
+        now = timezone.now()
+        stale = ResumeAnalysisJob.objects.filter(status='running', started_at__lt=now - timedelta(seconds=lease_seconds))
+        stale.filter(attempts__gte=max_attempts).update(
+            status='failed', error='The worker running this job stopped before it finished', finished_at=now
+        )
+        return stale.filter(attempts__lt=max_attempts).update(status='queued', claimed_by='')
+
+    @staticmethod
+    def _finish(job: ResumeAnalysisJob, status: str, result: Optional[Dict[str, Any]] = None, error: str = '') -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+
+    @staticmethod
+    def _save_progress(job: ResumeAnalysisJob, progress: List[Dict[str, Any]]) -> None:
+        # Round-trip through JSON: stage results may hold values the JSON field can't store as-is
+        events = json.loads(json.dumps(progress, default=str))
+        ResumeAnalysisJob.objects.filter(id=job.id).update(progress=events)
+
+    @staticmethod
+    def job_events(job: ResumeAnalysisJob, sent: int, last_status: str) -> Tuple[List[str], int, str, bool]:
+        """Server-Sent Events for what changed since the client last looked.
+
+        sent is how many stage events the client already has. Returns the
+        messages, the new sent count and status, and whether the job is done.
+        """
+        job.refresh_from_db(fields=['status', 'progress', 'result', 'error'])
+        messages = []
+        if job.status != last_status:
+            messages.append(format_sse('status', {"status": job.status}))
+        messages.extend(format_sse('stage', event) for event in job.progress[sent:])
+        done = job.status in ('completed', 'failed')
+        if job.status == 'completed':
+            messages.append(format_sse('complete', job.result))
+        elif job.status == 'failed':
+            messages.append(format_sse('error', {"error": job.error}))
+        return messages, len(job.progress), job.status, done
+
+    @staticmethod
+    def _release(job: ResumeAnalysisJob) -> None:
+        # Not the job's fault: don't count the attempt
+        ResumeAnalysisJob.objects.filter(id=job.id).update(
+            status='queued', claimed_by='', started_at=None, attempts=F('attempts') - 1
+        )
+
+    @staticmethod
+    async def run(job: ResumeAnalysisJob) -> bool:
+        """Run a claimed job to completion; False when it had to go back to the queue"""
+        progress: List[Dict[str, Any]] = []
+
+        async def record_progress(event: Dict[str, Any]) -> None:
+            progress.append(event)
+            await sync_to_async(AnalysisJobQueue._save_progress, thread_sensitive=True)(job, progress)
+
+        try:
+            stored = StoredResume(
+                path=job.resume_path, name=job.resume_name, content_sha256=job.content_sha256,
+                size=os.path.getsize(job.resume_path),
+            )
+            result = await ResumeAnalysisService.analyze_stored_resume(
+                job.user, stored, force=job.force, on_progress=record_progress
+            )
+        except PdfPoolBusyError:
+            await sync_to_async(AnalysisJobQueue._release, thread_sensitive=True)(job)
+            return False
+        except Exception as e:
+            traceback.print_exc()
+            await sync_to_async(AnalysisJobQueue._finish, thread_sensitive=True)(
+                job, 'failed', error=f"AI Processing failed: {e}"
+            )
+            return True
+
+        reused_id = result.get('reused_analysis_id')
+        await sync_to_async(AnalysisJobQueue._finish, thread_sensitive=True)(job, 'completed', result={
+            "status": "success",
+            "message": "Resume matches an earlier analysis" if reused_id else "Resume analyzed successfully",
+            "data": result['report'],
+            "metadata": {
+                "skills_detected": result['skills_count'],
+                "resume_url": result['candidate'].resume_url,
+                "reused": reused_id is not None,
+                "reused_analysis_id": reused_id,
+            }
+        })
+        return True
+
+
+class BulkIngestionService:
+    """Persistence for manage.py ingest_resumes.
+
+    Every ingested resume becomes its own Candidate without an account
+    (user is empty), recorded as imported_by the importing user. Results
+    are written many at a time, one transaction per batch, and the content
+    hashes already stored for the owner are what lets an interrupted import
+    pick up where it stopped.
+    """
+
+    @staticmethod
+    def ingested_hashes(owner: Any) -> set:
+        """content_sha256 of every resume already imported for owner"""
+        return set(
+            ResumeAnalysis.objects.filter(candidate__imported_by=owner)
+            .exclude(content_sha256='')
+            .values_list('content_sha256', flat=True)
+        )
+
+    @staticmethod
+    def find_reusable(content_sha256: str, text_hash: str) -> Optional[Dict[str, Any]]:
+        """Row fields copied from an earlier analysis of the same resume (any owner), or None"""
+        previous = ResumeAnalysisService.find_previous_analysis(content_sha256=content_sha256)
+        if previous is None and text_hash:
+            previous = ResumeAnalysisService.find_previous_analysis(text_sha256=text_hash)
+        if previous is None:
+            return None
+        return {
+            "report": ResumeAnalysisService._report_from_analysis(previous),
+            "skills": previous.extracted_skills,
+            "experience_level": previous.experience_level,
+            "full_name": previous.candidate.full_name,
+            "email": previous.candidate.email,
+            "reused_from": previous.reused_from or previous,
+        }
+
+    @staticmethod
+    def row_from_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Row fields from a workflow result (see save_batch)"""
+        final_report, detected_skills = ResumeAnalysisService._build_report(result)
+        structured = result.get('extracted_data', {}).get('structured_data')
+        personal = structured.get('personal_info') if isinstance(structured, dict) else None
+        personal = personal if isinstance(personal, dict) else {}
+        return {
+            "report": final_report,
+            "skills": detected_skills,
+            "experience_level": ResumeAnalysisService._experience_level(result),
+            "full_name": str(personal.get('name') or ''),
+            "email": str(personal.get('email') or ''),
+            "reused_from": None,
+            "degraded": is_degraded_analysis(result),
+        }
+
+    @staticmethod
+    def save_batch(owner: Any, rows: List[Dict[str, Any]]) -> int:
+        """Create a Candidate, its skills, ResumeAnalysis and recommendations per row, in one transaction.
+
+        A row holds stored (StoredResume), source_path, text_sha256,
+        processing_time and the fields from row_from_result / find_reusable.
+        """
+        with transaction.atomic():
+            names = {s.strip().title() for row in rows for s in row['skills'] if s.strip()}
+            skills = {skill.name: skill for skill in Skill.objects.filter(name__in=names)}
+            if names - skills.keys():
+                Skill.objects.bulk_create([Skill(name=name) for name in names - skills.keys()], ignore_conflicts=True)
+                skills.update({skill.name: skill for skill in Skill.objects.filter(name__in=names - skills.keys())})
+            jobs = list(Job.objects.all()[:20])
+
+            skill_links, analyses, recommendations = [], [], []
+            for row in rows:
+                stored = row['stored']
+                candidate = Candidate.objects.create(
+                    imported_by=owner,
+                    full_name=row['full_name'] or os.path.splitext(os.path.basename(row['source_path']))[0],
+                    email=row['email'],
+                    resume_url=f"/media/uploads/{stored.name}",
+                    analysis_report=row['report'],
+                )
+                skill_links.extend(
+                    Candidate.skills.through(candidate_id=candidate.id, skill_id=skills[name].id)
+                    for name in {s.strip().title() for s in row['skills'] if s.strip()}
+                )
+                analyses.append(ResumeAnalysis(
                     candidate=candidate,
-                    job=job,
-                    defaults={
-                        'match_score': score, 
-                        'explanation': f"Match based on skills: {', '.join(user_skills.intersection(job_reqs_set)) or 'general fit'}"
-                    }
+                    resume_url=candidate.resume_url,
+                    extracted_skills=row['skills'],
+                    experience_level=row['experience_level'],
+                    strengths=row['report']['analysis_results']['strengths'],
+                    gaps=row['report']['analysis_results']['gaps'],
+                    summary=row['report']['summary'],
+                    job_matches=row['report']['job_matches'],
+                    processing_time=row['processing_time'],
+                    content_sha256=stored.content_sha256,
+                    text_sha256=row['text_sha256'],
+                    reused_from=row['reused_from'],
+                    degraded=row.get('degraded', False),
+                ))
+                recommendations.extend(
+                    Recommendation(candidate=candidate, job=job, match_score=score, explanation=explanation)
+                    for job, score, explanation in ResumeAnalysisService._match_jobs(jobs, row['skills'])
                 )
+
+            Candidate.skills.through.objects.bulk_create(skill_links, ignore_conflicts=True)
+            ResumeAnalysis.objects.bulk_create(analyses)
+            Recommendation.objects.bulk_create(recommendations)
+        return len(rows)
@@ -1,3 +1,329 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from agents.pdf_pool import PdfExtractionPool, PdfPoolBusyError
+from agents.resume_fingerprint import is_degraded_analysis
+from agents.resume_store import StoredResume, store_resume
+from ai_engine.agent_manager import AgentManager
+from authentication.models import User
+from candidates.models import Candidate, ResumeAnalysis, ResumeAnalysisJob
+from candidates.services import AnalysisJobQueue, BulkIngestionService, ResumeAnalysisService
+from core.models import Company, Job
+
+RESUME_TEXT = "Jane Doe\njane@example.com\nPython, Django, SQL\n5 years of backend development"
+
+WORKFLOW_RESULT = {
+    "extracted_data": {
+        "skills": ["Python", "Django", "SQL"],
+        "structured_data": {"personal_info": {"name": "Jane Doe", "email": "jane@example.com"}},
+    },
+    "analysis_results": {"strengths": ["Backend"], "gaps": []},
+    "job_matches": {"matched_jobs": []},
+    "final_recommendation": {"summary": "Strong backend profile."},
+    "stage_timings": {},
+}
+
+
+# Transactional: the ingest command and the job worker reach the database from their own threads
+class IngestResumesOwnerTests(TransactionTestCase):
+    """Bulk-imported candidates must not become profiles of the recruiter who imported them"""
+
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+        self.source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.source_dir, ignore_errors=True)
+        for index in range(3):
+            with open(os.path.join(self.source_dir, f"resume-{index}.pdf"), "wb") as f:
+                f.write(f"%PDF-1.4 resume {index}".encode())
+
+        # No PDF parsing or LLM calls: the pipeline around them is what's under test
+        for patcher in (
+            mock.patch.object(ResumeAnalysisService, 'storage_dir', return_value=self.storage_dir),
+            mock.patch.object(PdfExtractionPool, 'extract', new=mock.AsyncMock(return_value=RESUME_TEXT)),
+            mock.patch.object(AgentManager, 'analyze_resume', new=mock.AsyncMock(return_value=WORKFLOW_RESULT)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.recruiter = User.objects.create_user(
+            username='recruiter', email='recruiter@example.com', password='x', role='recruiter'
+        )
+        company = Company.objects.create(user=self.recruiter, name='Acme')
+        self.job = Job.objects.create(company=company, title='Backend Developer', requirements=['Python', 'SQL'])
+        self.client = APIClient()
+        self.client.force_authenticate(self.recruiter)
+
+    def ingest(self):
+        call_command('ingest_resumes', self.source_dir, '--owner', self.recruiter.email, '--parse-workers', '1',
+                     stdout=open(os.devnull, 'w'))
+
+    def test_imported_candidates_have_no_account(self):
+        self.ingest()
+
+        imported = Candidate.objects.filter(imported_by=self.recruiter)
+        self.assertEqual(imported.count(), 3)
+        self.assertFalse(imported.exclude(user=None).exists())
+        self.assertEqual(imported.first().full_name, 'Jane Doe')
+
+        # Everything was imported already
+        self.ingest()
+        self.assertEqual(Candidate.objects.filter(imported_by=self.recruiter).count(), 3)
+
+    def test_owner_endpoints_still_work_after_import(self):
+        self.ingest()
+
+        response = self.client.get('/candidates/me')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], self.recruiter.email)
+
+        upload = SimpleUploadedFile('own.pdf', b'%PDF-1.4 own resume', content_type='application/pdf')
+        response = self.client.post('/candidates/resume/analyze', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        call_command('process_analysis_jobs', '--burst', stdout=open(os.devnull, 'w'))
+        job = ResumeAnalysisJob.objects.get(id=response.data['job_id'])
+        self.assertEqual(job.status, 'completed', job.error)
+        self.assertEqual(Candidate.objects.filter(user=self.recruiter).count(), 1)
+
+        response = self.client.get(f'/jobs/{self.job.id}/match/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['has_resume'])
+
+
+class FindPreviousAnalysisTests(TestCase):
+    def setUp(self):
+        self.candidate = Candidate.objects.create(full_name='Jane Doe', email='jane@example.com')
+
+    def analysis(self, days_old=0, **fields):
+        analysis = ResumeAnalysis.objects.create(
+            candidate=self.candidate, resume_url='/media/uploads/a.pdf', content_sha256='a' * 64, **fields
+        )
+        ResumeAnalysis.objects.filter(id=analysis.id).update(created_at=timezone.now() - timedelta(days=days_old))
+        return analysis
+
+    def test_reuses_the_newest_analysis(self):
+        self.analysis(days_old=2)
+        newest = self.analysis(days_old=1)
+        self.assertEqual(ResumeAnalysisService.find_previous_analysis(content_sha256='a' * 64), newest)
+
+    def test_skips_degraded_analyses(self):
+        usable = self.analysis(days_old=2)
+        self.analysis(days_old=1, degraded=True)
+        self.assertEqual(ResumeAnalysisService.find_previous_analysis(content_sha256='a' * 64), usable)
+
+    @override_settings(AI_ANALYSIS_REUSE_MAX_AGE_DAYS=7)
+    def test_skips_analyses_older_than_the_max_age(self):
+        self.analysis(days_old=8)
+        self.assertIsNone(ResumeAnalysisService.find_previous_analysis(content_sha256='a' * 64))
+
+    def test_fallback_results_are_degraded(self):
+        self.assertFalse(is_degraded_analysis(WORKFLOW_RESULT))
+        self.assertTrue(is_degraded_analysis(dict(WORKFLOW_RESULT, analysis_results={"confidence_score": 0.5})))
+        self.assertTrue(is_degraded_analysis(dict(WORKFLOW_RESULT, job_matches={"error": "Invalid JSON content"})))
+        self.assertTrue(BulkIngestionService.row_from_result(
+            dict(WORKFLOW_RESULT, analysis_results={"confidence_score": 0.5})
+        )['degraded'])
+
+
+class AccountlessCandidateTests(TestCase):
+    """Imported candidates have no user; views and the admin that look candidates up by user must cope"""
+
+    def setUp(self):
+        self.recruiter = User.objects.create_user(
+            username='recruiter', email='recruiter@example.com', password='x', role='recruiter'
+        )
+        self.imported = Candidate.objects.create(imported_by=self.recruiter, full_name='Jane Doe', email='jane@example.com')
+
+    def test_profile_view_creates_the_users_own_profile(self):
+        user = User.objects.create_user(username='sam', email='sam@example.com', password='x', role='candidate')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/candidates/me')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'sam@example.com')
+        self.assertEqual(Candidate.objects.filter(user=None).get(), self.imported)
+
+    def test_admin_search_lists_candidates_without_a_user(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+        self.client.force_login(admin)
+        for query in ('Jane', 'recruiter'):
+            response = self.client.get('/admin/candidates/candidate/', {'q': query})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.context['cl'].result_list), [self.imported])
+
+
+# Transactional: AnalysisJobQueue.run saves from sync_to_async's thread
+class AnalysisJobQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='x', role='candidate')
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            f.write(b'%PDF-1.4 resume')
+        self.addCleanup(os.remove, f.name)
+        self.stored = StoredResume(path=f.name, name=os.path.basename(f.name), content_sha256='a' * 64, size=15)
+
+    def enqueue(self, seconds_ago=0):
+        job = AnalysisJobQueue.enqueue(self.user, self.stored)
+        ResumeAnalysisJob.objects.filter(id=job.id).update(created_at=timezone.now() - timedelta(seconds=seconds_ago))
+        job.refresh_from_db()
+        return job
+
+    def run_job(self, job, **analyze):
+        with mock.patch.object(ResumeAnalysisService, 'analyze_stored_resume', new=mock.AsyncMock(**analyze)), \
+                mock.patch('candidates.services.traceback.print_exc'):
+            returned = asyncio.run(AnalysisJobQueue.run(job))
+        job.refresh_from_db()
+        return returned
+
+    def test_claims_oldest_first_and_each_job_once(self):
+        newer = self.enqueue(seconds_ago=1)
+        older = self.enqueue(seconds_ago=2)
+        self.assertEqual(AnalysisJobQueue.queue_position(newer), 1)
+
+        claimed = AnalysisJobQueue.claim('worker-1')
+        self.assertEqual(claimed, older)
+        self.assertEqual((claimed.status, claimed.claimed_by, claimed.attempts), ('running', 'worker-1', 1))
+        self.assertEqual(AnalysisJobQueue.claim('worker-2'), newer)
+        self.assertIsNone(AnalysisJobQueue.claim('worker-3'))
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        self.enqueue()
+        fresh = AnalysisJobQueue.claim('worker-1')
+        for attempts in (1, 3):
+            job = self.enqueue()
+            ResumeAnalysisJob.objects.filter(id=job.id).update(
+                status='running', attempts=attempts, started_at=timezone.now() - timedelta(minutes=20)
+            )
+
+        self.assertEqual(AnalysisJobQueue.requeue_stale(lease_seconds=600, max_attempts=3), 1)
+        statuses = dict(ResumeAnalysisJob.objects.exclude(id=fresh.id).values_list('attempts', 'status'))
+        self.assertEqual(statuses, {1: 'queued', 3: 'failed'})
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, 'running')
+
+    def test_busy_pdf_pool_releases_the_job_without_using_an_attempt(self):
+        self.enqueue()
+        job = AnalysisJobQueue.claim('worker-1')
+        self.assertFalse(self.run_job(job, side_effect=PdfPoolBusyError('full')))
+        self.assertEqual((job.status, job.attempts, job.claimed_by, job.started_at), ('queued', 0, '', None))
+
+    def test_failures_and_results_are_recorded(self):
+        self.enqueue()
+        job = AnalysisJobQueue.claim('worker-1')
+        self.assertTrue(self.run_job(job, side_effect=RuntimeError('model crashed')))
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('model crashed', job.error)
+
+        self.enqueue()
+        job = AnalysisJobQueue.claim('worker-1')
+        candidate = Candidate.objects.create(user=self.user, full_name='Sam', resume_url='/media/uploads/a.pdf')
+        self.assertTrue(self.run_job(job, return_value={
+            'report': {'summary': 'ok'}, 'skills_count': 2, 'candidate': candidate, 'reused_analysis_id': None,
+        }))
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.result['data'], {'summary': 'ok'})
+        self.assertEqual(job.result['metadata']['skills_detected'], 2)
+
+    def test_status_view_shows_queue_position_to_the_owner_only(self):
+        self.enqueue(seconds_ago=2)
+        job = self.enqueue(seconds_ago=1)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f'/candidates/resume/jobs/{job.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['status'], response.data['queue_position']), ('queued', 1))
+
+        other = User.objects.create_user(username='kim', email='kim@example.com', password='x', role='candidate')
+        client.force_authenticate(other)
+        self.assertEqual(client.get(f'/candidates/resume/jobs/{job.id}').status_code, 404)
+
+
+class AnalysisJobEventsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sam', email='sam@example.com', password='x', role='candidate')
+        self.job = ResumeAnalysisJob.objects.create(
+            user=self.user, resume_path='/tmp/a.pdf', resume_name='a.pdf', content_sha256='a' * 64,
+            status='running', progress=[{'stage': 'skill_scan', 'result': {'skills': ['Python']}}],
+        )
+
+    def test_events_only_carry_what_changed(self):
+        messages, sent, status, done = AnalysisJobQueue.job_events(self.job, 0, '')
+        self.assertEqual([m.split('\n')[0] for m in messages], ['event: status', 'event: stage'])
+        self.assertEqual((sent, status, done), (1, 'running', False))
+
+        self.assertEqual(AnalysisJobQueue.job_events(self.job, sent, status)[0], [])
+
+        ResumeAnalysisJob.objects.filter(id=self.job.id).update(status='failed', error='model crashed')
+        messages, _, _, done = AnalysisJobQueue.job_events(self.job, sent, status)
+        self.assertTrue(done)
+        self.assertEqual(messages, ['event: status\ndata: {"status": "failed"}\n\n',
+                                    'event: error\ndata: {"error": "model crashed"}\n\n'])
+
+    def test_stream_replays_progress_and_ends_with_the_result(self):
+        ResumeAnalysisJob.objects.filter(id=self.job.id).update(status='completed', result={'status': 'success'})
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f'/candidates/resume/jobs/{self.job.id}/events', HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body, (
+            'event: status\ndata: {"status": "completed"}\n\n'
+            'event: stage\ndata: {"stage": "skill_scan", "result": {"skills": ["Python"]}}\n\n'
+            'event: complete\ndata: {"status": "success"}\n\n'
+        ))
+
+
+class StoreResumeTests(TestCase):
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_dir, ignore_errors=True)
+
+    def test_upload_is_stored_under_its_hash(self):
+        chunks = [b'%PDF-1.4 ', b'resume ', b'body']
+        stored = store_resume(iter(chunks), self.storage_dir)
+        sha = hashlib.sha256(b''.join(chunks)).hexdigest()
+
+        self.assertEqual(stored.content_sha256, sha)
+        self.assertEqual((stored.name, stored.size), (f'{sha[:2]}/{sha}.pdf', 20))
+        with open(stored.path, 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.4 resume body')
+
+    def test_identical_uploads_share_one_file(self):
+        first = store_resume([b'%PDF-1.4 same'], self.storage_dir)
+        second = store_resume([b'%PDF-1.4 ', b'same'], self.storage_dir)
+        self.assertEqual(first, second)
+        self.assertEqual(len(os.listdir(os.path.dirname(first.path))), 1)
+
+    def test_interrupted_upload_leaves_nothing_behind(self):
+        def chunks():
+            yield b'%PDF-1.4 partial'
+            raise ConnectionResetError('client went away')
+
+        with self.assertRaises(ConnectionResetError):
+            store_resume(chunks(), self.storage_dir)
+        self.assertEqual(os.listdir(self.storage_dir), [])
+
+    def test_upload_endpoint_queues_the_stored_file(self):
+        user = User.objects.create_user(username='sam', email='sam@example.com', password='x', role='candidate')
+        client = APIClient()
+        client.force_authenticate(user)
+        upload = SimpleUploadedFile('cv.pdf', b'%PDF-1.4 resume body', content_type='application/pdf')
+        with mock.patch.object(ResumeAnalysisService, 'storage_dir', return_value=self.storage_dir):
+            response = client.post('/candidates/resume/analyze', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 202)
+        job = ResumeAnalysisJob.objects.get(id=response.data['job_id'])
+        self.assertEqual(job.content_sha256, hashlib.sha256(b'%PDF-1.4 resume body').hexdigest())
+        self.assertTrue(os.path.exists(job.resume_path))
@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CandidateProfileView, ApplicationViewSet, 
     InterviewViewSet, RecommendationListView, AIResumeAnalyzeView,
-    ResumeAnalysisListView, CandidateLatestAnalysisView
+    ResumeAnalysisListView, CandidateLatestAnalysisView, AnalysisJobStatusView,
+    AnalysisJobEventsView
 )
 
 router = DefaultRouter()
@@ -14,6 +15,8 @@ urlpatterns = [
     path('me', CandidateProfileView.as_view(), name='candidate_profile'),
     path('profile/analysis', CandidateLatestAnalysisView.as_view(), name='candidate_latest_analysis'),
     path('resume/analyze', AIResumeAnalyzeView.as_view(), name='resume_analyze'),
+    path('resume/jobs/<int:job_id>', AnalysisJobStatusView.as_view(), name='resume_analysis_job'),
+    path('resume/jobs/<int:job_id>/events', AnalysisJobEventsView.as_view(), name='resume_analysis_job_events'),
     path('analysis-history/', ResumeAnalysisListView.as_view(), name='analysis-history'),
     path('recommendations/', RecommendationListView.as_view(), name='recommendations'),
     path('', include(router.urls)),
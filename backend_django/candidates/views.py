@@ -1,14 +1,22 @@
 from rest_framework import viewsets, permissions, generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from django.shortcuts import get_object_or_404
-from .models import Candidate, Application, Interview, Recommendation, ResumeAnalysis
+from django.urls import reverse
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+import asyncio
+import time
+from .models import Candidate, Application, Interview, Recommendation, ResumeAnalysis, ResumeAnalysisJob
 from core.models import Skill, Job
 from .serializers import (
     CandidateSerializer, ApplicationSerializer, 
     InterviewSerializer, RecommendationSerializer,
-    ResumeAnalysisSerializer
+    ResumeAnalysisSerializer, ResumeAnalysisJobSerializer
 )
+from agents.progress import SSE_KEEPALIVE
 
 class CandidateProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = CandidateSerializer
@@ -69,10 +77,16 @@ class ResumeAnalysisListView(generics.ListAPIView):
     def get_queryset(self):
         return ResumeAnalysis.objects.filter(candidate__user=self.request.user).order_by('-created_at')
 
-from .services import ResumeAnalysisService
-from asgiref.sync import async_to_sync
+from .services import ResumeAnalysisService, AnalysisJobQueue
 
 class AIResumeAnalyzeView(APIView):
+    """Queue an uploaded resume for analysis.
+
+    Only the file is stored here; the AI pipeline runs in the
+    process_analysis_jobs worker. Responds 202 with the job id, the URL to
+    poll for the result (AnalysisJobStatusView) and the URL of its progress
+    stream (AnalysisJobEventsView).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -80,31 +94,108 @@ class AIResumeAnalyzeView(APIView):
             return Response({"error": "No resume file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
         
         resume_file = request.FILES['file']
+        # ?force=true (or a "force" form field) re-runs the AI pipeline even for a resume analyzed before
+        force = str(request.query_params.get('force', request.data.get('force', ''))).lower() in ('1', 'true', 'yes')
         
         try:
-            # Call service to handle extraction, analysis, persistence and recommendations
-            # Use async_to_sync to run async service from sync view context
-            result = async_to_sync(ResumeAnalysisService.process_resume_upload)(request.user, resume_file)
-
-            return Response({
-                "status": "success",
-                "message": "Resume analyzed successfully",
-                "data": result['report'],
-                "metadata": {
-                    "skills_detected": result['skills_count'],
-                    "resume_url": result['candidate'].resume_url
-                }
-            }, status=status.HTTP_200_OK)
-
+            stored = ResumeAnalysisService.store_upload(resume_file)
+            job = AnalysisJobQueue.enqueue(request.user, stored, force=force)
         except Exception as e:
             import traceback
             traceback.print_exc()
             return Response({
                 "status": "error",
-                "message": f"AI Processing failed: {str(e)}",
+                "message": f"Could not queue the resume: {str(e)}",
                 "error": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        status_url = reverse('resume_analysis_job', args=[job.id])
+        return Response({
+            "status": "queued",
+            "message": "Resume queued for analysis",
+            "job_id": job.id,
+            "status_url": status_url,
+            "events_url": reverse('resume_analysis_job_events', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED, headers={"Location": status_url})
+
+
+class AnalysisJobStatusView(APIView):
+    """State of one of the user's analysis jobs.
+
+    "progress" lists the stages completed so far with their results, so
+    skills and matches can be shown before the recommendation is ready;
+    "result" holds the full analysis once completed.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(ResumeAnalysisJob, id=job_id, user=request.user)
+        data = ResumeAnalysisJobSerializer(job).data
+        if job.status == 'queued':
+            data['queue_position'] = AnalysisJobQueue.queue_position(job)
+        return Response(data)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients send Accept: text/event-stream; the body is streamed, never rendered"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class AnalysisJobEventsView(APIView):
+    """Server-Sent Events for one of the user's analysis jobs.
+
+    Sends "status" on every status change, "stage" with each workflow
+    stage's result as the worker completes it, then "complete" (with the
+    same body as the status endpoint's result) or "error". Under gunicorn's
+    sync workers an open stream holds a worker; polling the status endpoint
+    is the cheap alternative there.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    poll_interval = 0.5
+    keepalive_interval = 15
+
+    def get(self, request, job_id):
+        job = get_object_or_404(ResumeAnalysisJob, id=job_id, user=request.user)
+        # Django buffers sync iterators under ASGI and async ones under WSGI, so match the server
+        events = self._async_events(job) if isinstance(request._request, ASGIRequest) else self._events(job)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _events(self, job):
+        sent, last_status, idle = 0, '', 0.0
+        while True:
+            messages, sent, last_status, done = AnalysisJobQueue.job_events(job, sent, last_status)
+            yield from messages
+            if done:
+                return
+            idle = 0.0 if messages else idle + self.poll_interval
+            if idle >= self.keepalive_interval:
+                idle = 0.0
+                yield SSE_KEEPALIVE
+            time.sleep(self.poll_interval)
+
+    async def _async_events(self, job):
+        sent, last_status, idle = 0, '', 0.0
+        while True:
+            messages, sent, last_status, done = await sync_to_async(AnalysisJobQueue.job_events)(job, sent, last_status)
+            for message in messages:
+                yield message
+            if done:
+                return
+            idle = 0.0 if messages else idle + self.poll_interval
+            if idle >= self.keepalive_interval:
+                idle = 0.0
+                yield SSE_KEEPALIVE
+            await asyncio.sleep(self.poll_interval)
+
 
 class CandidateLatestAnalysisView(APIView):
     permission_classes = [permissions.IsAuthenticated]
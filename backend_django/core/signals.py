@@ -0,0 +1,54 @@
+from django.db import close_old_connections, connection
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from agents.skill_matcher import set_vocabulary_loader, update_skill_source, drop_skill_source
+from .models import Skill, Job
+
+
+def _job_terms(job):
+    requirements = job.requirements or []
+    if isinstance(requirements, str):
+        requirements = [requirements]
+    return [str(requirement) for requirement in requirements]
+
+
+def skill_vocabulary():
+    """(source key, terms) for every skill and active job, for the fast-path skill matcher"""
+    try:
+        vocabulary = [(f"skill:{skill_id}", [name]) for skill_id, name in Skill.objects.values_list('id', 'name')]
+        vocabulary.extend(
+            (f"job:{job.id}", _job_terms(job)) for job in Job.objects.filter(is_active=True).only('id', 'requirements')
+        )
+    finally:
+        # The skill scan loads from asyncio.to_thread workers, whose connections
+        # no request cycle ever closes
+        if not connection.in_atomic_block:
+            close_old_connections()
+    return vocabulary
+
+
+set_vocabulary_loader(skill_vocabulary)
+
+
+@receiver(post_save, sender=Skill)
+def skill_saved(sender, instance, **kwargs):
+    update_skill_source(f"skill:{instance.pk}", [instance.name])
+
+
+@receiver(post_delete, sender=Skill)
+def skill_deleted(sender, instance, **kwargs):
+    drop_skill_source(f"skill:{instance.pk}")
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, **kwargs):
+    if instance.is_active:
+        update_skill_source(f"job:{instance.pk}", _job_terms(instance))
+    else:
+        drop_skill_source(f"job:{instance.pk}")
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    drop_skill_source(f"job:{instance.pk}")
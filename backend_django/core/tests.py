@@ -1,3 +1,52 @@
-from django.test import TestCase
+import asyncio
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.test import TransactionTestCase
+
+from agents import skill_matcher
+from agents.messages import AgentMessage
+from agents.skill_scanner_agent import SkillScannerAgent
+from authentication.models import User
+from .models import Company, Job, Skill
+from .signals import skill_vocabulary
+
+
+# Transactional: the vocabulary is loaded from other threads, which must see the rows
+class SkillVocabularyTests(TransactionTestCase):
+    def setUp(self):
+        recruiter = User.objects.create_user(username='recruiter', email='r@example.com', password='x', role='recruiter')
+        company = Company.objects.create(user=recruiter, name='Acme')
+        Skill.objects.create(name='Python')
+        Job.objects.create(company=company, title='Platform', requirements=['Kubernetes', 'Go'])
+        Job.objects.create(company=company, title='Closed', requirements=['COBOL'], is_active=False)
+        # Rebuild from the database on next use
+        skill_matcher.set_vocabulary_loader(skill_vocabulary)
+        self.addCleanup(skill_matcher.set_vocabulary_loader, skill_vocabulary)
+
+    def test_vocabulary_has_skills_and_active_job_requirements(self):
+        terms = {term for _, source_terms in skill_vocabulary() for term in source_terms}
+        self.assertEqual(terms, {'Python', 'Kubernetes', 'Go'})
+
+    def test_loading_from_a_worker_thread_closes_its_connection(self):
+        # (The in-memory test database ignores close(), so check the call)
+        with mock.patch('core.signals.close_old_connections') as close:
+            worker = threading.Thread(target=skill_vocabulary)
+            worker.start()
+            worker.join()
+        close.assert_called_once_with()
+
+    def test_skill_scan_uses_the_database_vocabulary(self):
+        scan = asyncio.run(SkillScannerAgent().run(
+            [AgentMessage({"text": "Go and Kubernetes on AWS, some Python, no COBOL"})]
+        ))
+        self.assertEqual(scan['skills_analysis']['technical_skills'], ['Go', 'Kubernetes', 'Python'])
+
+    def test_saved_jobs_update_the_built_matcher(self):
+        matcher = skill_matcher.get_skill_matcher()
+        job = Job.objects.get(title='Closed')
+        job.is_active = True
+        job.save()
+        self.assertEqual(matcher.extract('COBOL and Python'), ['COBOL', 'Python'])
+        job.delete()
+        self.assertEqual(matcher.extract('COBOL and Python'), ['Python'])
@@ -15,6 +15,19 @@ python manage.py migrate --noinput
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+# One copy of the local model for all workers; docker-compose.prod.yml gives it its own container
+if [ "${RUN_INFERENCE_SERVICE:-0}" = "1" ]; then
+    export AI_INFERENCE_SOCKET="${AI_INFERENCE_SOCKET:-/tmp/ai-recruiter-inference.sock}"
+    echo "Starting inference service on $AI_INFERENCE_SOCKET..."
+    python -m agents.inference_service &
+fi
+
+# Resume analyses run in the job worker; docker-compose.prod.yml gives it its own container
+if [ "${RUN_ANALYSIS_WORKER:-0}" = "1" ]; then
+    echo "Starting analysis worker..."
+    python manage.py process_analysis_jobs &
+fi
+
 # Start Gunicorn
 echo "Starting Gunicorn..."
 exec gunicorn ai_recruiter_django.wsgi:application \
@@ -146,3 +146,20 @@ CREATE TABLE IF NOT EXISTS job_skills (
     skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
     PRIMARY KEY (job_id, skill_id)
 );
+
+-- =========================================================
+-- 11) RESUME ANALYSES Table (reuse analyses of identical uploads)
+-- =========================================================
+CREATE TABLE IF NOT EXISTS resume_analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id INTEGER REFERENCES candidates(id) ON DELETE SET NULL,
+    content_sha256 TEXT NOT NULL,  -- Hash of the uploaded file bytes
+    text_sha256 TEXT,  -- Hash of the normalized extracted text
+    report TEXT NOT NULL,  -- JSON format for the consolidated AI report
+    skills TEXT,  -- JSON format for detected skills
+    reused_from INTEGER REFERENCES resume_analyses(id) ON DELETE SET NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_resume_analyses_content ON resume_analyses(content_sha256);
+CREATE INDEX IF NOT EXISTS idx_resume_analyses_text ON resume_analyses(text_sha256);
@@ -153,3 +153,20 @@ CREATE TABLE ai_logs (
     created_at DATETIME2 DEFAULT SYSUTCDATETIME()
 );
 GO
+
+-- 9) RESUME ANALYSES (reuse analyses of identical uploads)
+CREATE TABLE resume_analyses (
+    id BIGINT IDENTITY(1,1) PRIMARY KEY,
+    candidate_id BIGINT REFERENCES candidates(id) ON DELETE SET NULL,
+    content_sha256 CHAR(64) NOT NULL, -- Hash of the uploaded file bytes
+    text_sha256 CHAR(64), -- Hash of the normalized extracted text
+    report NVARCHAR(MAX) NOT NULL, -- JSON consolidated report
+    skills NVARCHAR(MAX), -- JSON
+    reused_from BIGINT REFERENCES resume_analyses(id),
+    created_at DATETIME2 DEFAULT SYSUTCDATETIME()
+);
+GO
+
+CREATE INDEX idx_resume_analyses_content ON resume_analyses(content_sha256);
+CREATE INDEX idx_resume_analyses_text ON resume_analyses(text_sha256);
+GO
@@ -0,0 +1,85 @@
+"""Throughput of the local model against batch size (CPU).
+
+Fires N concurrent generation requests at a GenerationBatcher for each batch
+size and reports requests/s and generated tokens/s.
+
+    python -m tools.bench_batching --model-path fine-tuning-results --batch-sizes 1,2,4,8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.batching import GenerationBatcher
+from agents.model_registry import model_registry, get_default_model_path
+
+DATA_SET = os.path.join(os.path.dirname(__file__), "..", "agents", "data-set.json")
+
+
+def load_prompts(count: int):
+    with open(DATA_SET) as f:
+        examples = json.load(f)
+    prompts = [f"[INST] Extract structured JSON. Resume:\n{ex['input']} [/INST]\n" for ex in examples]
+    return [prompts[i % len(prompts)] for i in range(count)]
+
+
+def run(batcher: GenerationBatcher, encoded, params, concurrency: int):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(batcher.generate, ids, params) for ids in encoded]
+        results = [f.result() for f in futures]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=get_default_model_path())
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=20.0)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    import torch
+
+    torch.manual_seed(0)
+    loaded = model_registry.get(args.model_path)
+    if loaded is None:
+        sys.exit(f"Model not found at {args.model_path}")
+
+    encoded = [
+        loaded.tokenizer.encode(p, truncation=True, max_length=512) for p in load_prompts(args.requests)
+    ]
+    # Greedy decoding with a fixed length so every batch size does the same amount of work
+    params = {"max_new_tokens": args.max_new_tokens, "min_new_tokens": args.max_new_tokens, "do_sample": False}
+
+    # Warm-up so the first measurement doesn't pay for lazy initialisation
+    loaded.model.generate(torch.tensor([encoded[0]]), max_new_tokens=2, do_sample=False)
+
+    results = []
+    print(f"{'batch':>6} {'seconds':>9} {'req/s':>8} {'tok/s':>9} {'avg batch':>10}")
+    for size in [int(s) for s in args.batch_sizes.split(",")]:
+        batcher = GenerationBatcher(loaded, max_batch_size=size, max_wait_ms=args.max_wait_ms)
+        seconds, _ = run(batcher, encoded, params, concurrency=args.requests)
+        row = {
+            "batch_size": size,
+            "seconds": round(seconds, 3),
+            "requests_per_s": round(args.requests / seconds, 2),
+            "tokens_per_s": round(args.requests * args.max_new_tokens / seconds, 1),
+            "avg_batch": batcher.stats()["avg_batch"],
+        }
+        results.append(row)
+        print(f"{size:>6} {row['seconds']:>9} {row['requests_per_s']:>8} {row['tokens_per_s']:>9} {row['avg_batch']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model_path": args.model_path, "threads": torch.get_num_threads(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Import-time benchmark of worker boot and management commands.
+
+Runs each scenario in a fresh interpreter with `python -X importtime`, a
+few times, and reports the wall time, the total time spent importing, the
+heaviest top-level imports and which heavy dependencies (torch,
+transformers, pdfminer, ...) got loaded although nothing was inferred yet.
+
+    python -m tools.bench_import --output imports-main.json
+    python -m tools.bench_import --compare imports-main.json --forbid torch,transformers,pdfminer
+
+Scenarios: agents (the shared agent modules), django_worker (WSGI app
+plus URLconf, what a gunicorn worker loads), django_check (manage.py check,
+the system checks migrate/collectstatic run first) and fastapi_worker
+(import app.main). Scenarios whose dependencies are missing are reported
+as failed and skipped. --forbid exits non-zero when a listed module is
+imported by any scenario.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from tools.bench_pipeline import git_commit
+
+DJANGO_ROOT = os.path.join(ROOT, "backend_django")
+FASTAPI_ROOT = os.path.join(ROOT, "ai-recruiter-backend")
+
+HEAVY_MODULES = ("torch", "transformers", "onnxruntime", "optimum", "pdfminer", "PyPDF2", "swarm", "httpx", "numpy")
+
+SCENARIOS = {
+    # The root copy of the matcher needs the SQL Server driver, so the agents are imported without it
+    "agents": (ROOT, ["-c", "import agents.base_agent, agents.extractor_agent, agents.skill_scanner_agent"]),
+    "django_worker": (
+        DJANGO_ROOT,
+        ["-c", "import ai_recruiter_django.wsgi; from django.urls import get_resolver; get_resolver().url_patterns"],
+    ),
+    "django_check": (DJANGO_ROOT, ["manage.py", "check"]),
+    "fastapi_worker": (FASTAPI_ROOT, ["-c", "import app.main"]),
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, Any]:
+    """Total import time, the heaviest top-level imports and the heavy modules that were loaded"""
+    total_us = 0
+    top_level: Dict[str, int] = {}
+    loaded = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        total_us += int(self_us)
+        module = name.strip()
+        if module.split(".")[0] in HEAVY_MODULES:
+            loaded.add(module.split(".")[0])
+        # Top-level entries are the ones not indented under a parent import
+        if not name[1:].startswith(" "):
+            top_level[module] = top_level.get(module, 0) + int(cumulative_us)
+    heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:8]
+    return {
+        "import_ms": total_us / 1000,
+        "heaviest": [{"module": module, "ms": round(us / 1000, 1)} for module, us in heaviest],
+        "heavy_modules": sorted(loaded),
+    }
+
+
+def run_scenario(name: str, repeat: int) -> Optional[Dict[str, Any]]:
+    cwd, argv = SCENARIOS[name]
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    walls, imports, last = [], [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", *argv], cwd=cwd, env=env, capture_output=True, text=True
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        if completed.returncode != 0:
+            error = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+            print(f"{name} failed: {error[-1] if error else completed.returncode}", file=sys.stderr)
+            return None
+        last = parse_importtime(completed.stderr)
+        walls.append(wall_ms)
+        imports.append(last["import_ms"])
+    return {
+        "wall_ms": round(statistics.median(walls), 1),
+        "import_ms": round(statistics.median(imports), 1),
+        "heaviest": last["heaviest"],
+        "heavy_modules": last["heavy_modules"],
+    }
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nChange vs {baseline['meta'].get('commit')} (negative is better):")
+    for name, result in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if result and old:
+            print(f"  {name:<15} wall {delta(result['wall_ms'], old['wall_ms']):>8}  "
+                  f"imports {delta(result['import_ms'], old['import_ms']):>8}  "
+                  f"heavy {','.join(old['heavy_modules']) or '-'} -> {','.join(result['heavy_modules']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario (the median is reported)")
+    parser.add_argument("--forbid", default="", help="Comma-separated modules no scenario may import")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"meta": {"commit": git_commit(), "python": sys.version.split()[0]}, "scenarios": {}}
+    for name in args.scenarios.split(","):
+        report["scenarios"][name] = run_scenario(name, args.repeat)
+
+    print(f"\n{'scenario':<15} {'wall ms':>8} {'import ms':>10}  heavy modules loaded")
+    for name, result in report["scenarios"].items():
+        if result is None:
+            print(f"{name:<15} {'failed':>8}")
+            continue
+        print(f"{name:<15} {result['wall_ms']:>8} {result['import_ms']:>10}  {', '.join(result['heavy_modules']) or '-'}")
+        print("    " + ", ".join(f"{entry['module']} {entry['ms']}" for entry in result["heaviest"][:5]))
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    forbidden = {module for module in args.forbid.split(",") if module}
+    offenders = {
+        name: sorted(forbidden.intersection(result["heavy_modules"]))
+        for name, result in report["scenarios"].items()
+        if result and forbidden.intersection(result["heavy_modules"])
+    }
+    if offenders:
+        print(f"\nForbidden imports at startup: {offenders}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Accuracy, latency and memory of the local inference backends.
+
+Runs the agents/data-set.json inputs greedily through each backend
+(AI_INFERENCE_BACKEND=torch fp32 vs onnx int8), each in its own process so
+RSS numbers aren't mixed, then compares every backend's answers against
+the fp32 torch answers.
+
+    python -m tools.export_onnx --model-path fine-tuning-results
+    python -m tools.bench_inference_backends --model-path fine-tuning-results --output backends.json
+
+Exits non-zero when a backend's mean similarity to fp32 falls below
+--min-similarity, so it can gate a re-export in CI.
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+DATA_SET = os.path.join(ROOT, "agents", "data-set.json")
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round((max_rss if sys.platform == "darwin" else max_rss * 1024) / (1024 * 1024), 1)
+
+
+def run_worker(model_path: str, limit: int, max_new_tokens: int) -> dict:
+    """Runs in the child process: load the backend from the environment and answer every prompt"""
+    from agents.batching import GenerationBatcher
+    from agents.extractor_agent import ExtractorAgent
+    from agents.model_registry import model_registry, _current_rss_bytes
+
+    rss_before = _current_rss_bytes()
+    loaded = model_registry.get(model_path)
+    if loaded is None:
+        raise SystemExit(f"Could not load {model_path}")
+    # Same path as serving: batcher with the agent instructions as prefix, one request at a time
+    batcher = GenerationBatcher(loaded, max_batch_size=1, max_wait_ms=0)
+    tokenizer = loaded.tokenizer
+    prefix_ids = tokenizer.encode(ExtractorAgent().instructions)
+    params = {"max_new_tokens": max_new_tokens, "do_sample": False}
+
+    with open(DATA_SET) as f:
+        examples = json.load(f)[:limit]
+
+    answers, latencies, generated = [], [], 0
+    for example in examples:
+        input_ids = tokenizer.encode(example["input"])
+        started = time.perf_counter()
+        text = batcher.generate(input_ids, params, prefix_ids=prefix_ids)
+        latencies.append((time.perf_counter() - started) * 1000)
+        answers.append(text)
+        generated += max(len(tokenizer.encode(text)) - len(prefix_ids) - len(input_ids), 0)
+
+    return {
+        "backend": loaded.backend,
+        "load_seconds": round(loaded.load_seconds, 2),
+        "weights_mb": loaded.memory_report()["weights_mb"],
+        "rss_after_load_mb": round((rss_before + loaded.rss_delta_bytes) / (1024 * 1024), 1),
+        "peak_rss_mb": _peak_rss_mb(),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 1),
+            "p95": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 1),
+            "mean": round(statistics.fmean(latencies), 1),
+        },
+        "tokens_per_second": round(generated / (sum(latencies) / 1000), 1) if latencies else 0.0,
+        "answers": answers,
+    }
+
+
+def _parsed(text: str):
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+
+def compare(reference: list, answers: list) -> dict:
+    ratios = [difflib.SequenceMatcher(None, ref, ans).ratio() for ref, ans in zip(reference, answers)]
+    same_json = [
+        _parsed(ref) == _parsed(ans) for ref, ans in zip(reference, answers) if _parsed(ref) is not None
+    ]
+    return {
+        "exact_match": round(sum(ref == ans for ref, ans in zip(reference, answers)) / len(reference), 3),
+        "mean_similarity": round(statistics.fmean(ratios), 3),
+        "min_similarity": round(min(ratios), 3),
+        "same_json": round(sum(same_json) / len(same_json), 3) if same_json else None,
+    }
+
+
+def main():
+    from agents.model_registry import get_default_model_path, INFERENCE_BACKENDS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=get_default_model_path())
+    parser.add_argument("--backends", default=",".join(INFERENCE_BACKENDS))
+    parser.add_argument("--limit", type=int, default=19, help="Number of data-set examples")
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--min-similarity", type=float, default=0.9)
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(run_worker(args.model_path, args.limit, args.max_new_tokens), sys.stdout)
+        return
+
+    results = {}
+    for backend in args.backends.split(","):
+        print(f"Running {backend}...", file=sys.stderr)
+        completed = subprocess.run(
+            [sys.executable, "-m", "tools.bench_inference_backends", "--worker", backend,
+             "--model-path", args.model_path, "--limit", str(args.limit),
+             "--max-new-tokens", str(args.max_new_tokens)],
+            cwd=ROOT,
+            env=dict(os.environ, AI_INFERENCE_BACKEND=backend, AI_LLM_CACHE_ENABLED="0"),
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(f"{backend} failed:\n{completed.stderr[-2000:]}", file=sys.stderr)
+            continue
+        # The agents print debug lines; the JSON result is the last line
+        results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    reference = results.get("torch")
+    print(f"\n{'backend':<8} {'load s':>7} {'weights MB':>11} {'peak RSS MB':>12} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'tok/s':>7} {'exact':>6} {'similar':>8} {'json':>6}")
+    failed = False
+    for backend, result in results.items():
+        if reference is not None:
+            result["accuracy_vs_fp32"] = compare(reference["answers"], result["answers"])
+        accuracy = result.get("accuracy_vs_fp32", {})
+        print(f"{backend:<8} {result['load_seconds']:>7} {result['weights_mb']:>11} {result['peak_rss_mb']:>12} "
+              f"{result['latency_ms']['p50']:>8} {result['latency_ms']['p95']:>8} {result['tokens_per_second']:>7} "
+              f"{accuracy.get('exact_match', '-'):>6} {accuracy.get('mean_similarity', '-'):>8} "
+              f"{str(accuracy.get('same_json', '-')):>6}")
+        if accuracy and accuracy["mean_similarity"] < args.min_similarity:
+            failed = True
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.output}")
+    if failed:
+        print(f"\nA backend is below --min-similarity {args.min_similarity} against fp32", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Concurrent PDF uploads: parsing on the event loop vs the PDF process pool.
+
+Parses the corpus (resumes/*.pdf plus generated resumes, each repeated
+--copies times) as concurrent uploads, first inline on the event loop (how
+extract_text_from_pdf used to work), then through PdfExtractionPool with
+each worker count. Reports docs/s, per-document latency, speedup over one
+worker and the longest event loop stall seen by a 10ms heartbeat, which is
+how long every other request on that worker would have waited.
+
+    python -m tools.bench_pdf_pool --workers 1,2,4,8 --copies 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from agents.pdf_pool import PdfExtractionPool, _extract_pypdf2
+from tools.bench_pipeline import CorpusItem, build_corpus, git_commit, summarize
+
+HEARTBEAT_S = 0.01
+
+
+async def _heartbeat(stop: asyncio.Event, lags: List[float]) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_S
+        await asyncio.sleep(HEARTBEAT_S)
+        lags.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+
+async def run_scenario(corpus: List[CorpusItem], pool: PdfExtractionPool = None) -> Dict[str, Any]:
+    latencies: List[float] = []
+    lags: List[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+
+    async def upload(content: bytes) -> None:
+        # Yield first so the uploads interleave the way concurrent requests would
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        if pool is None:
+            _extract_pypdf2(content, 0)
+        else:
+            await pool.extract(content)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(upload(content) for _, content in corpus))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await heartbeat
+
+    return {
+        "documents": len(corpus),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_docs_per_s": round(len(corpus) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "max_loop_stall_ms": round(max(lags, default=0.0), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes-dir", default=os.path.join(ROOT, "resumes"))
+    parser.add_argument("--synthetic", type=int, default=20, help="Generated resumes added to the corpus")
+    parser.add_argument("--copies", type=int, default=10, help="Times each document is uploaded")
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.resumes_dir, args.synthetic, args.seed) * args.copies
+    # Every document is accepted at once; this measures parsing, not admission control
+    queue_depth = len(corpus)
+
+    report: Dict[str, Any] = {
+        "meta": {"commit": git_commit(), "cpus": os.cpu_count(), "documents": len(corpus)},
+        "scenarios": {},
+    }
+    print(f"Parsing {len(corpus)} PDFs on {os.cpu_count()} CPUs...")
+    report["scenarios"]["inline"] = asyncio.run(run_scenario(corpus))
+    for workers in [int(w) for w in args.workers.split(",")]:
+        pool = PdfExtractionPool(max_workers=workers, queue_depth=queue_depth, max_pages=args.max_pages)
+        # Process start-up is paid once per web worker, not per upload
+        asyncio.run(run_scenario(corpus[:workers], pool))
+        report["scenarios"][f"pool-{workers}"] = asyncio.run(run_scenario(corpus, pool))
+        pool.shutdown()
+
+    single = report["scenarios"].get("pool-1", {}).get("throughput_docs_per_s")
+    print(f"\n{'scenario':<10} {'docs/s':>8} {'speedup':>8} {'p50 ms':>9} {'p95 ms':>9} {'loop stall ms':>14}")
+    for name, result in report["scenarios"].items():
+        speedup = f"{result['throughput_docs_per_s'] / single:.2f}x" if single and name != "inline" else ""
+        latency = result["latency_ms"]
+        print(f"{name:<10} {result['throughput_docs_per_s']:>8} {speedup:>8} {latency.get('p50', 0):>9} "
+              f"{latency.get('p95', 0):>9} {result['max_loop_stall_ms']:>14}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""End-to-end benchmark of the resume pipeline (PDF text -> OrchestratorAgent).
+
+Runs a corpus of PDFs (resumes/*.pdf plus generated synthetic resumes)
+through PDF extraction and OrchestratorAgent.process_application at several
+concurrency levels, against the in-process fake Ollama unless --ollama-host
+is given. Uses the Django backend (ORM-backed matcher) on a throwaway SQLite
+database seeded with the sample jobs.
+
+Reports per-stage latency percentiles, throughput, peak RSS and prompt
+tokens per stage, plus microbenchmarks of PDF extraction, matching and DB
+persistence on their own. Results are written as JSON; --compare prints the
+change against an earlier run.
+
+    python -m tools.bench_pipeline --profile gpu --concurrency 1,4,16 --output bench.json
+    python -m tools.bench_pipeline --compare bench-main.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DJANGO_ROOT = os.path.join(ROOT, "backend_django")
+sys.path.append(ROOT)
+
+from tools.fake_ollama import SKILL_VOCABULARY, start_fake_ollama
+
+CorpusItem = Tuple[str, bytes]
+
+
+# --- Corpus ---
+def minimal_pdf(lines: List[str]) -> bytes:
+    """Single-page PDF with the given lines of Helvetica text"""
+
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    stream = "BT /F1 10 Tf 50 760 Td 12 TL\n" + "".join(f"({escape(line)}) '\n" for line in lines) + "ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+def synthetic_resume(index: int, rng: random.Random) -> List[str]:
+    years = rng.randint(1, 15)
+    skills = rng.sample(SKILL_VOCABULARY, rng.randint(3, 8))
+    lines = [
+        f"Candidate {index}",
+        f"candidate{index}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY",
+        f"Software engineer with {years} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "EXPERIENCE",
+    ]
+    for job in range(rng.randint(1, 4)):
+        lines += [
+            f"Engineer, Company {rng.randint(1, 500)} ({2024 - job * 3 - 3} - {2024 - job * 3})",
+            f"- Built services with {rng.choice(skills)} serving {rng.randint(1, 90)}k users",
+            f"- Reduced latency by {rng.randint(10, 70)}% using {rng.choice(skills)}",
+        ]
+    lines += ["", "EDUCATION", "BSc Computer Science", "", "SKILLS", ", ".join(skills)]
+    return lines
+
+
+def build_corpus(resumes_dir: str, synthetic: int, seed: int) -> List[CorpusItem]:
+    corpus: List[CorpusItem] = []
+    if os.path.isdir(resumes_dir):
+        for name in sorted(os.listdir(resumes_dir)):
+            if name.lower().endswith(".pdf"):
+                with open(os.path.join(resumes_dir, name), "rb") as f:
+                    corpus.append((name, f.read()))
+    rng = random.Random(seed)
+    for index in range(synthetic):
+        corpus.append((f"synthetic-{index:04d}.pdf", minimal_pdf(synthetic_resume(index, rng))))
+    return corpus
+
+
+# --- Environment ---
+def setup_django(db_path: str) -> None:
+    sys.path.insert(0, DJANGO_ROOT)
+    os.environ["DB_NAME"] = db_path
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ai_recruiter_django.settings")
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0, interactive=False)
+
+    from core.models import Job
+
+    if not Job.objects.exists():
+        call_command("seed_jobs", verbosity=0)
+
+
+def peak_rss_mb() -> float:
+    import resource
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return round((max_rss if sys.platform == "darwin" else max_rss * 1024) / (1024 * 1024), 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 1)
+
+    return {
+        "count": len(values),
+        "mean": round(statistics.fmean(values), 1),
+        "p50": pct(50),
+        "p90": pct(90),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": round(ordered[-1], 1),
+    }
+
+
+# --- End to end ---
+async def run_level(corpus: List[CorpusItem], concurrency: int) -> Dict[str, Any]:
+    from agents.orchestrator import OrchestratorAgent
+    from utils_pdf import extract_text_from_pdf
+
+    semaphore = asyncio.Semaphore(concurrency)
+    stage_ms: Dict[str, List[float]] = {"pdf_extraction": []}
+    prompt_tokens: Dict[str, List[int]] = {}
+    end_to_end: List[float] = []
+    failures = 0
+
+    async def process(name: str, content: bytes) -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            # Same call the upload endpoints make, on the event loop
+            text = await extract_text_from_pdf(content)
+            stage_ms["pdf_extraction"].append((time.perf_counter() - started) * 1000)
+            try:
+                result = await OrchestratorAgent().process_application({"text": text, "filename": name})
+            except Exception as e:
+                print(f"Warning: {name} failed: {e}")
+                failures += 1
+                return
+            end_to_end.append((time.perf_counter() - started) * 1000)
+            for stage, timing in result.get("stage_timings", {}).items():
+                stage_ms.setdefault(stage, []).append(timing.get("duration_ms", 0.0))
+                prompt_tokens.setdefault(stage, []).append(timing.get("prompt_tokens", 0))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(process(name, content) for name, content in corpus))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "documents": len(corpus),
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_docs_per_s": round(len(end_to_end) / elapsed, 3) if elapsed else 0.0,
+        "end_to_end_ms": summarize(end_to_end),
+        "stages_ms": {stage: summarize(values) for stage, values in stage_ms.items()},
+        "prompt_tokens_per_doc": {
+            stage: round(statistics.fmean(values), 1) for stage, values in prompt_tokens.items() if values
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# --- Microbenchmarks ---
+def _time_calls(fn, repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def micro_pdf_extraction(corpus: List[CorpusItem], repeat: int) -> Dict[str, Any]:
+    from utils_pdf import extract_text_from_pdf
+
+    documents = corpus[: min(len(corpus), 20)]
+    stats = _time_calls(lambda: [asyncio.run(extract_text_from_pdf(content)) for _, content in documents], repeat)
+    stats["documents_per_call"] = len(documents)
+    return stats
+
+
+def micro_matching(repeat: int) -> Dict[str, Any]:
+    from agents.matcher_agent import MatcherAgent
+    from agents.messages import AgentMessage
+
+    matcher = MatcherAgent()
+    message = AgentMessage(
+        {"skills_analysis": {"technical_skills": ["Python", "Docker", "AWS", "React"], "experience_level": "Senior"}}
+    )
+
+    async def many():
+        for _ in range(10):
+            await matcher.run([message])
+
+    stats = _time_calls(lambda: asyncio.run(many()), repeat)
+    stats["matches_per_call"] = 10
+    return stats
+
+
+def micro_db_persistence(repeat: int) -> Dict[str, Any]:
+    from django.db import transaction
+    from authentication.models import User
+    from candidates.models import Candidate, ResumeAnalysis
+    from candidates.services import ResumeAnalysisService
+    from core.models import Skill
+
+    skills = ["Python", "Docker", "AWS", "React", "SQL"]
+
+    def persist():
+        # Everything the upload service writes for one analysis, rolled back afterwards
+        with transaction.atomic():
+            user = User.objects.create(username=f"bench-{time.perf_counter_ns()}", email="bench@example.com")
+            candidate = Candidate.objects.create(user=user, full_name="Bench", email=user.email)
+            candidate.skills.set([Skill.objects.get_or_create(name=name)[0] for name in skills])
+            candidate.analysis_report = {"skills": skills}
+            candidate.save()
+            ResumeAnalysis.objects.create(
+                candidate=candidate, resume_url="/media/uploads/bench.pdf", extracted_skills=skills
+            )
+            ResumeAnalysisService._generate_recommendations(candidate, skills)
+            transaction.set_rollback(True)
+
+    return _time_calls(persist, repeat)
+
+
+# --- Reporting ---
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nCommit {report['meta']['commit']}  corpus {report['meta']['documents']} PDFs  "
+          f"profile {report['meta']['profile']}")
+    print(f"{'conc':>5} {'docs/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>8} {'fail':>5}")
+    for level in report["levels"]:
+        e2e = level["end_to_end_ms"]
+        print(f"{level['concurrency']:>5} {level['throughput_docs_per_s']:>8} {e2e.get('p50', 0):>9} "
+              f"{e2e.get('p95', 0):>9} {e2e.get('p99', 0):>9} {level['peak_rss_mb']:>8} {level['failures']:>5}")
+
+    last = report["levels"][-1]
+    print(f"\nStages at concurrency {last['concurrency']}:")
+    print(f"{'stage':<16} {'p50 ms':>9} {'p95 ms':>9} {'prompt tok':>11}")
+    for stage, stats in last["stages_ms"].items():
+        tokens = last["prompt_tokens_per_doc"].get(stage, "")
+        print(f"{stage:<16} {stats.get('p50', 0):>9} {stats.get('p95', 0):>9} {tokens:>11}")
+
+    if report.get("micro"):
+        print("\nMicrobenchmarks (ms per call):")
+        for name, stats in report["micro"].items():
+            print(f"{name:<16} p50 {stats.get('p50', 0):>8}  p95 {stats.get('p95', 0):>8}")
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    def delta(new: float, old: float) -> str:
+        if not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\nChange vs {baseline['meta'].get('commit')} (negative latency is better):")
+    old_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in report["levels"]:
+        old = old_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        print(f"  concurrency {level['concurrency']}: "
+              f"throughput {delta(level['throughput_docs_per_s'], old['throughput_docs_per_s'])}, "
+              f"p50 {delta(level['end_to_end_ms'].get('p50', 0), old['end_to_end_ms'].get('p50', 0))}, "
+              f"p95 {delta(level['end_to_end_ms'].get('p95', 0), old['end_to_end_ms'].get('p95', 0))}")
+        for stage, stats in level["stages_ms"].items():
+            old_stats = old["stages_ms"].get(stage)
+            if old_stats:
+                print(f"    {stage:<16} p50 {delta(stats.get('p50', 0), old_stats.get('p50', 0)):>8}  "
+                      f"p95 {delta(stats.get('p95', 0), old_stats.get('p95', 0)):>8}")
+    for name, stats in report.get("micro", {}).items():
+        old_stats = baseline.get("micro", {}).get(name)
+        if old_stats:
+            print(f"  micro {name:<16} p50 {delta(stats.get('p50', 0), old_stats.get('p50', 0)):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes-dir", default=os.path.join(ROOT, "resumes"))
+    parser.add_argument("--synthetic", type=int, default=40, help="Generated resumes added to the corpus")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--profile", default="gpu", help="Fake Ollama latency profile")
+    parser.add_argument("--ollama-host", help="Benchmark against a real Ollama instead of the fake one")
+    parser.add_argument("--db", help="SQLite database to use (default: a temporary one)")
+    parser.add_argument("--warmup", type=int, default=2, help="Documents run once before measuring")
+    parser.add_argument("--micro-repeat", type=int, default=20)
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    if args.ollama_host:
+        os.environ["OLLAMA_HOST"] = args.ollama_host
+    else:
+        os.environ["OLLAMA_HOST"] = start_fake_ollama(args.profile, seed=args.seed).url
+    # Every document must reach the LLM stand-in; a warm cache would measure nothing
+    os.environ.setdefault("AI_LLM_CACHE_ENABLED", "0")
+    os.environ.setdefault("AI_HEALTH_PROBE_INTERVAL", "0")
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench-pipeline-"), "bench.sqlite3")
+    setup_django(db_path)
+    corpus = build_corpus(args.resumes_dir, args.synthetic, args.seed)
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profile": "external" if args.ollama_host else args.profile,
+            "documents": len(corpus),
+        },
+        "levels": [],
+    }
+    if args.warmup:
+        # Imports, connection pools and the DB page cache are paid here, not in the first level
+        asyncio.run(run_level(corpus[: args.warmup], 1))
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        print(f"Running {len(corpus)} documents at concurrency {concurrency}...")
+        report["levels"].append(asyncio.run(run_level(corpus, concurrency)))
+
+    if not args.skip_micro:
+        report["micro"] = {
+            "pdf_extraction": micro_pdf_extraction(corpus, args.micro_repeat),
+            "matching": micro_matching(args.micro_repeat),
+            "db_persistence": micro_db_persistence(args.micro_repeat),
+        }
+
+    print_report(report)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Export the fine-tuned model to ONNX and quantize it to int8 for CPU inference.
+
+Writes <model-path>-onnx-int8/ (or --output) containing model_quantized.onnx
+and the tokenizer; select it with AI_INFERENCE_BACKEND=onnx (the directory
+can be moved and pointed at with AI_ONNX_MODEL_PATH).
+
+    python -m tools.export_onnx --model-path fine-tuning-results --arch avx2
+
+Needs optimum[onnxruntime] on the machine doing the export and onnxruntime +
+optimum on the serving machines.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.model_registry import get_default_model_path
+
+ARCHES = ("avx2", "avx512", "avx512_vnni", "arm64")
+
+
+def export(model_path: str, output: str, arch: str, per_channel: bool, keep_fp32: bool) -> None:
+    from optimum.onnxruntime import ORTModelForCausalLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    fp32_dir = os.path.join(output, "fp32") if keep_fp32 else tempfile.mkdtemp(prefix="onnx-fp32-")
+    try:
+        print(f"Exporting {model_path} to ONNX...")
+        model = ORTModelForCausalLM.from_pretrained(model_path, export=True, use_cache=True)
+        model.save_pretrained(fp32_dir)
+
+        print(f"Quantizing to int8 (dynamic, {arch})...")
+        # Dynamic quantization: int8 weights, activations quantized on the fly, no calibration set needed
+        qconfig = getattr(AutoQuantizationConfig, arch)(is_static=False, per_channel=per_channel)
+        quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name="model.onnx")
+        quantizer.quantize(save_dir=output, quantization_config=qconfig)
+
+        AutoTokenizer.from_pretrained(model_path).save_pretrained(output)
+        # The model config (generation settings, special tokens) travels with the graph
+        for name in ("config.json", "generation_config.json"):
+            source = os.path.join(fp32_dir, name)
+            if os.path.exists(source):
+                shutil.copy(source, os.path.join(output, name))
+    finally:
+        if not keep_fp32:
+            shutil.rmtree(fp32_dir, ignore_errors=True)
+
+    size_mb = os.path.getsize(os.path.join(output, "model_quantized.onnx")) / (1024 * 1024)
+    print(f"Wrote {output} (model_quantized.onnx, {size_mb:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=get_default_model_path())
+    parser.add_argument("--output", help="Default: <model-path>-onnx-int8")
+    parser.add_argument("--arch", choices=ARCHES, default="avx2", help="Target CPU instruction set")
+    parser.add_argument("--per-channel", action="store_true", help="Per-channel weight scales (slower, more accurate)")
+    parser.add_argument("--keep-fp32", action="store_true", help="Keep the unquantized export in <output>/fp32")
+    args = parser.parse_args()
+
+    output = args.output or args.model_path.rstrip("/\\") + "-onnx-int8"
+    os.makedirs(output, exist_ok=True)
+    export(args.model_path, output, args.arch, args.per_channel, args.keep_fp32)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Stand-in for the Ollama HTTP API, for benchmarks and CI without a GPU.
+
+Implements POST /api/generate (streaming NDJSON and non-streaming) and
+GET /api/tags. Every agent gets a schema-valid JSON answer for its prompt
+(detected from the agent instructions), derived deterministically from the
+prompt so runs are comparable. Latency is simulated as time-to-first-token
+plus a token rate, both drawn from a seeded distribution, and a share of
+requests can fail with 500s or hang until the client times out.
+
+    python -m tools.fake_ollama --port 11434 --profile gpu
+    OLLAMA_HOST=http://localhost:11434 python manage.py runserver
+
+Profiles: instant, gpu, cpu (see PROFILES); any value can be overridden.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+
+@dataclass
+class LatencyProfile:
+    ttft_ms: float = 0.0
+    # Lognormal sigma applied to time-to-first-token (0 = constant)
+    ttft_jitter: float = 0.0
+    # 0 = emit everything at once
+    tokens_per_second: float = 0.0
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+
+
+PROFILES = {
+    "instant": LatencyProfile(),
+    "gpu": LatencyProfile(ttft_ms=150, ttft_jitter=0.3, tokens_per_second=60),
+    "cpu": LatencyProfile(ttft_ms=800, ttft_jitter=0.4, tokens_per_second=12),
+}
+
+SKILL_VOCABULARY = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Django", "FastAPI", "SQL",
+    "PostgreSQL", "Docker", "Kubernetes", "AWS", "Azure", "Terraform", "CI/CD", "Git",
+    "Machine Learning", "PyTorch", "TensorFlow", "Pandas", "C++", "Go", "Linux", "REST",
+]
+
+
+def _skills_in(prompt: str, seed: int) -> List[str]:
+    found = [
+        skill for skill in SKILL_VOCABULARY
+        if re.search(r"(?<![\w+#])" + re.escape(skill) + r"(?![\w+#])", prompt, re.IGNORECASE)
+    ]
+    if not found:
+        rng = random.Random(seed)
+        found = rng.sample(SKILL_VOCABULARY, 4)
+    return found[:12]
+
+
+def fake_answer(prompt: str) -> Dict[str, Any]:
+    """Schema-valid answer for whichever agent wrote the prompt"""
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    skills = _skills_in(prompt, seed)
+    years = rng.randint(1, 15)
+    level = "Junior" if years < 3 else "Mid-level" if years < 7 else "Senior"
+
+    if "Extract and structure information from resumes" in prompt:
+        return {
+            "personal_info": {"name": "Candidate", "email": "candidate@example.com"},
+            "work_experience": [
+                {"title": "Software Engineer", "company": "Example Corp", "years": years}
+            ],
+            "education": [{"degree": "Bachelors", "field": "Computer Science"}],
+            "skills": skills,
+            "certifications": [],
+        }
+    if "Analyze candidate profiles" in prompt:
+        return {
+            "technical_skills": skills,
+            "years_of_experience": years,
+            "education": {"level": "Bachelors", "field": "Computer Science"},
+            "experience_level": level,
+            "key_achievements": [f"Delivered {rng.randint(2, 9)} production projects"],
+            "domain_expertise": rng.sample(["Web", "Data", "Cloud", "ML", "Fintech"], 2),
+        }
+    if "Screen candidates" in prompt:
+        return {
+            "screening_score": rng.randint(40, 95),
+            "qualification_alignment": "Strong" if years >= 5 else "Partial",
+            "experience_relevance": f"{years} years of relevant experience",
+            "skill_match_percentage": rng.randint(30, 100),
+            "red_flags": [],
+        }
+    if "Generate final recommendations" in prompt:
+        return {
+            "final_recommendations": [
+                {
+                    "title": "Proceed to interview" if years >= 3 else "Consider for junior roles",
+                    "description": f"{level} candidate with strengths in {', '.join(skills[:3])}.",
+                }
+            ],
+            "next_steps": ["Schedule technical interview", "Verify references"],
+        }
+    return {"response": "ok"}
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _chunks(text: str, size: int = 4) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, profile: LatencyProfile, model: str = "llama3.1", seed: int = 0):
+        super().__init__(address, _Handler)
+        self.profile = profile
+        self.model = model
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "hangs": 0}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self) -> Dict[str, float]:
+        """Latency and fault decisions for one request"""
+        profile = self.profile
+        with self.lock:
+            ttft = profile.ttft_ms / 1000.0
+            if profile.ttft_jitter > 0 and ttft > 0:
+                ttft *= self.rng.lognormvariate(0, profile.ttft_jitter)
+            roll = self.rng.random()
+        return {
+            "ttft": ttft,
+            "error": roll < profile.error_rate,
+            "hang": profile.error_rate <= roll < profile.error_rate + profile.hang_rate,
+        }
+
+    def count(self, stat: str) -> None:
+        with self.lock:
+            self.stats[stat] += 1
+
+    def start(self) -> "FakeOllamaServer":
+        """Serve from a background thread (for in-process benchmarks)"""
+        threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeOllamaServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, body: Dict[str, Any]) -> None:
+        line = (json.dumps(body) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": self.server.model, "model": self.server.model}]})
+        elif self.path == "/api/version":
+            self._send_json(200, {"version": "0.0.0-fake"})
+        elif self.path == "/_fake/stats":
+            self._send_json(200, dict(self.server.stats, profile=asdict(self.server.profile)))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+
+        server = self.server
+        server.count("requests")
+        plan = server.draw()
+        if plan["hang"]:
+            server.count("hangs")
+            # Hold the connection until the client gives up
+            time.sleep(3600)
+            return
+        time.sleep(plan["ttft"])
+        if plan["error"]:
+            server.count("errors")
+            self._send_json(500, {"error": "simulated failure"})
+            return
+
+        prompt = request.get("prompt", "")
+        text = json.dumps(fake_answer(prompt))
+        final = {
+            "model": request.get("model", server.model),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": _count_tokens(prompt),
+            "eval_count": _count_tokens(text),
+        }
+        delay = 1.0 / server.profile.tokens_per_second if server.profile.tokens_per_second > 0 else 0.0
+
+        if not request.get("stream", True):
+            time.sleep(delay * final["eval_count"])
+            self._send_json(200, dict(final, response=text))
+            return
+
+        server.count("streamed")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for piece in _chunks(text):
+                self._write_chunk({"model": final["model"], "response": piece, "done": False})
+                if delay:
+                    time.sleep(delay)
+            self._write_chunk(dict(final, response=""))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Clients hang up as soon as the JSON object is complete
+            self.close_connection = True
+
+
+def start_fake_ollama(profile: str = "instant", port: int = 0, seed: int = 0, **overrides) -> FakeOllamaServer:
+    """Start a fake server in this process; port 0 picks a free port"""
+    return FakeOllamaServer(("127.0.0.1", port), replace(PROFILES[profile], **overrides), seed=seed).start()
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="gpu")
+    parser.add_argument("--ttft-ms", type=float)
+    parser.add_argument("--ttft-jitter", type=float)
+    parser.add_argument("--tokens-per-second", type=float)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--hang-rate", type=float)
+    parser.add_argument("--model", default="llama3.1")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    overrides = {
+        name: getattr(args, name)
+        for name in ("ttft_ms", "ttft_jitter", "tokens_per_second", "error_rate", "hang_rate")
+        if getattr(args, name) is not None
+    }
+    profile = replace(PROFILES[args.profile], **overrides)
+    server = FakeOllamaServer((args.host, args.port), profile, model=args.model, seed=args.seed)
+    print(f"Fake Ollama listening on {server.url} with {asdict(profile)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
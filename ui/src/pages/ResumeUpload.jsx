@@ -4,6 +4,8 @@ import { Upload, FileText, CheckCircle, AlertCircle, ArrowRight, X } from 'lucid
 import api from '../services/api';
 import './ResumeUpload.css';
 
+const JOB_POLL_INTERVAL_MS = 2000;
+
 const ResumeUpload = () => {
     const navigate = useNavigate();
     const [dragging, setDragging] = useState(false);
@@ -64,6 +66,16 @@ const ResumeUpload = () => {
         setError(null);
     };
 
+    // The analysis runs in a background job; poll it until it finishes
+    const waitForAnalysis = async (statusUrl) => {
+        for (;;) {
+            const { data: job } = await api.get(statusUrl);
+            if (job.status === 'completed') return job.result;
+            if (job.status === 'failed') return { status: 'error', message: job.error };
+            await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        }
+    };
+
     const handleUpload = async () => {
         if (!file) return;
 
@@ -74,18 +86,19 @@ const ResumeUpload = () => {
         formData.append('file', file);
 
         try {
-            const response = await api.post('/candidates/resume/analyze', formData, {
+            const queued = await api.post('/candidates/resume/analyze', formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
             });
+            const result = await waitForAnalysis(queued.data.status_url);
 
-            if (response.data.status === 'success') {
+            if (result.status === 'success') {
                 setUploadSuccess(true);
                 // Redirect to profile after short delay
                 setTimeout(() => {
                     navigate('/profile');
                 }, 2000);
             } else {
-                setError(response.data.message || 'Upload failed. Please try again.');
+                setError(result.message || 'Upload failed. Please try again.');
             }
         } catch (err) {
             console.error("Upload error", err);